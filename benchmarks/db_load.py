@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import asyncio
+import datetime
+import statistics
+import sys
+import time
+from typing import List
+
+import aiopg
+
+from linkchecker.queries import iterate_urls_to_recheck, update_url_status
+from linkchecker.status import UrlStatus
+
+
+def parse_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(',')]
+
+
+async def measure_scan(pool: aiopg.Pool, limit: int, priority_share: float, iterations: int) -> None:
+    durations = []
+    first_row_durations = []
+    num_urls = 0
+
+    for _ in range(iterations):
+        start = time.monotonic()
+        first_row = None
+        num_urls = 0
+
+        async for _ in iterate_urls_to_recheck(pool, priority_share, limit):
+            if first_row is None:
+                first_row = time.monotonic()
+            num_urls += 1
+
+        durations.append(time.monotonic() - start)
+        first_row_durations.append((first_row or time.monotonic()) - start)
+
+    print(f'scan, limit {limit}: {num_urls} url(s), median {statistics.median(durations):.3f}s (first row after {statistics.median(first_row_durations):.3f}s)')
+
+
+async def measure_updates(dsn: str, urls: List[str], pool_size: int, batch_size: int) -> None:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    next_check = now + datetime.timedelta(days=7)
+
+    batches = asyncio.Queue[List[str]]()
+    for offset in range(0, len(urls), batch_size):
+        batches.put_nowait(urls[offset:offset + batch_size])
+
+    async with aiopg.create_pool(dsn, minsize=pool_size, maxsize=pool_size) as pool:
+        async def worker() -> None:
+            while not batches.empty():
+                batch = batches.get_nowait()
+                await update_url_status(pool, [(url, next_check, next_check) for url in batch], now, UrlStatus(True, 200), None, 1.0)
+
+        start = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(pool_size)))
+        duration = time.monotonic() - start
+
+        # make the urls due again, so repeated runs measure the same data
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("UPDATE links SET next_check = now() - interval '1 hour' WHERE url = ANY(%(urls)s)", {'urls': urls})
+
+    print(f'update, pool size {pool_size}, batch size {batch_size}: {len(urls)} url(s) in {duration:.3f}s ({len(urls) / duration:.0f}/s)')
+
+
+async def run(options: argparse.Namespace) -> None:
+    async with aiopg.create_pool(options.dsn, minsize=1, maxsize=1) as pool:
+        for limit in parse_list(options.limits):
+            await measure_scan(pool, limit, options.priority_share, options.iterations)
+
+        if not options.write:
+            print('status updates not measured, use --write to measure these', file=sys.stderr)
+            return
+
+        urls = [url.url async for url in iterate_urls_to_recheck(pool, options.priority_share, options.updates)]
+
+    if not urls:
+        print('no due urls to measure updates with')
+        return
+
+    for pool_size in parse_list(options.pool_sizes):
+        for batch_size in parse_list(options.batch_sizes):
+            await measure_updates(options.dsn, urls, pool_size, batch_size)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter, description='Measure database load of url scheduling and status updates (see generate_links.py)')
+    parser.add_argument('--dsn', default='dbname=repology_bench', help='connection params of a dedicated benchmark database')
+    parser.add_argument('--limits', default='5000,20000,50000', help='comma separated scan limits to measure')
+    parser.add_argument('--priority-share', type=float, default=0.5, help='share of scan limit for priority urls')
+    parser.add_argument('--iterations', type=int, default=3, help='number of scans per limit')
+    parser.add_argument('--write', action='store_true', help='also measure status updates, OVERWRITING STATUSES of due urls')
+    parser.add_argument('--updates', type=int, default=5000, help='number of urls to update per configuration with --write')
+    parser.add_argument('--pool-sizes', default='1,5,10', help='comma separated connection pool sizes to measure')
+    parser.add_argument('--batch-sizes', default='1,10,100', help='comma separated numbers of urls per UPDATE to measure')
+    options = parser.parse_args()
+
+    asyncio.run(run(options))
+
+
+if __name__ == '__main__':
+    main()
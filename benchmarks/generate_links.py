@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from typing import List
+
+import aiopg
+
+
+# most popular hosts, in order of popularity; the rest are synthetic
+_TOP_HOSTS = [
+    'github.com',
+    'sourceforge.net',
+    'pypi.org',
+    'gitlab.com',
+    'www.gnu.org',
+    'download.savannah.gnu.org',
+    'metacpan.org',
+    'crates.io',
+    'hackage.haskell.org',
+    'bitbucket.org',
+]
+
+_SCHEMA = """
+DROP TABLE IF EXISTS links;
+DROP TABLE IF EXISTS statistics;
+
+CREATE TABLE links (
+    url text NOT NULL PRIMARY KEY,
+    refcount integer NOT NULL DEFAULT 1,
+    priority boolean NOT NULL DEFAULT false,
+    next_check timestamp with time zone NOT NULL DEFAULT now(),
+    last_checked timestamp with time zone,
+
+    ipv4_last_success timestamp with time zone,
+    ipv4_last_failure timestamp with time zone,
+    ipv4_success boolean,
+    ipv4_status_code smallint,
+    ipv4_permanent_redirect_target text,
+
+    ipv6_last_success timestamp with time zone,
+    ipv6_last_failure timestamp with time zone,
+    ipv6_success boolean,
+    ipv6_status_code smallint,
+    ipv6_permanent_redirect_target text,
+
+    check_duration real
+);
+
+CREATE TABLE statistics (
+    num_urls_checked integer NOT NULL DEFAULT 0
+);
+
+INSERT INTO statistics VALUES(DEFAULT);
+"""
+
+_INDEXES = """
+CREATE INDEX links_next_check_idx ON links(next_check);
+ANALYZE links;
+"""
+
+
+def get_host(rank: int) -> str:
+    return _TOP_HOSTS[rank] if rank < len(_TOP_HOSTS) else f'host{rank}.example.org'
+
+
+def get_url(host: str, n: int, rng: random.Random) -> str:
+    scheme = rng.choices(['https', 'http', 'ftp'], [90, 8, 2])[0]
+    return f'{scheme}://{host}/project{n}/{rng.choice(["", "releases/", "download/file.tar.gz"])}'
+
+
+async def insert_batch(pool: aiopg.Pool, urls: List[str], priorities: List[bool], offsets: List[float], checked: List[bool]) -> None:
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                INSERT INTO links(url, priority, next_check, last_checked, ipv4_last_success, ipv4_success, ipv4_status_code)
+                SELECT
+                    url,
+                    priority,
+                    now() + make_interval(secs => next_check_offset),
+                    CASE WHEN checked THEN now() - interval '3 days' + make_interval(secs => next_check_offset) END,
+                    CASE WHEN checked THEN now() - interval '3 days' + make_interval(secs => next_check_offset) END,
+                    CASE WHEN checked THEN true END,
+                    CASE WHEN checked THEN 200 END
+                FROM unnest(%(urls)s::text[], %(priorities)s::boolean[], %(offsets)s::float8[], %(checked)s::boolean[]) AS t(url, priority, next_check_offset, checked)
+                ON CONFLICT DO NOTHING
+                """,
+                {
+                    'urls': urls,
+                    'priorities': priorities,
+                    'offsets': offsets,
+                    'checked': checked,
+                }
+            )
+
+
+async def generate(options: argparse.Namespace) -> None:
+    rng = random.Random(options.seed)
+
+    # Zipf-like host popularity: weight of host with rank r is 1/(r+1)^s
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) ** options.zipf_exponent for rank in range(options.hosts)))
+    urls_per_host = [0] * options.hosts
+
+    async with aiopg.create_pool(options.dsn, minsize=1, maxsize=options.jobs) as pool:
+        if options.create:
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(_SCHEMA)
+
+        start = time.monotonic()
+        pending: List[asyncio.Task[None]] = []
+
+        for batch_start in range(0, options.count, options.batch_size):
+            batch_size = min(options.batch_size, options.count - batch_start)
+
+            urls = []
+            for rank in rng.choices(range(options.hosts), cum_weights=cum_weights, k=batch_size):
+                urls.append(get_url(get_host(rank), urls_per_host[rank], rng))
+                urls_per_host[rank] += 1
+
+            priorities = [rng.random() < options.priority_fraction for _ in urls]
+
+            # next checks are spread uniformly over the recheck period,
+            # with due_fraction of urls already overdue
+            spread = options.spread * 86400
+            offsets = [(rng.random() - options.due_fraction) * spread for _ in urls]
+            checked = [rng.random() >= options.unchecked_fraction for _ in urls]
+
+            pending.append(asyncio.create_task(insert_batch(pool, urls, priorities, offsets, checked)))
+            if len(pending) >= options.jobs:
+                await asyncio.gather(*pending)
+                pending = []
+
+        await asyncio.gather(*pending)
+
+        if options.create:
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(_INDEXES)
+
+        duration = time.monotonic() - start
+
+    top = sorted(range(options.hosts), key=lambda rank: urls_per_host[rank], reverse=True)[:5]
+
+    print(f'{options.count} url(s) generated in {duration:.1f}s ({options.count / duration:.0f}/s)')
+    print(f'{sum(1 for n in urls_per_host if n)} distinct host(s), top: ' + ', '.join(f'{get_host(rank)}: {urls_per_host[rank]}' for rank in top))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter, description='Fill links table with synthetic data')
+    parser.add_argument('--dsn', default='dbname=repology_bench', help='connection params of a dedicated benchmark database')
+    parser.add_argument('--create', action='store_true', help='(re)create links and statistics tables, DROPPING EXISTING DATA')
+    parser.add_argument('--count', type=int, default=1000000, help='number of urls to generate')
+    parser.add_argument('--hosts', type=int, default=200000, help='number of distinct hosts to pick from')
+    parser.add_argument('--zipf-exponent', type=float, default=1.0, help='exponent of Zipf distribution of urls over hosts')
+    parser.add_argument('--priority-fraction', type=float, default=0.02, help='fraction of priority urls')
+    parser.add_argument('--spread', type=float, default=14, help='period in days over which next checks are spread')
+    parser.add_argument('--due-fraction', type=float, default=0.05, help='fraction of urls which are already due for check')
+    parser.add_argument('--unchecked-fraction', type=float, default=0.01, help='fraction of urls which were never checked')
+    parser.add_argument('--batch-size', type=int, default=10000, help='number of urls inserted by a single statement')
+    parser.add_argument('--jobs', type=int, default=4, help='number of parallel inserts')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    options = parser.parse_args()
+
+    asyncio.run(generate(options))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import gc
+import resource
+import socket
+import sys
+from typing import Any, Callable, List
+
+from linkchecker.resolver import MultiDnsStatus, SingleDnsStatus
+from linkchecker.status import ExtendedStatusCodes, UrlStatus
+
+
+def get_rss() -> int:
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # peak value, but that's fine as we only grow
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+def make_dns_status(n: int) -> MultiDnsStatus:
+    if n % 10 == 0:
+        # some share of failures, which used to hold exception objects
+        return MultiDnsStatus(
+            SingleDnsStatus(socket.AF_INET, [], ExtendedStatusCodes.DNS_DOMAIN_NOT_FOUND),
+            SingleDnsStatus(socket.AF_INET6, [], ExtendedStatusCodes.DNS_DOMAIN_NOT_FOUND),
+        )
+
+    return MultiDnsStatus(
+        SingleDnsStatus(socket.AF_INET, [f'10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}', f'10.{n >> 16 & 255}.{n >> 8 & 255}.{(n + 1) & 255}']),
+        SingleDnsStatus(socket.AF_INET6, [f'2001:db8::{n & 0xffff:x}'] if n % 2 else [], None if n % 2 else ExtendedStatusCodes.DNS_NO_ADDRESS_RECORD),
+    )
+
+
+def make_url_status(n: int) -> Any:
+    return (
+        f'https://host{n}.example.com/some/path',
+        UrlStatus(n % 3 != 0, 200 if n % 3 else ExtendedStatusCodes.TIMEOUT),
+        UrlStatus(n % 3 != 0, 200 if n % 3 else ExtendedStatusCodes.TIMEOUT, f'https://host{n}.example.com/other/path' if n % 7 == 0 else None),
+    )
+
+
+def measure(name: str, count: int, factory: Callable[[int], Any]) -> None:
+    gc.collect()
+    rss_before = get_rss()
+
+    items: List[Any] = [factory(n) for n in range(count)]
+
+    gc.collect()
+    rss_after = get_rss()
+
+    print(f'{name}: {(rss_after - rss_before) / count * 100000 / 1024 / 1024:.1f} MiB RSS per 100k ({len(items)} created)')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--count', type=int, default=1000000, help='number of objects to create')
+    options = parser.parse_args()
+
+    measure('cached DNS statuses', options.count, make_dns_status)
+    measure('pending url results', options.count, make_url_status)
+
+
+if __name__ == '__main__':
+    main()
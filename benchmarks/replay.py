@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import asyncio
+import socket
+import time
+from collections import Counter
+from typing import Dict, List, Set
+
+from aiohttp import web
+
+from linkchecker.exceptions import DnsResolutionError
+from linkchecker.hostmanager import HostManager
+from linkchecker.processor.http import HttpUrlProcessor
+from linkchecker.status import ExtendedStatusCodes, UrlStatus
+from linkchecker.traffic import TrafficRecord, read_traffic_profile
+from linkchecker.worker import HostWorkerPool
+
+
+STATUS_NAMES = {value: name for name, value in vars(ExtendedStatusCodes).items() if isinstance(value, int)}
+
+_DNS_ERRORS = frozenset([
+    ExtendedStatusCodes.DNS_ERROR,
+    ExtendedStatusCodes.DNS_DOMAIN_NOT_FOUND,
+    ExtendedStatusCodes.DNS_NO_ADDRESS_RECORD,
+    ExtendedStatusCodes.DNS_REFUSED,
+    ExtendedStatusCodes.DNS_TIMEOUT,
+    ExtendedStatusCodes.DNS_IPV4_MAPPED_IN_AAAA,
+])
+
+
+def get_host(record: TrafficRecord) -> str:
+    return f'h{record.host_id}.replay.test'
+
+
+class ReplayDnsEngine:
+    # resolves every host to localhost, except ones which failed
+    # to resolve during the capture
+    _failures: Dict[str, int]
+    _latency: float
+
+    def __init__(self, records: List[TrafficRecord], latency: float) -> None:
+        self._failures = {get_host(record): record.status_code for record in records if record.status_code in _DNS_ERRORS}
+        self._latency = latency
+
+    async def gethostbyname(self, host: str, family: socket.AddressFamily) -> List[str]:
+        await asyncio.sleep(self._latency)
+        if host in self._failures:
+            raise DnsResolutionError(self._failures[host])
+        return ['127.0.0.1']
+
+    def close(self) -> None:
+        pass
+
+
+class ReplayBackend:
+    # serves /<record index> with the recorded outcome after the
+    # recorded duration, both scaled by the speed-up
+    _records: List[TrafficRecord]
+    _speedup: float
+    _timeout: float
+    _runner: web.AppRunner | None
+
+    def __init__(self, records: List[TrafficRecord], speedup: float, timeout: float) -> None:
+        self._records = records
+        self._speedup = speedup
+        self._timeout = timeout
+        self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        index = int(request.match_info['index'])
+        record = self._records[index]
+
+        if record.status_code == ExtendedStatusCodes.TIMEOUT:
+            await asyncio.sleep(self._timeout + 1)
+            return web.Response()
+
+        # on fallback, the duration covers both HEAD and GET requests
+        duration = record.duration / self._speedup
+        await asyncio.sleep(duration / 2 if record.fallback else duration)
+
+        if record.fallback and request.method == 'HEAD':
+            return web.Response(status=405)
+
+        if record.status_code > 0:
+            if record.redirect and 'final' not in request.query:
+                raise web.HTTPMovedPermanently(f'/{index}?final=1')
+            return web.Response(status=record.status_code)
+
+        # other connection level failures are all replayed as a dropped connection
+        if request.transport is not None:
+            request.transport.close()
+        return web.Response()
+
+    async def start(self, port: int) -> None:
+        app = web.Application()
+        app.router.add_route('*', '/{index}', self._handle)
+        self._runner = web.AppRunner(app, handle_signals=False)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, '127.0.0.1', port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+class ReplayUpdater:
+    outcomes: Counter[int]
+    processed: int
+
+    def __init__(self) -> None:
+        self.outcomes = Counter()
+        self.processed = 0
+
+    async def update_many(self, urls: List[str], status4: UrlStatus | None, status6: UrlStatus | None, check_duration: float | None = None) -> None:
+        self.processed += len(urls)
+        if status4 is not None:
+            self.outcomes[status4.status_code] += len(urls)
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+async def run(options: argparse.Namespace) -> None:
+    # IPv6 requests are not replayed, as the backend only listens on 127.0.0.1
+    records = [record for record in read_traffic_profile(options.profile) if record.family == socket.AF_INET]
+    if options.limit:
+        records = records[:options.limit]
+
+    # outcomes answered without a request during the capture (by circuit
+    # breaker, coalescer etc., which depend on the state built up then)
+    # are only reported, as replaying them would add requests
+    shortcuts = Counter(record.shortcut for record in records if record.shortcut is not None)
+    records = [record for record in records if record.shortcut is None]
+
+    if not records:
+        print('no IPv4 requests in the profile')
+        return
+
+    timeout = options.timeout / options.speedup
+    port = options.port or get_free_port()
+    refused_port = get_free_port()  # nothing listens there
+
+    backend = ReplayBackend(records, options.speedup, timeout)
+    await backend.start(port)
+
+    host_manager = HostManager({
+        'defaults': {'delay': options.delay / options.speedup, 'recheck': '1d-2d', 'priority_recheck': '1d-2d'},
+        'hosts': {},
+    })
+    updater = ReplayUpdater()
+    processor = HttpUrlProcessor(updater, host_manager, timeout, skip_ipv6=True, happy_eyeballs_delay=None, dns_engine=ReplayDnsEngine(records, options.dns_latency / options.speedup))  # type: ignore[arg-type]
+    pool = HostWorkerPool(processor, host_manager, max_workers=options.max_workers, max_host_queue=options.max_host_queue)
+
+    hosts: Set[int] = set()
+    start = time.monotonic()
+
+    try:
+        for index, record in enumerate(records):
+            if options.paced:
+                # submit urls at the moments they were checked during the capture
+                if (wait := record.offset / options.speedup - (time.monotonic() - start)) > 0:
+                    await asyncio.sleep(wait)
+
+            hosts.add(record.host_id)
+            url_port = refused_port if record.status_code == ExtendedStatusCodes.CONNECTION_REFUSED else port
+            await pool.add_url(f'http://{get_host(record)}:{url_port}/{index}')
+
+        await pool.join()
+    finally:
+        await backend.stop()
+
+    duration = time.monotonic() - start
+    captured_duration = (max(record.offset + record.duration for record in records) - records[0].offset) / options.speedup
+
+    print(f'{len(records)} request(s) to {len(hosts)} host(s) replayed in {duration:.1f}s ({updater.processed / duration:.1f} url(s)/s), capture took {captured_duration:.1f}s at the same speed-up')
+
+    expected = Counter(record.status_code for record in records)
+    for code in sorted(set(expected) | set(updater.outcomes), key=lambda code: -expected[code]):
+        print(f'  {STATUS_NAMES.get(code, code)}: {expected[code]} captured, {updater.outcomes[code]} replayed')
+
+    if shortcuts:
+        print(f'{sum(shortcuts.values())} outcome(s) answered without a request during capture, not replayed: ' + ', '.join(f'{shortcut}: {count}' for shortcut, count in shortcuts.most_common()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter, description='Replay traffic profile recorded with --capture-profile against a local fake HTTP and DNS backend')
+    parser.add_argument('profile', help='traffic profile to replay')
+    parser.add_argument('--speedup', type=float, default=10, help='factor to scale recorded durations, delays and timeouts down by')
+    parser.add_argument('--paced', action='store_true', help='submit urls at recorded moments instead of as fast as the worker pool accepts them')
+    parser.add_argument('--limit', type=int, help='replay only first N records')
+    parser.add_argument('--port', type=int, help='port for the fake HTTP backend (random by default)')
+    parser.add_argument('--timeout', type=float, default=60, help='check timeout, before scaling')
+    parser.add_argument('--delay', type=float, default=3, help='delay between requests to a host, before scaling')
+    parser.add_argument('--dns-latency', type=float, default=0.05, help='latency of fake DNS responses, before scaling')
+    parser.add_argument('--max-workers', type=int, default=100, help='maximum number of parallel workers')
+    parser.add_argument('--max-host-queue', type=int, default=100, help='maximum depth of per-host url queue')
+    options = parser.parse_args()
+
+    asyncio.run(run(options))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import random
+import selectors
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Set, Tuple
+
+from linkchecker.hostmanager import HostManager, HostStatus
+from linkchecker.processor import UrlProcessor
+from linkchecker.worker import HostWorkerPool
+
+import yaml
+
+
+# most popular hosts, in order of popularity (see generate_links.py),
+# so hosts.yaml settings apply to them; the rest are synthetic
+_TOP_HOSTS = [
+    'github.com',
+    'sourceforge.net',
+    'pypi.org',
+    'gitlab.com',
+    'www.gnu.org',
+    'download.savannah.gnu.org',
+    'metacpan.org',
+    'crates.io',
+    'hackage.haskell.org',
+    'bitbucket.org',
+]
+
+_MAX_URLS_PER_HOST = 100  # per scan, see iterate_urls_to_recheck()
+
+
+class VirtualTimeSelector(selectors.SelectSelector):
+    # nothing is waited for in real time: instead of blocking until
+    # the next timer is due, the clock jumps right to it
+    now: float
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.now = 0.0
+
+    def select(self, timeout: float | None = None) -> List[Tuple[selectors.SelectorKey, int]]:
+        if timeout is None:
+            raise RuntimeError('simulation has nothing to wait for')
+        self.now += timeout
+        return super().select(0)
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    _virtual_selector: VirtualTimeSelector
+
+    def __init__(self) -> None:
+        selector = VirtualTimeSelector()
+        super().__init__(selector)
+        self._virtual_selector = selector
+
+    def time(self) -> float:
+        return self._virtual_selector.now
+
+
+class Population:
+    urls: List[str]
+    url_ids: Dict[str, int]
+    hosts: List[int]
+    priorities: List[bool]
+    next_checks: List[float]
+    rechecks: List[Tuple[int, int]]
+    host_latencies: List[float]
+    host_dead: List[bool]
+
+    _pending: List[Tuple[float, int]]  # heap of urls not due yet
+    _due: Set[int]
+    _fed: Set[int]
+
+    def __init__(self, options: argparse.Namespace, host_manager: HostManager) -> None:
+        rng = random.Random(options.seed)
+
+        self.host_latencies = [options.latency * rng.lognormvariate(0, options.latency_spread) for _ in range(options.hosts)]
+        self.host_dead = [rng.random() < options.dead_fraction for _ in range(options.hosts)]
+
+        cum_weights = list(itertools.accumulate(1 / (rank + 1) ** options.zipf_exponent for rank in range(options.hosts)))
+        host_names = [_TOP_HOSTS[rank] if rank < len(_TOP_HOSTS) else f'host{rank}.example.org' for rank in range(options.hosts)]
+
+        self.urls = []
+        self.url_ids = {}
+        self.hosts = []
+        self.priorities = []
+        self.next_checks = []
+        self.rechecks = []
+
+        spread = options.spread * 86400
+        for n, rank in enumerate(rng.choices(range(options.hosts), cum_weights=cum_weights, k=options.count)):
+            url = f'https://{host_names[rank]}/project{n}/'
+
+            # blacklisted and skipped hosts are updated in bulk, bypassing the pool
+            if host_manager.get_host_status(url) != HostStatus.OK:
+                continue
+
+            priority = rng.random() < options.priority_fraction
+            recheck, priority_recheck = host_manager.get_rechecks(url)
+
+            self.url_ids[url] = len(self.urls)
+            self.urls.append(url)
+            self.hosts.append(rank)
+            self.priorities.append(priority)
+            self.next_checks.append((rng.random() - options.due_fraction) * spread)
+            self.rechecks.append(priority_recheck if priority else recheck)
+
+        self._pending = [(next_check, url_id) for url_id, next_check in enumerate(self.next_checks)]
+        heapq.heapify(self._pending)
+        self._due = set()
+        self._fed = set()
+
+    def get_due(self, now: float, limit: int, priority_share: float) -> List[int]:
+        while self._pending and self._pending[0][0] < now:
+            self._due.add(heapq.heappop(self._pending)[1])
+
+        # same selection as the feeder query: no more than 100 urls
+        # per host, priority ones first, most overdue first
+        candidates = sorted(self._due, key=lambda url_id: (not self.priorities[url_id], self.next_checks[url_id]))
+        per_host: Counter[int] = Counter()
+        priority_urls: List[int] = []
+        normal_urls: List[int] = []
+
+        for url_id in candidates:
+            per_host[self.hosts[url_id]] += 1
+            if per_host[self.hosts[url_id]] <= _MAX_URLS_PER_HOST:
+                (priority_urls if self.priorities[url_id] else normal_urls).append(url_id)
+
+        priority_urls = priority_urls[:int(limit * priority_share)]
+        return priority_urls + normal_urls[:limit - len(priority_urls)]
+
+    def get_num_due(self) -> int:
+        return len(self._due)
+
+    def mark_fed(self, url_id: int) -> bool:
+        # returns False if the url was already fed and is still not checked
+        if url_id in self._fed:
+            return False
+        self._fed.add(url_id)
+        return True
+
+    def mark_checked(self, url_id: int, now: float, rng: random.Random) -> None:
+        self._due.discard(url_id)
+        self._fed.discard(url_id)
+        self.next_checks[url_id] = now + rng.uniform(*self.rechecks[url_id])
+        heapq.heappush(self._pending, (self.next_checks[url_id], url_id))
+
+
+class SimulationStatistics:
+    checked: int = 0
+    fed: int = 0
+    deferred: int = 0
+    lag_sum: float = 0.0
+    max_lag: float = 0.0
+    busy_worker_seconds: float = 0.0
+
+
+class SimulatedUrlProcessor(UrlProcessor):
+    # each check takes host delay plus service time drawn from the
+    # host latency distribution; dead hosts always time out
+    _population: Population
+    _host_manager: HostManager
+    _stats: SimulationStatistics
+    _options: argparse.Namespace
+    _rng: random.Random
+
+    def __init__(self, population: Population, host_manager: HostManager, stats: SimulationStatistics, options: argparse.Namespace) -> None:
+        self._population = population
+        self._host_manager = host_manager
+        self._stats = stats
+        self._options = options
+        self._rng = random.Random(options.seed)
+
+    def taste(self, url: str) -> bool:
+        return True
+
+    async def process_urls(self, urls: Iterable[str]) -> None:
+        loop = asyncio.get_running_loop()
+
+        for url in urls:
+            url_id = self._population.url_ids[url]
+            host = self._population.hosts[url_id]
+
+            await asyncio.sleep(self._host_manager.get_delay(url) * self._options.delay_scale)
+
+            if self._population.host_dead[host]:
+                await asyncio.sleep(self._options.timeout)
+            else:
+                await asyncio.sleep(min(self._options.timeout, self._population.host_latencies[host] * self._rng.lognormvariate(0, 0.5)))
+
+            lag = loop.time() - self._population.next_checks[url_id]
+            self._stats.checked += 1
+            self._stats.lag_sum += lag
+            self._stats.max_lag = max(self._stats.max_lag, lag)
+
+            self._population.mark_checked(url_id, loop.time(), self._rng)
+
+
+async def simulate(options: argparse.Namespace, host_manager: HostManager, max_workers: int, max_host_queue: int, limit: int) -> None:
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    population = Population(options, host_manager)
+    stats = SimulationStatistics()
+    processor = SimulatedUrlProcessor(population, host_manager, stats, options)
+    pool = HostWorkerPool(processor, host_manager, max_workers=max_workers, max_host_queue=max_host_queue, priority_share=options.priority_share)
+
+    # mirrors the feeder loop of repology-linkchecker.py
+    async def feed() -> None:
+        while True:
+            scan_start = loop.time()
+            num_scanned = 0
+
+            for url_id in population.get_due(scan_start, limit, options.priority_share):
+                stats.fed += 1
+                if not population.mark_fed(url_id):
+                    stats.deferred += 1
+                await pool.add_url(population.urls[url_id], population.priorities[url_id], loop.time() - population.next_checks[url_id])
+                num_scanned += 1
+                if loop.time() - scan_start > options.max_scan_duration:
+                    break
+
+            if num_scanned == 0:
+                await asyncio.sleep(options.idle_interval)
+            else:
+                await pool.wait_for_low_watermark()
+                await asyncio.sleep(max(0.0, scan_start + options.min_scan_interval - loop.time()))
+
+    async def sample_workers() -> None:
+        while True:
+            await asyncio.sleep(1)
+            stats.busy_worker_seconds += pool.get_statistics().workers
+
+    initially_due = sum(1 for next_check in population.next_checks if next_check < start)
+
+    tasks = [asyncio.create_task(feed()), asyncio.create_task(sample_workers())]
+    await asyncio.sleep(options.duration)
+
+    num_in_processing = pool.stop()
+    for task in tasks:
+        task.cancel()
+    pool.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await pool.join()
+
+    pool_stats = pool.get_statistics()
+    duration = loop.time() - start
+
+    print(
+        f'workers {max_workers}, host queue {max_host_queue}, limit {limit}: '
+        f'{stats.checked} checked ({stats.checked / duration:.1f}/s), '
+        f'lag avg {stats.lag_sum / max(1, stats.checked) / 3600:.1f}h max {stats.max_lag / 3600:.1f}h, '
+        f'utilization {stats.busy_worker_seconds / duration / max_workers * 100:.0f}%, '
+        f'{pool_stats.dropped} dropped on full queues, '
+        f'{stats.deferred} of {stats.fed} fed rescanned before check, '
+        f'{pool_stats.discarded + num_in_processing} unfinished at end, '
+        f'{population.get_num_due()} due at end ({initially_due} at start)'
+    )
+
+
+def parse_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(',')]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter, description='Simulate url scheduling by HostWorkerPool in virtual time for different settings')
+    parser.add_argument('--hosts-config', default='hosts.yaml', help='path to host config, for delays, rechecks and skipped hosts')
+    parser.add_argument('--duration', type=float, default=6 * 3600, help='simulated time in seconds')
+    parser.add_argument('--max-workers', default='50,100,200', help='comma separated --max-workers values to simulate')
+    parser.add_argument('--max-host-queue', default='100', help='comma separated --max-host-queue values to simulate')
+    parser.add_argument('--limits', default='5000,20000', help='comma separated feeder LIMIT values to simulate')
+    parser.add_argument('--priority-share', type=float, default=0.5, help='share of scanned urls and workers reserved for priority urls')
+    parser.add_argument('--delay-scale', type=float, default=1.0, help='factor to multiply per-host delays by')
+    parser.add_argument('--min-scan-interval', type=float, default=10, help='minimal interval between fetching urls to check')
+    parser.add_argument('--idle-interval', type=float, default=60, help='interval between fetching urls to check when nothing was due')
+    parser.add_argument('--max-scan-duration', type=float, default=60, help='time after which a scan is interrupted')
+
+    parser.add_argument('--count', type=int, default=200000, help='number of urls in modelled population')
+    parser.add_argument('--hosts', type=int, default=20000, help='number of distinct hosts to pick from')
+    parser.add_argument('--zipf-exponent', type=float, default=1.0, help='exponent of Zipf distribution of urls over hosts')
+    parser.add_argument('--priority-fraction', type=float, default=0.02, help='fraction of priority urls')
+    parser.add_argument('--spread', type=float, default=14, help='period in days over which next checks are spread')
+    parser.add_argument('--due-fraction', type=float, default=0.05, help='fraction of urls which are already due for check')
+    parser.add_argument('--latency', type=float, default=0.5, help='median service time of a check')
+    parser.add_argument('--latency-spread', type=float, default=1.0, help='sigma of log-normal distribution of per-host median service times')
+    parser.add_argument('--dead-fraction', type=float, default=0.02, help='fraction of hosts all checks of which time out')
+    parser.add_argument('--timeout', type=float, default=60, help='check timeout')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    options = parser.parse_args()
+
+    with open(options.hosts_config) as fd:
+        host_manager = HostManager(yaml.safe_load(fd))
+
+    for max_workers, max_host_queue, limit in itertools.product(parse_list(options.max_workers), parse_list(options.max_host_queue), parse_list(options.limits)):
+        start = time.monotonic()
+
+        # each setting is simulated on the same population from scratch
+        loop = VirtualTimeEventLoop()
+        try:
+            loop.run_until_complete(simulate(options, host_manager, max_workers, max_host_queue, limit))
+        finally:
+            loop.close()
+
+        print(f'  simulated {options.duration:.0f}s in {time.monotonic() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
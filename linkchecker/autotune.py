@@ -0,0 +1,165 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import os
+import resource
+from collections import deque
+
+from linkchecker.rolling import RollingCounter
+from linkchecker.updater import UrlUpdater
+from linkchecker.worker import HostWorkerPool
+
+
+def _count_open_files() -> int | None:
+    for path in ['/proc/self/fd', '/dev/fd']:
+        try:
+            return len(os.listdir(path))
+        except OSError:
+            pass
+    return None  # pragma: no cover
+
+
+class WorkerTunerStatistics:
+    increases: int = 0
+    decreases: int = 0
+
+
+class WorkerTuner:
+    # additive increase while the pool is saturated and throughput
+    # grows with it, multiplicative decrease when the event loop lags
+    # or file descriptors run out
+    #
+    # throughput is the rate of written check results; as it's noisy
+    # over single intervals, the number of workers is only changed
+    # (except for the decreases) after a full window since the last
+    # change, and an increase is judged by average throughput over
+    # the window after it
+    _pool: HostWorkerPool
+    _updater: UrlUpdater
+    _min_workers: int
+    _max_workers: int
+    _max_loop_lag: float
+    _max_open_files: int
+    _interval: float
+    _step: int
+    _decrease_factor: float
+
+    _current: int
+    _throughputs: deque[float]
+    _throughput_before_increase: float | None
+    _loop_lag: RollingCounter
+    _open_files: int | None
+    _stats: WorkerTunerStatistics
+
+    def __init__(self, pool: HostWorkerPool, updater: UrlUpdater, min_workers: int, max_workers: int, max_loop_lag: float = 0.1, interval: float = 10.0, window: float = 60.0, step: int = 10, decrease_factor: float = 0.75) -> None:
+        self._pool = pool
+        self._updater = updater
+        self._min_workers = min_workers
+        self._max_workers = max_workers
+        self._max_loop_lag = max_loop_lag
+        self._max_open_files = int(resource.getrlimit(resource.RLIMIT_NOFILE)[0] * 0.8)
+        self._interval = interval
+        self._step = step
+        self._decrease_factor = decrease_factor
+
+        self._current = min_workers
+        self._throughputs = deque(maxlen=max(1, round(window / interval)))
+        self._throughput_before_increase = None
+        self._loop_lag = RollingCounter(interval)
+        self._open_files = None
+        self._stats = WorkerTunerStatistics()
+
+    def get_max_workers(self) -> int:
+        return self._current
+
+    def adjust(self, loop_lag: float, open_files: int | None, throughput: float, saturated: bool) -> int:
+        self._throughputs.append(throughput)
+        window_complete = len(self._throughputs) == self._throughputs.maxlen
+        average_throughput = sum(self._throughputs) / len(self._throughputs)
+
+        if loop_lag > self._max_loop_lag or (open_files is not None and open_files > self._max_open_files):
+            target = max(self._min_workers, int(self._current * self._decrease_factor))
+        elif not window_complete:
+            target = self._current
+        elif self._throughput_before_increase is not None and average_throughput < self._throughput_before_increase * 0.9:
+            # more workers did not bring more checks, take the step back
+            target = max(self._min_workers, self._current - self._step)
+        elif saturated:
+            target = min(self._max_workers, self._current + self._step)
+        else:
+            target = self._current
+
+        if target > self._current:
+            self._throughput_before_increase = average_throughput
+            self._stats.increases += 1
+        elif target < self._current or window_complete:
+            self._throughput_before_increase = None
+            if target < self._current:
+                self._stats.decreases += 1
+
+        if target != self._current:
+            self._throughputs.clear()
+
+        self._current = target
+        return target
+
+    async def _measure_loop_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(0.1)
+            self._loop_lag.add(loop.time() - start - 0.1)
+
+    async def run(self) -> None:
+        self._pool.set_max_workers(self._current)
+
+        loop = asyncio.get_running_loop()
+        lag_meter = asyncio.create_task(self._measure_loop_lag())
+        num_written = self._updater.get_num_written()
+        measured_at = loop.time()
+        try:
+            while True:
+                await asyncio.sleep(self._interval)
+
+                self._open_files = _count_open_files()
+                pool_stats = self._pool.get_statistics()
+                num_written_before, num_written = num_written, self._updater.get_num_written()
+                measured_before, measured_at = measured_at, loop.time()
+
+                self._pool.set_max_workers(
+                    self.adjust(
+                        loop_lag=self._loop_lag.get_max(),
+                        open_files=self._open_files,
+                        throughput=(num_written - num_written_before) / (measured_at - measured_before),
+                        saturated=pool_stats.workers >= self._current,
+                    )
+                )
+        finally:
+            lag_meter.cancel()
+
+    def get_loop_lag(self) -> float:
+        return self._loop_lag.get_max()
+
+    def get_open_files(self) -> int | None:
+        return self._open_files
+
+    def get_statistics(self) -> WorkerTunerStatistics:
+        return self._stats
+
+    def reset_statistics(self) -> None:
+        self._stats = WorkerTunerStatistics()
@@ -0,0 +1,111 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+from typing import Dict, Hashable
+
+from linkchecker.status import ExtendedStatusCodes, UrlStatus
+
+
+# errors which indicate that the host is not reachable at all, as
+# opposed to errors specific to a given url
+_CONNECTION_FAILURES = frozenset([
+    ExtendedStatusCodes.TIMEOUT,
+    ExtendedStatusCodes.CONNECTION_REFUSED,
+    ExtendedStatusCodes.HOST_UNREACHABLE,
+    ExtendedStatusCodes.NETWORK_UNREACHABLE,
+    ExtendedStatusCodes.CONNECTION_ABORTED,
+    ExtendedStatusCodes.ADDRESS_NOT_AVAILABLE,
+])
+
+
+class CircuitBreakerStatistics:
+    opened: int = 0
+    short_circuited: int = 0
+    probes: int = 0
+
+
+class _CircuitState:
+    failures: int
+    status_code: int
+    last_failure: float
+    opened_at: float | None
+
+    def __init__(self, status_code: int, now: float) -> None:
+        self.failures = 0
+        self.status_code = status_code
+        self.last_failure = now
+        self.opened_at = None
+
+
+class CircuitBreaker:
+    _threshold: int
+    _cooldown: float
+    _states: Dict[Hashable, _CircuitState]
+    _stats: CircuitBreakerStatistics
+
+    def __init__(self, threshold: int, cooldown: float) -> None:
+        self._threshold = threshold
+        self._cooldown = cooldown
+        self._states = {}
+        self._stats = CircuitBreakerStatistics()
+
+    def get_short_circuit_status(self, key: Hashable) -> UrlStatus | None:
+        state = self._states.get(key)
+        if state is None or state.opened_at is None:
+            return None
+
+        now = time.monotonic()
+
+        if now - state.opened_at >= self._cooldown:
+            # half-open: let a single probe through; its outcome either
+            # closes the circuit or reopens it for another cooldown period
+            state.opened_at = None
+            state.failures = self._threshold - 1
+            state.last_failure = now
+            self._stats.probes += 1
+            return None
+
+        self._stats.short_circuited += 1
+        return UrlStatus(False, state.status_code)
+
+    def record(self, key: Hashable, status: UrlStatus) -> None:
+        now = time.monotonic()
+
+        if status.success or status.status_code not in _CONNECTION_FAILURES:
+            self._states.pop(key, None)
+            return
+
+        state = self._states.get(key)
+        if state is None or now - state.last_failure >= self._cooldown:
+            if len(self._states) >= 10000:
+                self._states = {k: v for k, v in self._states.items() if v.opened_at is not None or now - v.last_failure < self._cooldown}
+            state = self._states[key] = _CircuitState(status.status_code, now)
+
+        state.failures += 1
+        state.status_code = status.status_code
+        state.last_failure = now
+
+        if state.failures >= self._threshold and state.opened_at is None:
+            state.opened_at = now
+            self._stats.opened += 1
+
+    def get_statistics(self) -> CircuitBreakerStatistics:
+        return self._stats
+
+    def reset_statistics(self) -> None:
+        self._stats = CircuitBreakerStatistics()
@@ -0,0 +1,109 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from linkchecker.status import UrlStatus
+
+import yarl
+
+
+def canonicalize_url(url: str) -> str:
+    try:
+        parsed = yarl.URL(url)
+    except (UnicodeError, ValueError):
+        return url
+
+    if not parsed.is_absolute() or not parsed.host or parsed.user is not None:
+        return url
+
+    host = parsed.host.removeprefix('www.')
+    port = '' if parsed.is_default_port() else f':{parsed.port}'
+    path = parsed.raw_path.rstrip('/')
+    query = f'?{parsed.raw_query_string}' if parsed.raw_query_string else ''
+
+    return f'{parsed.scheme}://{host}{port}{path}{query}'
+
+
+class CoalescingStatistics:
+    urls: int = 0
+    fetched: int = 0
+
+    @property
+    def ratio(self) -> float:
+        return self.urls / self.fetched if self.fetched else 1.0
+
+
+class _CoalescedResult:
+    __slots__ = ('expires', 'ipv4_status', 'ipv6_status')
+
+    expires: float
+    ipv4_status: UrlStatus | None
+    ipv6_status: UrlStatus | None
+
+    def __init__(self, expires: float, ipv4_status: UrlStatus | None, ipv6_status: UrlStatus | None) -> None:
+        self.expires = expires
+        self.ipv4_status = ipv4_status
+        self.ipv6_status = ipv6_status
+
+
+class UrlCoalescer:
+    _ttl: float
+    _results: Dict[str, _CoalescedResult]
+    _stats: CoalescingStatistics
+
+    def __init__(self, ttl: float = 60.0) -> None:
+        self._ttl = ttl
+        self._results = {}
+        self._stats = CoalescingStatistics()
+
+    def group(self, urls: Iterable[str]) -> List[Tuple[str, List[str]]]:
+        groups: Dict[str, List[str]] = {}
+
+        for url in urls:
+            groups.setdefault(canonicalize_url(url), []).append(url)
+            self._stats.urls += 1
+
+        return list(groups.items())
+
+    def get(self, canonical: str) -> Tuple[UrlStatus | None, UrlStatus | None] | None:
+        result = self._results.get(canonical)
+
+        if result is None:
+            return None
+        elif result.expires < time.monotonic():
+            del self._results[canonical]
+            return None
+
+        return result.ipv4_status, result.ipv6_status
+
+    def put(self, canonical: str, ipv4_status: UrlStatus | None, ipv6_status: UrlStatus | None) -> None:
+        now = time.monotonic()
+
+        # drop expired results once in a while to keep memory bounded
+        if len(self._results) >= 10000:
+            self._results = {k: v for k, v in self._results.items() if v.expires >= now}
+
+        self._results[canonical] = _CoalescedResult(now + self._ttl, ipv4_status, ipv6_status)
+        self._stats.fetched += 1
+
+    def get_statistics(self) -> CoalescingStatistics:
+        return self._stats
+
+    def reset_statistics(self) -> None:
+        self._stats = CoalescingStatistics()
@@ -0,0 +1,48 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import socket
+from typing import Any, Dict, Tuple
+
+import aiohttp
+
+
+PreferredAddresses = Dict[Tuple[str, int], str]
+
+
+class AddressRecordingConnector(aiohttp.TCPConnector):
+    # remembers which of the host addresses the connection was
+    # established to, so the resolver may return it first next time
+    _preferred_addresses: PreferredAddresses
+    _address_family: int
+
+    def __init__(self, *args: Any, preferred_addresses: PreferredAddresses, family: socket.AddressFamily = socket.AF_INET, **kwargs: Any) -> None:
+        super().__init__(*args, family=family, **kwargs)
+        self._preferred_addresses = preferred_addresses
+        self._address_family = family
+
+    async def _wrap_create_connection(self, *args: Any, req: aiohttp.ClientRequest, **kwargs: Any) -> Tuple[asyncio.Transport, Any]:
+        transport, protocol = await super()._wrap_create_connection(*args, req=req, **kwargs)
+
+        peername = transport.get_extra_info('peername')
+        if peername is not None and req.url.raw_host is not None:
+            if len(self._preferred_addresses) >= 10000:
+                self._preferred_addresses.clear()
+            self._preferred_addresses[(req.url.raw_host, self._address_family)] = peername[0]
+
+        return transport, protocol
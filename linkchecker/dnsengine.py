@@ -0,0 +1,108 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import socket
+from typing import Dict, List, Tuple
+
+import aiodns
+
+
+# errors which may be specific to a given nameserver or transient
+_RETRYABLE_ERRORS = frozenset([
+    3,  # ARES_ESERVFAIL
+    6,  # ARES_EREFUSED
+    11,  # ARES_ECONNREFUSED
+    12,  # ARES_ETIMEOUT
+])
+
+
+class DnsEngineStatistics:
+    queries: int = 0
+    coalesced: int = 0
+    retries: int = 0
+
+
+class DnsEngine:
+    _resolvers: List[aiodns.DNSResolver]
+    _next_resolver: int
+    _tries: int
+    _semaphore: asyncio.Semaphore
+    _in_flight: Dict[Tuple[str, socket.AddressFamily], 'asyncio.Task[List[str]]']
+    _stats: DnsEngineStatistics
+
+    def __init__(self, nameservers: List[str] | None = None, max_in_flight: int = 100, timeout: float = 5.0, tries: int = 3) -> None:
+        # a separate single-try resolver per nameserver, so retries
+        # and rotation are under our control
+        if nameservers:
+            self._resolvers = [aiodns.DNSResolver([nameserver], timeout=timeout, tries=1) for nameserver in nameservers]
+        else:
+            self._resolvers = [aiodns.DNSResolver(timeout=timeout, tries=1)]
+
+        self._next_resolver = 0
+        self._tries = tries
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._in_flight = {}
+        self._stats = DnsEngineStatistics()
+
+    async def _query(self, host: str, family: socket.AddressFamily) -> List[str]:
+        async with self._semaphore:
+            self._stats.queries += 1
+
+            first_resolver = self._next_resolver
+            self._next_resolver = (self._next_resolver + 1) % len(self._resolvers)
+
+            attempt = 0
+            while True:
+                resolver = self._resolvers[(first_resolver + attempt) % len(self._resolvers)]
+                try:
+                    return list((await resolver.gethostbyname(host, family)).addresses)
+                except aiodns.error.DNSError as e:
+                    attempt += 1
+                    if attempt >= self._tries or not e.args or e.args[0] not in _RETRYABLE_ERRORS:
+                        raise
+                    self._stats.retries += 1
+
+    def _on_query_done(self, key: Tuple[str, socket.AddressFamily], task: 'asyncio.Task[List[str]]') -> None:
+        del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved by waiters, if any left
+
+    async def gethostbyname(self, host: str, family: socket.AddressFamily) -> List[str]:
+        key = (host, family)
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._in_flight[key] = asyncio.create_task(self._query(host, family))
+            task.add_done_callback(lambda task: self._on_query_done(key, task))
+        else:
+            self._stats.coalesced += 1
+
+        # the query is shared, so a cancelled waiter must not cancel it
+        return await asyncio.shield(task)
+
+    def get_statistics(self) -> DnsEngineStatistics:
+        return self._stats
+
+    def reset_statistics(self) -> None:
+        self._stats = DnsEngineStatistics()
+
+    def close(self) -> None:
+        for task in self._in_flight.values():
+            task.cancel()
+        for resolver in self._resolvers:
+            resolver.cancel()
@@ -16,12 +16,14 @@
 # along with repology.  If not, see <http://www.gnu.org/licenses/>.
 
 import asyncio
+import collections
 import concurrent
 import errno
 import socket
 import sys
+import time
 import traceback
-from typing import Any, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
 
 import aiodns
 
@@ -32,129 +34,130 @@ import idna
 from linkchecker.status import ExtendedStatusCodes
 
 
-def _full_class_name(cls: Any) -> str:
-    if cls.__module__ is None:
-        return str(cls.__name__)
-    else:
-        return str(cls.__module__ + '.' + cls.__name__)
+class DnsResolutionError(Exception):
+    # cached DNS failure, carries already classified status code
+    # instead of original exception with its traceback and frames
+    status_code: int
 
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f'DNS resolution failed with status {status_code}')
+        self.status_code = status_code
 
-def _print_exception_info(e: BaseException, level: int = 0) -> None:
-    prefix = '  ' * level
-    print('{}  Class: {}'.format(prefix, _full_class_name(e.__class__)), file=sys.stderr)
-    print('{}Message: {}'.format(prefix, str(e)), file=sys.stderr)
-    print('{}  Bases: {}'.format(prefix, ', '.join((_full_class_name(cls) for cls in e.__class__.mro()))), file=sys.stderr)
-    errn = getattr(e, 'errno', None)
-    if errn:
-        print('{}  Errno: {}'.format(prefix, errn), file=sys.stderr)
-
-    if e.__cause__:
-        print('{}Cause:'.format(prefix), file=sys.stderr)
-        _print_exception_info(e.__cause__, level + 1)
 
+_Rule = Tuple[Type[BaseException], Optional[Callable[[Any], bool]], int]
 
-def _classify_exception(e: BaseException) -> Optional[int]:
-    if isinstance(e, concurrent.futures.TimeoutError):
-        return ExtendedStatusCodes.TIMEOUT  # timeouts in python <= 3.7
 
-    if isinstance(e, asyncio.TimeoutError):
-        return ExtendedStatusCodes.TIMEOUT  # timeouts in pytnon >= 3.8
+def _errno_is(code: int) -> Callable[[Any], bool]:
+    return lambda e: bool(e.errno == code)
 
-    if isinstance(e, aiohttp.client_exceptions.TooManyRedirects):
-        return ExtendedStatusCodes.TOO_MANY_REDIRECTS
 
-    if isinstance(e, aiohttp.client_exceptions.ClientConnectorCertificateError) and e.certificate_error.verify_code == 10:  # type: ignore  # X509_V_ERR_CERT_HAS_EXPIRED
-        return ExtendedStatusCodes.SSL_CERTIFICATE_HAS_EXPIRED
+def _verify_code_is(code: int) -> Callable[[Any], bool]:
+    return lambda e: bool(e.certificate_error.verify_code == code)
 
-    if isinstance(e, aiohttp.client_exceptions.ClientConnectorCertificateError) and e.certificate_error.verify_code == 18:  # type: ignore  # X509_V_ERR_DEPTH_ZERO_SELF_SIGNED_CERT
-        return ExtendedStatusCodes.SSL_CERTIFICATE_SELF_SIGNED
 
-    if isinstance(e, aiohttp.client_exceptions.ClientConnectorCertificateError) and e.certificate_error.verify_code == 19:  # type: ignore  # X509_V_ERR_SELF_SIGNED_CERT_IN_CHAIN
-        return ExtendedStatusCodes.SSL_CERTIFICATE_SELF_SIGNED_IN_CHAIN
+def _dns_error_is(code: int) -> Callable[[Any], bool]:
+    return lambda e: bool(e.args[0] == code)
 
-    if isinstance(e, aiohttp.client_exceptions.ClientConnectorCertificateError) and e.certificate_error.verify_code == 20:  # type: ignore  # X509_V_ERR_UNABLE_TO_GET_ISSUER_CERT_LOCALLY
-        return ExtendedStatusCodes.SSL_CERTIFICATE_INCOMPLETE_CHAIN
 
-    if isinstance(e, aiohttp.client_exceptions.ClientConnectorCertificateError) and e.certificate_error.verify_code == 62:  # type: ignore  # X509_V_ERR_HOSTNAME_MISMATCH
-        return ExtendedStatusCodes.SSL_CERTIFICATE_HOSTNAME_MISMATCH
+def _message_is(message: str) -> Callable[[Any], bool]:
+    return lambda e: str(e) == message
 
-    if isinstance(e, aiohttp.client_exceptions.ClientConnectorCertificateError):
-        return ExtendedStatusCodes.SSL_ERROR
 
-    if isinstance(e, aiohttp.client_exceptions.ClientConnectorSSLError):
-        return ExtendedStatusCodes.SSL_ERROR
+# order matters: first matching rule wins
+_RULES: List[_Rule] = [
+    (concurrent.futures.TimeoutError, None, ExtendedStatusCodes.TIMEOUT),  # timeouts in python <= 3.7
+    (asyncio.TimeoutError, None, ExtendedStatusCodes.TIMEOUT),  # timeouts in pytnon >= 3.8
 
-    if isinstance(e, aiohttp.client_exceptions.ServerDisconnectedError):
-        return ExtendedStatusCodes.SERVER_DISCONNECTED
+    (aiohttp.client_exceptions.TooManyRedirects, None, ExtendedStatusCodes.TOO_MANY_REDIRECTS),
 
-    if isinstance(e, ValueError) and str(e) == 'URL should be absolute':
-        return ExtendedStatusCodes.INVALID_URL
+    (aiohttp.client_exceptions.ClientConnectorCertificateError, _verify_code_is(10), ExtendedStatusCodes.SSL_CERTIFICATE_HAS_EXPIRED),  # X509_V_ERR_CERT_HAS_EXPIRED
+    (aiohttp.client_exceptions.ClientConnectorCertificateError, _verify_code_is(18), ExtendedStatusCodes.SSL_CERTIFICATE_SELF_SIGNED),  # X509_V_ERR_DEPTH_ZERO_SELF_SIGNED_CERT
+    (aiohttp.client_exceptions.ClientConnectorCertificateError, _verify_code_is(19), ExtendedStatusCodes.SSL_CERTIFICATE_SELF_SIGNED_IN_CHAIN),  # X509_V_ERR_SELF_SIGNED_CERT_IN_CHAIN
+    (aiohttp.client_exceptions.ClientConnectorCertificateError, _verify_code_is(20), ExtendedStatusCodes.SSL_CERTIFICATE_INCOMPLETE_CHAIN),  # X509_V_ERR_UNABLE_TO_GET_ISSUER_CERT_LOCALLY
+    (aiohttp.client_exceptions.ClientConnectorCertificateError, _verify_code_is(62), ExtendedStatusCodes.SSL_CERTIFICATE_HOSTNAME_MISMATCH),  # X509_V_ERR_HOSTNAME_MISMATCH
+    (aiohttp.client_exceptions.ClientConnectorCertificateError, None, ExtendedStatusCodes.SSL_ERROR),
+    (aiohttp.client_exceptions.ClientConnectorSSLError, None, ExtendedStatusCodes.SSL_ERROR),
 
-    if isinstance(e, ValueError) and str(e) == 'Can redirect only to http or https':
-        # XXX
-        return ExtendedStatusCodes.INVALID_URL
+    (aiohttp.client_exceptions.ServerDisconnectedError, None, ExtendedStatusCodes.SERVER_DISCONNECTED),
 
-    if isinstance(e, aiohttp.client_exceptions.InvalidURL):
-        return ExtendedStatusCodes.INVALID_URL
+    (ValueError, _message_is('URL should be absolute'), ExtendedStatusCodes.INVALID_URL),
+    (ValueError, _message_is('Can redirect only to http or https'), ExtendedStatusCodes.INVALID_URL),  # XXX
+    (aiohttp.client_exceptions.InvalidURL, None, ExtendedStatusCodes.INVALID_URL),
+    (UnicodeError, None, ExtendedStatusCodes.INVALID_URL),
+    (idna.core.IDNAError, None, ExtendedStatusCodes.INVALID_URL),
 
-    if isinstance(e, UnicodeError):
-        return ExtendedStatusCodes.INVALID_URL
+    (socket.gaierror, None, ExtendedStatusCodes.DNS_ERROR),
 
-    if isinstance(e, idna.core.IDNAError):
-        return ExtendedStatusCodes.INVALID_URL
+    (OSError, _errno_is(errno.ENETUNREACH), ExtendedStatusCodes.NETWORK_UNREACHABLE),
+    (OSError, _errno_is(errno.ECONNRESET), ExtendedStatusCodes.CONNECTION_RESET_BY_PEER),
+    (OSError, _errno_is(errno.ECONNREFUSED), ExtendedStatusCodes.CONNECTION_REFUSED),
+    (OSError, _errno_is(errno.EHOSTUNREACH), ExtendedStatusCodes.HOST_UNREACHABLE),
+    (OSError, _errno_is(errno.EADDRNOTAVAIL), ExtendedStatusCodes.ADDRESS_NOT_AVAILABLE),
+    (ConnectionResetError, None, ExtendedStatusCodes.CONNECTION_RESET_BY_PEER),
+    (ConnectionAbortedError, None, ExtendedStatusCodes.CONNECTION_ABORTED),
+    # XXX: the exception is generic, but the only real world case
+    # for this is IPv4-mapped (::ffff:0:0/96) in AAAA
+    (OSError, _errno_is(errno.EINVAL), ExtendedStatusCodes.DNS_IPV4_MAPPED_IN_AAAA),
 
-    if isinstance(e, socket.gaierror):
-        return ExtendedStatusCodes.DNS_ERROR
+    (aiohttp.http_exceptions.BadHttpMessage, None, ExtendedStatusCodes.BAD_HTTP),
 
-    if isinstance(e, OSError) and e.errno == errno.ENETUNREACH:
-        return ExtendedStatusCodes.NETWORK_UNREACHABLE
+    (aiodns.error.DNSError, _dns_error_is(1), ExtendedStatusCodes.DNS_NO_ADDRESS_RECORD),  # ARES_ENODATA
+    (aiodns.error.DNSError, _dns_error_is(4), ExtendedStatusCodes.DNS_DOMAIN_NOT_FOUND),  # ARES_ENOTFOUND
+    (aiodns.error.DNSError, _dns_error_is(8), ExtendedStatusCodes.INVALID_URL),  # ARES_EBADNAME
+    (aiodns.error.DNSError, _dns_error_is(11), ExtendedStatusCodes.DNS_REFUSED),  # ARES_ECONNREFUSED
+    (aiodns.error.DNSError, _dns_error_is(12), ExtendedStatusCodes.DNS_TIMEOUT),  # ARES_ETIMEOUT
+    (aiodns.error.DNSError, None, ExtendedStatusCodes.DNS_ERROR),
+]
 
-    if isinstance(e, OSError) and e.errno == errno.ECONNRESET:
-        return ExtendedStatusCodes.CONNECTION_RESET_BY_PEER
+# rules applicable to each exception type seen so far
+_rules_by_type: Dict[Type[BaseException], Tuple[_Rule, ...]] = {}
 
-    if isinstance(e, OSError) and e.errno == errno.ECONNREFUSED:
-        return ExtendedStatusCodes.CONNECTION_REFUSED
+_classification_counters: collections.Counter[int] = collections.Counter()
 
-    if isinstance(e, OSError) and e.errno == errno.EHOSTUNREACH:
-        return ExtendedStatusCodes.HOST_UNREACHABLE
+_UNKNOWN_ERROR_REPORT_INTERVAL = 600.0
 
-    if isinstance(e, OSError) and e.errno == errno.EADDRNOTAVAIL:
-        return ExtendedStatusCodes.ADDRESS_NOT_AVAILABLE
+# exception signature -> (time of last report, number of suppressed reports)
+_unknown_error_reports: Dict[Tuple[str, ...], Tuple[float, int]] = {}
 
-    if isinstance(e, ConnectionResetError):
-        return ExtendedStatusCodes.CONNECTION_RESET_BY_PEER
 
-    if isinstance(e, ConnectionAbortedError):
-        return ExtendedStatusCodes.CONNECTION_ABORTED
+def _full_class_name(cls: Any) -> str:
+    if cls.__module__ is None:
+        return str(cls.__name__)
+    else:
+        return str(cls.__module__ + '.' + cls.__name__)
 
-    if isinstance(e, OSError) and e.errno == errno.EINVAL:
-        # XXX: the exception is generic, but the only real world case
-        # for this is IPv4-mapped (::ffff:0:0/96) in AAAA
-        return ExtendedStatusCodes.DNS_IPV4_MAPPED_IN_AAAA
 
-    if isinstance(e, aiohttp.http_exceptions.BadHttpMessage):
-        return ExtendedStatusCodes.BAD_HTTP
+def _format_exception_info(e: BaseException, level: int = 0) -> List[str]:
+    prefix = '  ' * level
+    lines = [
+        '{}  Class: {}'.format(prefix, _full_class_name(e.__class__)),
+        '{}Message: {}'.format(prefix, str(e)),
+        '{}  Bases: {}'.format(prefix, ', '.join((_full_class_name(cls) for cls in e.__class__.mro()))),
+    ]
+    errn = getattr(e, 'errno', None)
+    if errn:
+        lines.append('{}  Errno: {}'.format(prefix, errn))
 
-    if isinstance(e, OSError) and e.errno == errno.ECONNRESET:
-        return ExtendedStatusCodes.CONNECTION_RESET_BY_PEER
+    if e.__cause__:
+        lines.append('{}Cause:'.format(prefix))
+        lines.extend(_format_exception_info(e.__cause__, level + 1))
 
-    if isinstance(e, aiodns.error.DNSError) and e.args[0] == 1:  # ARES_ENODATA
-        return ExtendedStatusCodes.DNS_NO_ADDRESS_RECORD
+    return lines
 
-    if isinstance(e, aiodns.error.DNSError) and e.args[0] == 4:  # ARES_ENOTFOUND
-        return ExtendedStatusCodes.DNS_DOMAIN_NOT_FOUND
 
-    if isinstance(e, aiodns.error.DNSError) and e.args[0] == 8:  # ARES_EBADNAME
-        return ExtendedStatusCodes.INVALID_URL
+def _get_rules(cls: Type[BaseException]) -> Tuple[_Rule, ...]:
+    if (rules := _rules_by_type.get(cls)) is None:
+        rules = _rules_by_type[cls] = tuple(rule for rule in _RULES if issubclass(cls, rule[0]))
+    return rules
 
-    if isinstance(e, aiodns.error.DNSError) and e.args[0] == 11:  # ARES_ECONNREFUSED
-        return ExtendedStatusCodes.DNS_REFUSED
 
-    if isinstance(e, aiodns.error.DNSError) and e.args[0] == 12:  # ARES_ETIMEOUT
-        return ExtendedStatusCodes.DNS_TIMEOUT
+def _classify_exception(e: BaseException) -> Optional[int]:
+    if isinstance(e, DnsResolutionError):
+        return e.status_code
 
-    if isinstance(e, aiodns.error.DNSError):
-        return ExtendedStatusCodes.DNS_ERROR
+    for _, predicate, code in _get_rules(e.__class__):
+        if predicate is None or predicate(e):
+            return code
 
     if e.__cause__:
         return _classify_exception(e.__cause__)
@@ -162,15 +165,56 @@ def _classify_exception(e: BaseException) -> Optional[int]:
     return None
 
 
+def _get_exception_signature(e: BaseException) -> Tuple[str, ...]:
+    signature = []
+    current: Optional[BaseException] = e
+    while current is not None:
+        signature.append(_full_class_name(current.__class__) + ':' + str(getattr(current, 'errno', None)))
+        current = current.__cause__
+    return tuple(signature)
+
+
+def _write_report(report: str) -> None:
+    try:
+        # don't block the event loop on stderr
+        asyncio.get_running_loop().run_in_executor(None, sys.stderr.write, report)
+    except RuntimeError:
+        sys.stderr.write(report)
+
+
+def _report_unknown_error(e: BaseException, url: str) -> None:
+    signature = _get_exception_signature(e)
+    now = time.monotonic()
+
+    last_report, suppressed = _unknown_error_reports.get(signature, (None, 0))
+
+    if last_report is not None and now - last_report < _UNKNOWN_ERROR_REPORT_INTERVAL:
+        _unknown_error_reports[signature] = (last_report, suppressed + 1)
+        return
+
+    _unknown_error_reports[signature] = (now, 0)
+
+    lines = ['=' * 78, 'Cannot classify error when checking {}:'.format(url)]
+    lines.extend(_format_exception_info(e))
+    if suppressed:
+        lines.append('{} more error(s) with the same signature were not reported'.format(suppressed))
+    lines.append('Traceback:')
+    lines.extend(line.rstrip('\n') for line in traceback.format_exception(e.__class__, e, e.__traceback__))
+
+    _write_report('\n'.join(lines) + '\n')
+
+
 def classify_exception(e: BaseException, url: str) -> int:
     code = _classify_exception(e)
-    if code is not None:
-        return code
 
-    print('=' * 78, file=sys.stderr)
-    print('Cannot classify error when checking {}:'.format(url), file=sys.stderr)
-    _print_exception_info(e)
-    print('Traceback:', file=sys.stderr)
-    traceback.print_stack()
+    if code is None:
+        _report_unknown_error(e, url)
+        code = ExtendedStatusCodes.UNKNOWN_ERROR
+
+    _classification_counters[code] += 1
+
+    return code
+
 
-    return ExtendedStatusCodes.UNKNOWN_ERROR
+def get_classification_counters() -> Dict[int, int]:
+    return dict(_classification_counters)
@@ -0,0 +1,158 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import Counter
+from typing import Dict, List, Set, TextIO, Tuple
+
+from linkchecker.status import ExtendedStatusCodes, UrlStatus
+
+
+def _get_result_class(status: UrlStatus) -> str:
+    code = status.status_code
+    if status.success:
+        return 'success'
+    elif code > 0:
+        return 'http_error'
+    elif code == ExtendedStatusCodes.TIMEOUT:
+        return 'timeout'
+    elif -300 < code <= -200:
+        return 'dns_error'
+    elif -400 < code <= -300:
+        return 'connection_error'
+    elif -500 < code <= -400:
+        return 'http_error'
+    elif -600 < code <= -500:
+        return 'ssl_error'
+    return 'other_error'
+
+
+class HostCost:
+    __slots__ = ('worker_seconds', 'error', 'sleep_seconds', 'requests', 'content_bytes', 'timeouts', 'results')
+
+    worker_seconds: float
+    error: float  # worker_seconds overestimation, see HostCostAccounting
+    sleep_seconds: float
+    requests: int
+    content_bytes: int  # as advertised by Content-Length, bodies are not read
+    timeouts: int
+    results: Counter[str]
+
+    def __init__(self, worker_seconds: float = 0.0) -> None:
+        self.worker_seconds = worker_seconds
+        self.error = worker_seconds
+        self.sleep_seconds = 0.0
+        self.requests = 0
+        self.content_bytes = 0
+        self.timeouts = 0
+        self.results = Counter()
+
+
+class HostCostAccounting:
+    # Space-Saving sketch weighted by worker time: no more than capacity
+    # hostkeys are tracked, and a new one replaces the cheapest, taking
+    # over its worker time as a possible overestimation; hostkeys which
+    # consume a significant share of worker time are guaranteed to stay
+    #
+    # worker time is only known when a batch is finished, so hostkeys
+    # being processed are pinned and never evicted meanwhile
+    _capacity: int
+    _costs: Dict[str, HostCost]
+    _pinned: Set[str]
+
+    def __init__(self, capacity: int = 1000) -> None:
+        self._capacity = capacity
+        self._costs = {}
+        self._pinned = set()
+
+    def _get(self, hostkey: str) -> HostCost:
+        cost = self._costs.get(hostkey)
+        if cost is not None:
+            return cost
+
+        evictable = [key for key in self._costs if key not in self._pinned] if len(self._costs) >= self._capacity else []
+
+        if not evictable:
+            cost = self._costs[hostkey] = HostCost()
+            return cost
+
+        cheapest = min(evictable, key=lambda key: self._costs[key].worker_seconds)
+        cost = self._costs[hostkey] = HostCost(self._costs.pop(cheapest).worker_seconds)
+        return cost
+
+    def pin(self, hostkey: str) -> None:
+        self._get(hostkey)
+        self._pinned.add(hostkey)
+
+    def unpin(self, hostkey: str) -> None:
+        self._pinned.discard(hostkey)
+
+    def add_worker_time(self, hostkey: str, seconds: float) -> None:
+        self._get(hostkey).worker_seconds += seconds
+
+    def add_sleep(self, hostkey: str, seconds: float) -> None:
+        self._get(hostkey).sleep_seconds += seconds
+
+    def add_requests(self, hostkey: str, count: int = 1, content_bytes: int = 0) -> None:
+        cost = self._get(hostkey)
+        cost.requests += count
+        cost.content_bytes += content_bytes
+
+    def add_result(self, hostkey: str, status: UrlStatus) -> None:
+        cost = self._get(hostkey)
+        if status.status_code == ExtendedStatusCodes.TIMEOUT:
+            cost.timeouts += 1
+        cost.results[_get_result_class(status)] += 1
+
+    def get_top(self, count: int) -> List[Tuple[str, HostCost]]:
+        return sorted(self._costs.items(), key=lambda item: item[1].worker_seconds, reverse=True)[:count]
+
+    def dump(self, file: TextIO, count: int) -> None:
+        print(f'Top {count} hosts by worker time (of {len(self._costs)} tracked):', file=file)
+        for hostkey, cost in self.get_top(count):
+            results = ', '.join(f'{name}: {num}' for name, num in cost.results.most_common())
+            print(
+                f'  {hostkey}: {cost.worker_seconds:.0f}s worker time (up to {cost.error:.0f}s overestimated), '
+                f'{cost.sleep_seconds:.0f}s sleeping, {cost.requests} request(s), {cost.content_bytes} byte(s) of content, '
+                f'{cost.timeouts} timeout(s); {results}',
+                file=file
+            )
+
+    def write_metrics(self, file: TextIO, count: int) -> None:
+        # Prometheus text format; values are totals since start, but a
+        # hostkey may drop out of the sketch, so these are gauges
+        top = self.get_top(count)
+
+        def write_metric(name: str, description: str, values: List[Tuple[str, float]]) -> None:
+            print(f'# HELP repology_linkchecker_host_{name} {description}', file=file)
+            print(f'# TYPE repology_linkchecker_host_{name} gauge', file=file)
+            for labels, value in values:
+                print(f'repology_linkchecker_host_{name}{{{labels}}} {value:g}', file=file)
+
+        def escape(value: str) -> str:
+            return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+        hostkeys = [(f'hostkey="{escape(hostkey)}"', cost) for hostkey, cost in top]
+
+        write_metric('worker_seconds', 'Time host workers spent processing urls of the host.', [(labels, cost.worker_seconds) for labels, cost in hostkeys])
+        write_metric('sleep_seconds', 'Time spent in per-host delays between requests.', [(labels, cost.sleep_seconds) for labels, cost in hostkeys])
+        write_metric('requests', 'Number of requests made to the host.', [(labels, cost.requests) for labels, cost in hostkeys])
+        write_metric('content_bytes', 'Content-Length of responses of the host, bodies are not downloaded.', [(labels, cost.content_bytes) for labels, cost in hostkeys])
+        write_metric('timeouts', 'Number of checks of the host which timed out.', [(labels, cost.timeouts) for labels, cost in hostkeys])
+        write_metric(
+            'results', 'Number of checks of the host by result class.',
+            [(f'{labels},class="{name}"', num) for labels, cost in hostkeys for name, num in sorted(cost.results.items())]
+        )
@@ -28,20 +28,21 @@ class HostStatus(Enum):
     SKIPPED = 2
 
 
-def _parse_recheck(recheck: str) -> Tuple[int, int]:
-    def parse_time(time: str) -> int:
-        if time.endswith('m'):
-            return int(time[:-1]) * 60
-        elif time.endswith('h'):
-            return int(time[:-1]) * 60 * 60
-        elif time.endswith('d'):
-            return int(time[:-1]) * 60 * 60 * 24
-        elif time.endswith('w'):
-            return int(time[:-1]) * 60 * 60 * 24 * 7
-        else:
-            return int(time)
+def _parse_time(time: str) -> int:
+    if time.endswith('m'):
+        return int(time[:-1]) * 60
+    elif time.endswith('h'):
+        return int(time[:-1]) * 60 * 60
+    elif time.endswith('d'):
+        return int(time[:-1]) * 60 * 60 * 24
+    elif time.endswith('w'):
+        return int(time[:-1]) * 60 * 60 * 24 * 7
+    else:
+        return int(time)
+
 
-    recheck_min, recheck_max = map(parse_time, recheck.split('-', 1))
+def _parse_recheck(recheck: str) -> Tuple[int, int]:
+    recheck_min, recheck_max = map(_parse_time, recheck.split('-', 1))
 
     return recheck_min, recheck_max
 
@@ -50,28 +51,52 @@ class _DefaultHostSettings:
     delay: float
     recheck: Tuple[int, int]
     priority_recheck: Tuple[int, int]
+    stable_recheck: Optional[Tuple[int, int]]
+    stable_after: int
+    confirm_recheck: Optional[Tuple[int, int]]
 
-    def __init__(self, delay: float, recheck: str, priority_recheck: str) -> None:
+    def __init__(self, delay: float, recheck: str, priority_recheck: str, stable_recheck: Optional[str] = None, stable_after: str = '0', confirm_recheck: Optional[str] = None) -> None:
         self.delay = delay
         self.recheck = _parse_recheck(recheck)
         self.priority_recheck = _parse_recheck(priority_recheck)
+        self.stable_recheck = _parse_recheck(stable_recheck) if stable_recheck is not None else None
+        self.stable_after = _parse_time(str(stable_after))
+        self.confirm_recheck = _parse_recheck(confirm_recheck) if confirm_recheck is not None else None
 
 
 class _HostSettings:
     delay: Optional[float]
     recheck: Optional[Tuple[int, int]]
     priority_recheck: Optional[Tuple[int, int]]
+    stable_recheck: Optional[Tuple[int, int]]
+    stable_after: Optional[int]
+    confirm_recheck: Optional[Tuple[int, int]]
     blacklist: Optional[bool]
     skip: Optional[bool]
     aggregate: bool = False
-
-    def __init__(self, delay: Optional[float] = None, recheck: Optional[str] = None, priority_recheck: Optional[str] = None, blacklist: Optional[bool] = None, skip: Optional[bool] = None, aggregate: bool = False) -> None:
+    timeout: Optional[float]
+    connect_timeout: Optional[float]
+    read_timeout: Optional[float]
+    ipv6_timeout: Optional[float]
+    ipv6_connect_timeout: Optional[float]
+    ipv6_read_timeout: Optional[float]
+
+    def __init__(self, delay: Optional[float] = None, recheck: Optional[str] = None, priority_recheck: Optional[str] = None, stable_recheck: Optional[str] = None, stable_after: Optional[str] = None, confirm_recheck: Optional[str] = None, blacklist: Optional[bool] = None, skip: Optional[bool] = None, aggregate: bool = False, timeout: Optional[float] = None, connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None, ipv6_timeout: Optional[float] = None, ipv6_connect_timeout: Optional[float] = None, ipv6_read_timeout: Optional[float] = None) -> None:
         self.delay = delay
         self.recheck = _parse_recheck(recheck) if recheck is not None else None
         self.priority_recheck = _parse_recheck(priority_recheck) if priority_recheck is not None else None
+        self.stable_recheck = _parse_recheck(stable_recheck) if stable_recheck is not None else None
+        self.stable_after = _parse_time(str(stable_after)) if stable_after is not None else None
+        self.confirm_recheck = _parse_recheck(confirm_recheck) if confirm_recheck is not None else None
         self.blacklist = blacklist
         self.skip = skip
         self.aggregate = aggregate
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.ipv6_timeout = ipv6_timeout
+        self.ipv6_connect_timeout = ipv6_connect_timeout
+        self.ipv6_read_timeout = ipv6_read_timeout
 
     def update(self, other: '_HostSettings') -> None:
         if other.delay is not None:
@@ -80,12 +105,30 @@ class _HostSettings:
             self.recheck = other.recheck
         if other.priority_recheck is not None:
             self.priority_recheck = other.priority_recheck
+        if other.stable_recheck is not None:
+            self.stable_recheck = other.stable_recheck
+        if other.stable_after is not None:
+            self.stable_after = other.stable_after
+        if other.confirm_recheck is not None:
+            self.confirm_recheck = other.confirm_recheck
         if other.blacklist is not None:
             self.blacklist = other.blacklist
         if other.skip is not None:
             self.skip = other.skip
         if other.aggregate:
             self.aggregate = True
+        if other.timeout is not None:
+            self.timeout = other.timeout
+        if other.connect_timeout is not None:
+            self.connect_timeout = other.connect_timeout
+        if other.read_timeout is not None:
+            self.read_timeout = other.read_timeout
+        if other.ipv6_timeout is not None:
+            self.ipv6_timeout = other.ipv6_timeout
+        if other.ipv6_connect_timeout is not None:
+            self.ipv6_connect_timeout = other.ipv6_connect_timeout
+        if other.ipv6_read_timeout is not None:
+            self.ipv6_read_timeout = other.ipv6_read_timeout
 
 
 def _get_parent_host(host: str) -> Optional[str]:
@@ -152,6 +195,53 @@ class HostManager:
 
         return recheck, priority_recheck
 
+    def get_adaptive_rechecks(self, url: str) -> Tuple[Optional[Tuple[int, int]], int, Optional[Tuple[int, int]]]:
+        host_settings = self._gather(self._get_host_always(url))
+
+        stable_recheck = host_settings.stable_recheck if host_settings is not None and host_settings.stable_recheck is not None else self._defaults.stable_recheck
+        stable_after = host_settings.stable_after if host_settings is not None and host_settings.stable_after is not None else self._defaults.stable_after
+        confirm_recheck = host_settings.confirm_recheck if host_settings is not None and host_settings.confirm_recheck is not None else self._defaults.confirm_recheck
+
+        return stable_recheck, stable_after, confirm_recheck
+
+    def get_timeouts(self, url: str, ipv6: bool = False) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        host_settings = self._gather(self._get_host_always(url))
+
+        if host_settings is None:
+            return None, None, None
+
+        total, connect, read = host_settings.timeout, host_settings.connect_timeout, host_settings.read_timeout
+
+        if ipv6:
+            total = host_settings.ipv6_timeout if host_settings.ipv6_timeout is not None else total
+            connect = host_settings.ipv6_connect_timeout if host_settings.ipv6_connect_timeout is not None else connect
+            read = host_settings.ipv6_read_timeout if host_settings.ipv6_read_timeout is not None else read
+
+        return total, connect, read
+
+    def get_host_rules(self) -> List[Tuple[str, HostStatus, Tuple[int, int], Tuple[int, int]]]:
+        # effective settings for each configured host, which also apply to
+        # all of its subdomains unless there's a more specific rule
+        rules = {
+            host: (self.get_host_status(f'http://{host}/'), *self.get_rechecks(f'http://{host}/'))
+            for host in self._host_settings.keys()
+        }
+
+        def has_special_parent(host: str) -> bool:
+            currenthost = _get_parent_host(host)
+            while currenthost is not None:
+                if currenthost in rules and rules[currenthost][0] != HostStatus.OK:
+                    return True
+                currenthost = _get_parent_host(currenthost)
+            return False
+
+        # rules for ordinary hosts are only needed to override their parents
+        return [
+            (host, status, recheck, priority_recheck)
+            for host, (status, recheck, priority_recheck) in rules.items()
+            if status != HostStatus.OK or has_special_parent(host)
+        ]
+
     def get_hostkey(self, url: str) -> str:
         key = self._get_host_always(url).removeprefix('www.')
 
@@ -17,10 +17,15 @@
 
 
 from abc import ABC, abstractmethod
-from typing import Iterable
+from typing import ClassVar, Iterable
 
 
 class UrlProcessor(ABC):
+    # processors which do not access the network are not subject
+    # to politeness constraints and may run in parallel
+    network_bound: ClassVar[bool] = True
+
+    # decision is expected to only depend on url schema and authority
     @abstractmethod
     def taste(self, url: str) -> bool:
         pass  # pragma: no cover
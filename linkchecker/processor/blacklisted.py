@@ -24,6 +24,8 @@ from linkchecker.updater import UrlUpdater
 
 
 class BlacklistedUrlProcessor(UrlProcessor):
+    network_bound = False
+
     _url_updater: UrlUpdater
     _host_manager: HostManager
 
@@ -35,11 +37,20 @@ class BlacklistedUrlProcessor(UrlProcessor):
         return self._host_manager.get_host_status(url) != HostStatus.OK
 
     async def process_urls(self, urls: Iterable[str]) -> None:
+        skipped_urls = []
+        blacklisted_urls = []
+
         for url in urls:
             host_status = self._host_manager.get_host_status(url)
 
             if host_status == HostStatus.SKIPPED:
-                await self._url_updater.update(url, None, None)
+                skipped_urls.append(url)
             elif host_status == HostStatus.BLACKLISTED:
-                status = UrlStatus(False, ExtendedStatusCodes.BLACKLISTED)
-                await self._url_updater.update(url, status, status)
+                blacklisted_urls.append(url)
+
+        if skipped_urls:
+            await self._url_updater.update_many(skipped_urls, None, None)
+
+        if blacklisted_urls:
+            status = UrlStatus(False, ExtendedStatusCodes.BLACKLISTED)
+            await self._url_updater.update_many(blacklisted_urls, status, status)
@@ -15,33 +15,70 @@
 # You should have received a copy of the GNU General Public License
 # along with repology.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Iterable, List
+import asyncio
+from typing import Dict, Iterable, List
 
 from linkchecker.processor import UrlProcessor
 
 
+def _get_route_key(url: str) -> str:
+    # schema and authority part of the url, which is all
+    # processors are allowed to look at when tasting
+    if (schemapos := url.find('://')) == -1:
+        return url
+    if (pathpos := url.find('/', schemapos + 3)) == -1:
+        return url
+    return url[:pathpos]
+
+
 class DispatchingUrlProcessor(UrlProcessor):
     _processors: List[UrlProcessor]
+    _routes: Dict[str, int]
 
     def __init__(self, *processors: UrlProcessor) -> None:
         self._processors = list(processors)
+        self._routes = {}
 
     def taste(self, url: str) -> bool:
         return True  # pragma: no cover
 
+    def _route(self, url: str) -> int:
+        key = _get_route_key(url)
+
+        if (index := self._routes.get(key)) is not None:
+            return index
+
+        for index, processor in enumerate(self._processors):
+            if processor.taste(url):
+                break
+        else:
+            raise RuntimeError('Cannot find processor for URL {}'.format(url))
+
+        if len(self._routes) >= 10000:
+            self._routes = {}
+
+        self._routes[key] = index
+        return index
+
+    async def _process_network_urls(self, urls_for_processor: List[List[str]]) -> None:
+        # run network bound processors sequentionally (for politeness)
+        for processor, queue in zip(self._processors, urls_for_processor):
+            if queue and processor.network_bound:
+                await processor.process_urls(queue)
+
     async def process_urls(self, urls: Iterable[str]) -> None:
         urls_for_processor: List[List[str]] = [[] for p in self._processors]
 
         # sort urls into queues for each processor
         for url in urls:
-            for processor, queue in zip(self._processors, urls_for_processor):
-                if processor.taste(url):
-                    queue.append(url)
-                    break
-            else:
-                raise RuntimeError('Cannot find processor for URL {}'.format(url))
-
-        # run each processor sequentionally (for politeness)
-        for processor, queue in zip(self._processors, urls_for_processor):
-            if queue:
-                await processor.process_urls(queue)
+            urls_for_processor[self._route(url)].append(url)
+
+        # local processors don't need to wait for network ones
+        await asyncio.gather(
+            self._process_network_urls(urls_for_processor),
+            *(
+                processor.process_urls(queue)
+                for processor, queue in zip(self._processors, urls_for_processor)
+                if queue and not processor.network_bound
+            )
+        )
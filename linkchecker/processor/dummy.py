@@ -22,6 +22,8 @@ from linkchecker.updater import UrlUpdater
 
 
 class DummyUrlProcessor(UrlProcessor):
+    network_bound = False
+
     _url_updater: UrlUpdater
 
     def __init__(self, url_updater: UrlUpdater) -> None:
@@ -31,5 +33,5 @@ class DummyUrlProcessor(UrlProcessor):
         return True  # pragma: no cover
 
     async def process_urls(self, urls: Iterable[str]) -> None:
-        for url in urls:
-            await self._url_updater.update(url, None, None)
+        if urls := list(urls):
+            await self._url_updater.update_many(urls, None, None)
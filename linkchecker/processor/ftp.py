@@ -0,0 +1,275 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import ipaddress
+import socket
+import time
+from concurrent.futures import CancelledError
+from typing import Dict, Iterable, List, Tuple
+
+from linkchecker.dnsengine import DnsEngine
+from linkchecker.exceptions import classify_exception
+from linkchecker.hostmanager import HostManager
+from linkchecker.processor import UrlProcessor
+from linkchecker.resolver import PrecachedAsyncResolver
+from linkchecker.status import ExtendedStatusCodes, UrlStatus
+from linkchecker.updater import UrlUpdater
+
+import yarl
+
+
+_ANONYMOUS_PASSWORD = 'repology-linkchecker@repology.org'
+
+
+class _BadFtpReply(Exception):
+    pass
+
+
+class _FtpLoginError(Exception):
+    code: int
+
+    def __init__(self, code: int) -> None:
+        super().__init__(f'FTP login failed with code {code}')
+        self.code = code
+
+
+class _FtpControlConnection:
+    _reader: asyncio.StreamReader
+    _writer: asyncio.StreamWriter
+    _timeout: float
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, timeout: float) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._timeout = timeout
+
+    async def _read_line(self) -> str:
+        line = await asyncio.wait_for(self._reader.readline(), self._timeout)
+        if not line:
+            raise ConnectionResetError('FTP server closed control connection')
+        return line.decode('utf-8', errors='replace').rstrip('\r\n')
+
+    async def read_reply(self) -> Tuple[int, str]:
+        line = await self._read_line()
+
+        if len(line) < 3 or not line[:3].isdigit():
+            raise _BadFtpReply(line)
+
+        code = int(line[:3])
+        lines = [line[4:]]
+
+        # multiline reply, terminated by a line starting with the same code
+        if line[3:4] == '-':
+            while not ((line := await self._read_line()).startswith(f'{code} ')):
+                lines.append(line)
+            lines.append(line[4:])
+
+        return code, '\n'.join(lines)
+
+    async def command(self, command: str) -> Tuple[int, str]:
+        self._writer.write(command.encode('utf-8') + b'\r\n')
+        await asyncio.wait_for(self._writer.drain(), self._timeout)
+        return await self.read_reply()
+
+    async def close(self) -> None:
+        try:
+            self._writer.write(b'QUIT\r\n')
+            self._writer.close()
+            await asyncio.wait_for(self._writer.wait_closed(), self._timeout)
+        except (KeyboardInterrupt, CancelledError, MemoryError):
+            raise  # pragma: no cover
+        except Exception:
+            pass
+
+
+def _is_safe_argument(argument: str | None) -> bool:
+    # url parts are percent-decoded, and line breaks in them
+    # would inject extra commands into the control connection
+    return argument is None or not any(char in argument for char in '\r\n\0')
+
+
+def _ftp_reply_to_status(code: int) -> UrlStatus:
+    # FTP replies are mapped onto the nearest HTTP status codes
+    if code in (550, 450):
+        return UrlStatus(False, 404)
+    elif code == 530:
+        return UrlStatus(False, 403)
+    elif code == 421:
+        return UrlStatus(False, 503)
+    return UrlStatus(False, ExtendedStatusCodes.FTP_ERROR)
+
+
+class FtpUrlProcessor(UrlProcessor):
+    _url_updater: UrlUpdater
+    _host_manager: HostManager
+    _timeout: float
+    _skip_ipv6: bool
+    _satisfy_with_ipv6: bool
+    _shutdown: asyncio.Event | None
+    _dns_engine: DnsEngine | None
+
+    def __init__(self, url_updater: UrlUpdater, host_manager: HostManager, timeout: float, skip_ipv6: bool = True, satisfy_with_ipv6: bool = False, shutdown: asyncio.Event | None = None, dns_engine: DnsEngine | None = None) -> None:
+        self._url_updater = url_updater
+        self._host_manager = host_manager
+        self._timeout = timeout
+        self._skip_ipv6 = skip_ipv6
+        self._satisfy_with_ipv6 = satisfy_with_ipv6
+        self._shutdown = shutdown
+        self._dns_engine = dns_engine
+
+    def taste(self, url: str) -> bool:
+        return url.startswith('ftp://')
+
+    async def _connect(self, url: yarl.URL, addresses: List[str]) -> _FtpControlConnection:
+        last_exception: Exception = ConnectionRefusedError('no addresses to connect to')
+
+        for address in addresses:
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(address, url.port or 21), self._timeout)
+                break
+            except (KeyboardInterrupt, CancelledError, MemoryError):
+                raise  # pragma: no cover
+            except Exception as e:
+                last_exception = e
+        else:
+            raise last_exception
+
+        connection = _FtpControlConnection(reader, writer, self._timeout)
+
+        try:
+            code, message = await connection.read_reply()
+            if code != 220:
+                raise _BadFtpReply(message)
+
+            code, message = await connection.command('USER ' + (url.user or 'anonymous'))
+            if code == 331:
+                code, message = await connection.command('PASS ' + (url.password or _ANONYMOUS_PASSWORD))
+            if code not in (230, 202):
+                raise _FtpLoginError(code)
+
+            await connection.command('TYPE I')
+        except BaseException:
+            await connection.close()
+            raise
+
+        return connection
+
+    async def _check_path(self, connection: _FtpControlConnection, path: str) -> UrlStatus:
+        # SIZE is cheap and does not require a data connection; if it
+        # fails, the path may still be a directory, which is checked with CWD
+        if not path.endswith('/'):
+            code, _ = await connection.command('SIZE ' + path)
+            if code == 213:
+                return UrlStatus(True, 200)
+
+        code, _ = await connection.command('CWD ' + (path or '/'))
+        if code == 250:
+            return UrlStatus(True, 200)
+
+        return _ftp_reply_to_status(code)
+
+    async def _check_url(self, url: str, parsed: yarl.URL, addresses: List[str], connections: Dict[Tuple[str, int], _FtpControlConnection], family: int) -> UrlStatus:
+        await asyncio.sleep(self._host_manager.get_delay(url))
+
+        key = (parsed.host or '', family)
+
+        try:
+            if key not in connections:
+                connections[key] = await self._connect(parsed, addresses)
+
+            return await self._check_path(connections[key], parsed.path)
+        except (KeyboardInterrupt, CancelledError, MemoryError):
+            raise  # pragma: no cover
+        except _FtpLoginError as e:
+            return _ftp_reply_to_status(e.code)
+        except _BadFtpReply:
+            connection = connections.pop(key, None)
+            if connection is not None:
+                await connection.close()
+            return UrlStatus(False, ExtendedStatusCodes.BAD_FTP)
+        except Exception as e:
+            # connection is not reusable after network errors
+            connection = connections.pop(key, None)
+            if connection is not None:
+                await connection.close()
+            return UrlStatus(False, classify_exception(e, url))
+
+    async def _resolve(self, resolver: PrecachedAsyncResolver, host: str) -> Tuple[List[str] | int, List[str] | int]:
+        try:
+            address = ipaddress.ip_address(host)
+            if address.version == 4:
+                return [host], ExtendedStatusCodes.DNS_NO_ADDRESS_RECORD
+            else:
+                return ExtendedStatusCodes.DNS_NO_ADDRESS_RECORD, [host]
+        except ValueError:
+            pass
+
+        dns = await resolver.get_host_status(host)
+
+        return (
+            dns.ipv4.error if dns.ipv4.error is not None else dns.ipv4.addresses,
+            dns.ipv6.error if dns.ipv6.error is not None else dns.ipv6.addresses,
+        )
+
+    async def process_urls(self, urls: Iterable[str]) -> None:
+        resolver = PrecachedAsyncResolver(engine=self._dns_engine)
+
+        # control connections are reused for all urls of a batch
+        connections: Dict[Tuple[str, int], _FtpControlConnection] = {}
+
+        try:
+            for url in urls:
+                # on shutdown, let the current url finish, but don't start new ones
+                if self._shutdown is not None and self._shutdown.is_set():
+                    break
+
+                start_ts = time.monotonic()
+
+                try:
+                    parsed = yarl.URL(url)
+                    host = parsed.host
+                except Exception:
+                    host = None
+
+                if host is None or not all(_is_safe_argument(argument) for argument in (parsed.path, parsed.user, parsed.password)):
+                    errstatus = UrlStatus(False, ExtendedStatusCodes.INVALID_URL)
+                    await self._url_updater.update(url, errstatus, errstatus)
+                    continue
+
+                addresses4, addresses6 = await self._resolve(resolver, host)
+
+                if self._skip_ipv6:
+                    status6 = None
+                elif isinstance(addresses6, int):
+                    status6 = UrlStatus(False, addresses6)
+                else:
+                    status6 = await self._check_url(url, parsed, addresses6, connections, socket.AF_INET6)
+
+                if isinstance(addresses4, int):
+                    status4 = UrlStatus(False, addresses4)
+                elif self._satisfy_with_ipv6 and status6 and status6.success:
+                    status4 = None
+                else:
+                    status4 = await self._check_url(url, parsed, addresses4, connections, socket.AF_INET)
+
+                await self._url_updater.update(url, status4, status6, time.monotonic() - start_ts)
+        finally:
+            for connection in connections.values():
+                await connection.close()
+
+            await resolver.close()
@@ -19,17 +19,27 @@ import asyncio
 import socket
 import ssl
 import time
+from collections import deque
 from concurrent.futures import CancelledError
-from typing import Iterable, Optional
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Tuple
 from urllib.parse import urljoin
 
 import aiohttp
 
+from linkchecker.circuitbreaker import CircuitBreaker
+from linkchecker.coalescer import UrlCoalescer
+from linkchecker.connector import AddressRecordingConnector, PreferredAddresses
+from linkchecker.dnsengine import DnsEngine
 from linkchecker.exceptions import classify_exception
+from linkchecker.hostcost import HostCostAccounting
 from linkchecker.hostmanager import HostManager
 from linkchecker.processor import UrlProcessor
 from linkchecker.resolver import PrecachedAsyncResolver
 from linkchecker.status import ExtendedStatusCodes, UrlStatus
+from linkchecker.tls import TlsOutcomeCache, get_ssl_context
+from linkchecker.traffic import TrafficProfileWriter
+from linkchecker.uniformity import UniformResponseDetector
 from linkchecker.updater import UrlUpdater
 
 import yarl
@@ -42,21 +52,73 @@ def _is_http_code_success(code: int) -> bool:
     return code >= 200 and code < 300
 
 
+class _RequestTrace:
+    # tells timeouts while connecting from ones while waiting for response
+    __slots__ = ('connected',)
+
+    connected: bool
+
+    def __init__(self) -> None:
+        self.connected = False
+
+
+async def _on_connection_obtained(session: aiohttp.ClientSession, context: SimpleNamespace, params: Any) -> None:
+    if isinstance(context.trace_request_ctx, _RequestTrace):
+        context.trace_request_ctx.connected = True
+
+
+def _make_connection_trace_config() -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_end.append(_on_connection_obtained)
+    trace_config.on_connection_reuseconn.append(_on_connection_obtained)
+    return trace_config
+
+
 class HttpUrlProcessor(UrlProcessor):
     _url_updater: UrlUpdater
     _host_manager: HostManager
-    _timeout: float
+    _timeouts4: Tuple[float, float | None, float | None]
+    _timeouts6: Tuple[float, float | None, float | None]
+    _ipv6_unreachable_ttl: float
+    _ipv6_unreachable: Dict[str, float]
     _skip_ipv6: bool
     _satisfy_with_ipv6: bool
-    _ssl_context: Optional[ssl.SSLContext]
+    _ssl_context: ssl.SSLContext
+    _tls_outcome_cache: TlsOutcomeCache | None
+    _traffic_profile: TrafficProfileWriter | None
+    _host_costs: HostCostAccounting | None
+    _coalescer: UrlCoalescer | None
+    _circuit_breaker: CircuitBreaker | None
+    _shutdown: asyncio.Event | None
+    _dns_engine: DnsEngine | None
+    _uniformity_detector: UniformResponseDetector | None
+    _happy_eyeballs_delay: float | None
+    _preferred_addresses: PreferredAddresses
 
-    def __init__(self, url_updater: UrlUpdater, host_manager: HostManager, timeout: float, skip_ipv6: bool = True, strict_ssl: bool = False, satisfy_with_ipv6: bool = False) -> None:
+    def __init__(self, url_updater: UrlUpdater, host_manager: HostManager, timeout: float, skip_ipv6: bool = True, strict_ssl: bool = False, satisfy_with_ipv6: bool = False, coalescer: UrlCoalescer | None = None, circuit_breaker: CircuitBreaker | None = None, connect_timeout: float | None = None, read_timeout: float | None = None, ipv6_timeout: float | None = None, ipv6_connect_timeout: float | None = None, ipv6_read_timeout: float | None = None, ipv6_unreachable_ttl: float = 0, shutdown: asyncio.Event | None = None, uniformity_detector: UniformResponseDetector | None = None, happy_eyeballs_delay: float | None = 0.25, dns_engine: DnsEngine | None = None, tls_outcome_cache: TlsOutcomeCache | None = None, traffic_profile: TrafficProfileWriter | None = None, host_costs: HostCostAccounting | None = None) -> None:
         self._url_updater = url_updater
         self._host_manager = host_manager
-        self._timeout = timeout
+        self._timeouts4 = (timeout, connect_timeout, read_timeout)
+        self._timeouts6 = (
+            ipv6_timeout if ipv6_timeout is not None else timeout,
+            ipv6_connect_timeout if ipv6_connect_timeout is not None else connect_timeout,
+            ipv6_read_timeout if ipv6_read_timeout is not None else read_timeout,
+        )
+        self._ipv6_unreachable_ttl = ipv6_unreachable_ttl
+        self._ipv6_unreachable = {}
         self._skip_ipv6 = skip_ipv6
         self._satisfy_with_ipv6 = satisfy_with_ipv6
-        self._ssl_context = ssl.SSLContext(protocol=ssl.PROTOCOL_TLSv1_2) if strict_ssl else None
+        self._ssl_context = get_ssl_context(strict_ssl)
+        self._tls_outcome_cache = tls_outcome_cache
+        self._traffic_profile = traffic_profile
+        self._host_costs = host_costs
+        self._coalescer = coalescer
+        self._circuit_breaker = circuit_breaker
+        self._shutdown = shutdown
+        self._dns_engine = dns_engine
+        self._uniformity_detector = uniformity_detector
+        self._happy_eyeballs_delay = happy_eyeballs_delay
+        self._preferred_addresses = {}
 
     def taste(self, url: str) -> bool:
         return url.startswith('http://') or url.startswith('https://')
@@ -72,66 +134,232 @@ class HttpUrlProcessor(UrlProcessor):
 
         return UrlStatus(_is_http_code_success(response.status), response.status, redirect_target)
 
-    async def _check_url(self, url: str, session: aiohttp.ClientSession) -> UrlStatus:
+    def _get_timeout(self, url: str, family: int) -> aiohttp.ClientTimeout:
+        ipv6 = family == socket.AF_INET6
+        total, connect, read = self._host_manager.get_timeouts(url, ipv6)
+        default_total, default_connect, default_read = self._timeouts6 if ipv6 else self._timeouts4
+
+        return aiohttp.ClientTimeout(
+            total=total if total is not None else default_total,
+            connect=connect if connect is not None else default_connect,
+            sock_read=read if read is not None else default_read,
+        )
+
+    async def _check_url(self, url: str, host: str, family: int, session: aiohttp.ClientSession, trace: _RequestTrace | None = None) -> UrlStatus:
         delay = self._host_manager.get_delay(url)
+        timeout = self._get_timeout(url, family)
 
         await asyncio.sleep(delay)
 
+        start_ts = time.monotonic()
+        status: UrlStatus | None = None
+        fallback = False
+        num_requests = 1
+        content_bytes = 0
+
         try:
-            async with session.head(url, allow_redirects=True, ssl=self._ssl_context) as response:
+            async with session.head(url, allow_redirects=True, timeout=timeout, trace_request_ctx=trace) as response:
+                num_requests += len(response.history)
+                content_bytes += response.content_length or 0
                 if _is_http_code_success(response.status):
-                    return await self._process_response(url, response)
+                    status = await self._process_response(url, response)
 
             # if status != 200, fallback to get
-            await asyncio.sleep(delay)
+            if status is None:
+                fallback = True
+                await asyncio.sleep(delay)
+                start_ts += delay
+                num_requests += 1
 
-            async with session.get(url, allow_redirects=True) as response:
-                return await self._process_response(url, response)
+                async with session.get(url, allow_redirects=True, timeout=timeout, trace_request_ctx=trace) as response:
+                    num_requests += len(response.history)
+                    content_bytes += response.content_length or 0
+                    status = await self._process_response(url, response)
         except (KeyboardInterrupt, CancelledError, MemoryError):
             raise  # pragma: no cover
         except Exception as e:
-            return UrlStatus(False, classify_exception(e, url))
+            status = UrlStatus(False, classify_exception(e, url))
+
+            # the certificate may be served by a redirect target, so the
+            # failure is recorded for the host which failed the handshake
+            if self._tls_outcome_cache is not None and isinstance(e, aiohttp.ClientConnectorCertificateError):
+                self._tls_outcome_cache.record((e.host, e.port, family), status)
+
+        if self._traffic_profile is not None:
+            self._traffic_profile.record(host, family, time.monotonic() - start_ts, status, fallback)
+
+        if self._host_costs is not None:
+            hostkey = self._host_manager.get_hostkey(url)
+            self._host_costs.add_sleep(hostkey, delay * 2 if fallback else delay)
+            self._host_costs.add_requests(hostkey, num_requests, content_bytes)
+            self._host_costs.add_result(hostkey, status)
+
+        return status
+
+    def _is_ipv6_unreachable(self, host: str) -> bool:
+        expires = self._ipv6_unreachable.get(host)
+        if expires is None:
+            return False
+        elif expires < time.monotonic():
+            del self._ipv6_unreachable[host]
+            return False
+        return True
+
+    def _mark_ipv6_unreachable(self, host: str) -> None:
+        now = time.monotonic()
+        if len(self._ipv6_unreachable) >= 10000:
+            self._ipv6_unreachable = {k: v for k, v in self._ipv6_unreachable.items() if v >= now}
+        self._ipv6_unreachable[host] = now + self._ipv6_unreachable_ttl
+
+    def _record_shortcut(self, host: str, family: int, status: UrlStatus, shortcut: str) -> UrlStatus:
+        if self._traffic_profile is not None:
+            self._traffic_profile.record(host, family, 0, status, shortcut=shortcut)
+        return status
+
+    def _record_shortcuts(self, urls: Iterable[str], status4: UrlStatus | None, status6: UrlStatus | None, shortcut: str) -> None:
+        if self._traffic_profile is None:
+            return
+
+        for url in urls:
+            try:
+                host = yarl.URL(url).host
+            except Exception:
+                continue
+
+            if host is not None and status4 is not None:
+                self._record_shortcut(host, socket.AF_INET, status4, shortcut)
+            if host is not None and status6 is not None:
+                self._record_shortcut(host, socket.AF_INET6, status6, shortcut)
+
+    async def _check_url_guarded(self, url: str, host: str, family: int, session: aiohttp.ClientSession) -> UrlStatus:
+        if family == socket.AF_INET6 and self._is_ipv6_unreachable(host):
+            return self._record_shortcut(host, family, UrlStatus(False, ExtendedStatusCodes.TIMEOUT), 'ipv6')
+
+        key = (host, family)
+
+        if self._circuit_breaker is not None and (status := self._circuit_breaker.get_short_circuit_status(key)) is not None:
+            return self._record_shortcut(host, family, status, 'breaker')
+
+        # hosts known to serve a bad certificate fail the same way without a handshake
+        if self._tls_outcome_cache is not None and url.startswith('https://'):
+            parsed = yarl.URL(url)
+            if (status := self._tls_outcome_cache.get((parsed.raw_host, parsed.port, family))) is not None:
+                return self._record_shortcut(host, family, status, 'tls')
+
+        trace = _RequestTrace() if family == socket.AF_INET6 and self._ipv6_unreachable_ttl > 0 else None
+
+        status = await self._check_url(url, host, family, session, trace)
+
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.record(key, status)
+
+        # a server which accepted the connection but is slow to respond is reachable
+        if trace is not None and not trace.connected and status.status_code == ExtendedStatusCodes.TIMEOUT:
+            self._mark_ipv6_unreachable(host)
+
+        return status
+
+    async def _check_url_families(self, url: str, resolver: PrecachedAsyncResolver, session4: aiohttp.ClientSession, session6: aiohttp.ClientSession) -> Tuple[UrlStatus | None, UrlStatus | None]:
+        try:
+            host = yarl.URL(url).host
+        except Exception:
+            host = None
+
+        if host is None:
+            errstatus = UrlStatus(False, ExtendedStatusCodes.INVALID_URL)
+            return errstatus, errstatus
+
+        dns = await resolver.get_host_status(host)
+
+        if self._skip_ipv6:
+            status6 = None
+        elif dns.ipv6.error is not None:
+            status6 = UrlStatus(False, dns.ipv6.error)
+            if self._traffic_profile is not None:
+                self._traffic_profile.record(host, socket.AF_INET6, 0, status6)
+            if self._host_costs is not None:
+                self._host_costs.add_result(self._host_manager.get_hostkey(url), status6)
+        else:
+            status6 = await self._check_url_guarded(url, host, socket.AF_INET6, session6)
+
+        if dns.ipv4.error is not None:
+            status4 = UrlStatus(False, dns.ipv4.error)
+            if self._traffic_profile is not None:
+                self._traffic_profile.record(host, socket.AF_INET, 0, status4)
+            if self._host_costs is not None:
+                self._host_costs.add_result(self._host_manager.get_hostkey(url), status4)
+        elif self._satisfy_with_ipv6 and status6 and status6.success:
+            status4 = None
+        else:
+            status4 = await self._check_url_guarded(url, host, socket.AF_INET, session4)
+
+        return status4, status6
 
     async def process_urls(self, urls: Iterable[str]) -> None:
-        resolver = PrecachedAsyncResolver()
+        resolver = PrecachedAsyncResolver(self._preferred_addresses, self._dns_engine)
 
-        connector4 = aiohttp.TCPConnector(resolver=resolver, use_dns_cache=False, limit_per_host=1, family=socket.AF_INET)
-        connector6 = aiohttp.TCPConnector(resolver=resolver, use_dns_cache=False, limit_per_host=1, family=socket.AF_INET6)
+        # connection attempts to multiple addresses of a host are staggered
+        # by happy_eyeballs_delay, so a dead address does not eat the timeout
+        connector4 = AddressRecordingConnector(resolver=resolver, use_dns_cache=False, limit_per_host=1, family=socket.AF_INET, ssl=self._ssl_context, happy_eyeballs_delay=self._happy_eyeballs_delay, preferred_addresses=self._preferred_addresses)
+        connector6 = AddressRecordingConnector(resolver=resolver, use_dns_cache=False, limit_per_host=1, family=socket.AF_INET6, ssl=self._ssl_context, happy_eyeballs_delay=self._happy_eyeballs_delay, preferred_addresses=self._preferred_addresses)
 
-        timeout = aiohttp.ClientTimeout(total=self._timeout)
         headers = {'User-Agent': USER_AGENT}
 
-        async with aiohttp.ClientSession(cookie_jar=aiohttp.DummyCookieJar(), timeout=timeout, headers=headers, connector=connector4) as session4:
-            async with aiohttp.ClientSession(cookie_jar=aiohttp.DummyCookieJar(), timeout=timeout, headers=headers, connector=connector6) as session6:
-                for url in urls:
-                    start_ts = time.monotonic()
+        # timeouts are specified per request, see _get_timeout()
+        try:
+            async with aiohttp.ClientSession(cookie_jar=aiohttp.DummyCookieJar(), headers=headers, connector=connector4) as session4:
+                async with aiohttp.ClientSession(cookie_jar=aiohttp.DummyCookieJar(), headers=headers, connector=connector6, trace_configs=[_make_connection_trace_config()] if self._ipv6_unreachable_ttl > 0 else None) as session6:
+                    if self._coalescer is not None:
+                        groups = self._coalescer.group(urls)
+                    else:
+                        groups = [(url, [url]) for url in urls]
 
-                    try:
-                        host = yarl.URL(url).host
-                    except Exception:
-                        host = None
+                    # for hosts which respond with the same failure to all urls, only
+                    # every Nth url is checked; the rest are assumed to have the same
+                    # status, which is written in bulk once the next sample confirms it
+                    uniformity = self._uniformity_detector.start_batch() if self._uniformity_detector is not None else None
+                    unconfirmed: List[Tuple[str, List[str]]] = []
 
-                    if host is None:
-                        errstatus = UrlStatus(False, ExtendedStatusCodes.INVALID_URL)
-                        await self._url_updater.update(url, errstatus, errstatus)
-                        continue
+                    pending = deque(groups)
+                    while pending:
+                        canonical, group = pending.popleft()
 
-                    dns = await resolver.get_host_status(host)
+                        # on shutdown, let the current url finish, but don't start new ones
+                        if self._shutdown is not None and self._shutdown.is_set():
+                            break
 
-                    if self._skip_ipv6:
-                        status6 = None
-                    elif dns.ipv6.exception is not None:
-                        status6 = UrlStatus(False, classify_exception(dns.ipv6.exception, url))
-                    else:
-                        status6 = await self._check_url(url, session6)
+                        if self._coalescer is not None and (cached := self._coalescer.get(canonical)) is not None:
+                            self._record_shortcuts(group, *cached, 'coalesced')
+                            await self._url_updater.update_many(group, *cached)
+                            continue
 
-                    if dns.ipv4.exception is not None:
-                        status4 = UrlStatus(False, classify_exception(dns.ipv4.exception, url))
-                    elif self._satisfy_with_ipv6 and status6 and status6.success:
-                        status4 = None
-                    else:
-                        status4 = await self._check_url(url, session4)
+                        # the last url of the batch is always checked, to confirm the assumed ones
+                        if uniformity is not None and pending and not uniformity.should_check():
+                            unconfirmed.append((canonical, group))
+                            continue
+
+                        start_ts = time.monotonic()
+
+                        status4, status6 = await self._check_url_families(group[0], resolver, session4, session6)
+
+                        if self._coalescer is not None:
+                            self._coalescer.put(canonical, status4, status6)
+                            self._record_shortcuts(group[1:], status4, status6, 'coalesced')
+
+                        await self._url_updater.update_many(group, status4, status6, time.monotonic() - start_ts)
+
+                        if uniformity is not None:
+                            confirmed = uniformity.record(status4, status6)
 
-                    await self._url_updater.update(url, status4, status6, time.monotonic() - start_ts)
+                            if unconfirmed and confirmed:
+                                assumed_urls = [url for _, unconfirmed_group in unconfirmed for url in unconfirmed_group]
+                                self._record_shortcuts(assumed_urls, status4, status6, 'assumed')
+                                await self._url_updater.update_many(assumed_urls, status4, status6)
+                                uniformity.account_assumed(len(assumed_urls))
+                            elif unconfirmed:
+                                # the host no longer responds uniformly, check the rest one by one
+                                pending.extendleft(reversed(unconfirmed))
 
-        await resolver.close()
+                            unconfirmed = []
+        finally:
+            await resolver.close()
@@ -16,14 +16,51 @@
 # along with repology.  If not, see <http://www.gnu.org/licenses/>.
 
 import datetime
-from typing import AsyncIterator
+from typing import Any, AsyncIterator
 
 import aiopg
 
-from linkchecker.status import UrlStatus
+from linkchecker.status import ExtendedStatusCodes, UrlStatus
 
+import psycopg2.sql
 
-async def iterate_urls_to_recheck(pool: aiopg.Pool) -> AsyncIterator[str]:
+
+class UrlToCheck:
+    __slots__ = ('url', 'priority', 'lag', 'ipv4_status', 'ipv6_status', 'ipv4_last_success', 'ipv4_last_failure')
+
+    url: str
+    priority: bool
+    lag: float
+    ipv4_status: UrlStatus | None
+    ipv6_status: UrlStatus | None
+    ipv4_last_success: float | None  # unix time
+    ipv4_last_failure: float | None
+
+    def __init__(self, url: str, priority: bool, lag: float, ipv4_status: UrlStatus | None = None, ipv6_status: UrlStatus | None = None, ipv4_last_success: float | None = None, ipv4_last_failure: float | None = None) -> None:
+        self.url = url
+        self.priority = priority
+        self.lag = lag
+        self.ipv4_status = ipv4_status
+        self.ipv6_status = ipv6_status
+        self.ipv4_last_success = ipv4_last_success
+        self.ipv4_last_failure = ipv4_last_failure
+
+
+def _make_status(success: bool | None, status_code: int | None, permanent_redirect_target: str | None) -> UrlStatus | None:
+    if success is None or status_code is None:
+        return None
+    return UrlStatus(success, status_code, permanent_redirect_target)
+
+
+def _make_url_to_check(row: tuple[Any, ...]) -> UrlToCheck:
+    return UrlToCheck(
+        row[0], row[1], float(row[2]), _make_status(*row[3:6]), _make_status(*row[6:9]),
+        float(row[9]) if row[9] is not None else None,
+        float(row[10]) if row[10] is not None else None,
+    )
+
+
+async def iterate_urls_to_recheck(pool: aiopg.Pool, priority_share: float = 0.5, limit: int = 20000) -> AsyncIterator[UrlToCheck]:
     async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
@@ -31,41 +68,146 @@ async def iterate_urls_to_recheck(pool: aiopg.Pool) -> AsyncIterator[str]:
                 WITH all_urls AS (
                     SELECT
                         url,
-                        row_number() OVER(PARTITION BY substring(url from '.*://([^/]*)')) AS num_for_host
+                        priority,
+                        next_check,
+                        ipv4_success,
+                        ipv4_status_code,
+                        ipv4_permanent_redirect_target,
+                        ipv6_success,
+                        ipv6_status_code,
+                        ipv6_permanent_redirect_target,
+                        ipv4_last_success,
+                        ipv4_last_failure,
+                        row_number() OVER(PARTITION BY substring(url from '.*://([^/]*)') ORDER BY priority DESC, next_check) AS num_for_host
                     FROM links
                     WHERE refcount > 0 AND next_check < now()
+                ), priority_urls AS (
+                    SELECT
+                        *
+                    FROM all_urls
+                    WHERE num_for_host <= 100 AND priority
+                    ORDER BY next_check
+                    LIMIT %(priority_limit)s
                 )
-                SELECT
-                    url
-                FROM all_urls
-                WHERE num_for_host <= 100
-                LIMIT 20000
-                """
+                (
+                    SELECT
+                        url,
+                        true,
+                        extract(epoch FROM now() - next_check),
+                        ipv4_success,
+                        ipv4_status_code,
+                        ipv4_permanent_redirect_target,
+                        ipv6_success,
+                        ipv6_status_code,
+                        ipv6_permanent_redirect_target,
+                        extract(epoch FROM ipv4_last_success),
+                        extract(epoch FROM ipv4_last_failure)
+                    FROM priority_urls
+                )
+                UNION ALL
+                (
+                    SELECT
+                        url,
+                        false,
+                        extract(epoch FROM now() - next_check),
+                        ipv4_success,
+                        ipv4_status_code,
+                        ipv4_permanent_redirect_target,
+                        ipv6_success,
+                        ipv6_status_code,
+                        ipv6_permanent_redirect_target,
+                        extract(epoch FROM ipv4_last_success),
+                        extract(epoch FROM ipv4_last_failure)
+                    FROM all_urls
+                    WHERE num_for_host <= 100 AND NOT priority
+                    ORDER BY next_check
+                    LIMIT %(limit)s - (SELECT count(*) FROM priority_urls)
+                )
+                """,
                 # XXX: Important tuning point
                 # The LIMIT may be tuned for optimum performance. When linkchecker is under
                 # heavy load (e.g. there are urls to check from thousands of distincive hosts),
                 # keep an eye on "url(s) scanned" statistic, and set the LIMIT somewhat (1.2-2x)
                 # higher than it. The sign of correct setting is that all workers are running at
                 # the end of iteration ("100 worker(s) running" with default settings).
+                # benchmarks/simulate.py may be used to pick it, along with --max-workers and
+                # --max-host-queue, offline.
                 #
                 # The idea here is to return enough urls that can be processed in a single 1
                 # minute linkchecker iteration to keep all workers fully loaded.
                 #
+                # Since the scan is repeated as soon as the workers run low on urls (see
+                # --low-watermark), a low LIMIT no longer leaves workers idle until the next
+                # minute, but leads to more frequent (and wasted on already queued urls) scans.
+                #
                 # Setting it lower would hinder link checking performance, and setting it higher
                 # would waste more memory. It's not too much though (~20MB for 100k urls), so
                 # better set it higher.
+                #
+                # Priority urls are returned first, but may take no more than priority_share
+                # of the LIMIT, so the normal ones are not starved; the most overdue urls
+                # go first in both lanes.
+                {
+                    'limit': limit,
+                    'priority_limit': int(limit * priority_share),
+                }
             )
 
             async for row in cur:
-                yield row[0]
+                yield _make_url_to_check(row)
+
+
+async def get_urls_to_check(pool: aiopg.Pool, urls: list[str]) -> list[UrlToCheck]:
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT
+                    url,
+                    priority,
+                    greatest(extract(epoch FROM now() - next_check), 0),
+                    ipv4_success,
+                    ipv4_status_code,
+                    ipv4_permanent_redirect_target,
+                    ipv6_success,
+                    ipv6_status_code,
+                    ipv6_permanent_redirect_target,
+                    extract(epoch FROM ipv4_last_success),
+                    extract(epoch FROM ipv4_last_failure)
+                FROM links
+                WHERE url = ANY(%(urls)s) AND refcount > 0
+                """,
+                {
+                    'urls': urls,
+                }
+            )
+
+            return [_make_url_to_check(row) async for row in cur]
+
+
+async def iterate_notified_urls(dsn: str, channel: str, max_batch_size: int = 1000) -> AsyncIterator[list[str]]:
+    # a dedicated connection is used, as it's kept busy listening
+    async with aiopg.connect(dsn) as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(psycopg2.sql.SQL('LISTEN {}').format(psycopg2.sql.Identifier(channel)))
+
+        while True:
+            urls = [(await conn.notifies.get()).payload]
+
+            # notifications which arrived together are returned as a batch
+            while not conn.notifies.empty() and len(urls) < max_batch_size:
+                urls.append(conn.notifies.get_nowait().payload)
+
+            yield urls
+
+
+UrlSchedule = tuple[str, datetime.datetime, datetime.datetime]
 
 
 async def update_url_status(
     pool: aiopg.Pool,
-    url: str,
+    schedules: list[UrlSchedule],
     check_time: datetime.datetime,
-    next_check_time: datetime.datetime,
-    priority_next_check_time: datetime.datetime,
     ipv4_status: UrlStatus | None,
     ipv6_status: UrlStatus | None,
     check_duration: float | None
@@ -76,7 +218,7 @@ async def update_url_status(
                 """
                 UPDATE links
                 SET
-                    next_check = CASE WHEN priority THEN %(priority_next_check_time)s ELSE %(next_check_time)s END,
+                    next_check = CASE WHEN priority THEN schedules.priority_next_check_time ELSE schedules.next_check_time END,
                     last_checked = %(check_time)s,
 
                     ipv4_last_success = CASE WHEN     %(ipv4_success)s THEN %(check_time)s ELSE ipv4_last_success END,
@@ -92,13 +234,18 @@ async def update_url_status(
                     ipv6_permanent_redirect_target = COALESCE(%(ipv6_permanent_redirect_target)s, ipv6_permanent_redirect_target),
 
                     check_duration = %(check_duration)s
-                WHERE url = %(url)s
+                FROM unnest(
+                    %(urls)s::text[],
+                    %(next_check_times)s::timestamptz[],
+                    %(priority_next_check_times)s::timestamptz[]
+                ) AS schedules(url, next_check_time, priority_next_check_time)
+                WHERE links.url = schedules.url
                 """,
                 {
-                    'url': url,
+                    'urls': [schedule[0] for schedule in schedules],
+                    'next_check_times': [schedule[1] for schedule in schedules],
+                    'priority_next_check_times': [schedule[2] for schedule in schedules],
                     'check_time': check_time,
-                    'next_check_time': next_check_time,
-                    'priority_next_check_time': priority_next_check_time,
 
                     'ipv4_success': ipv4_status.success if ipv4_status is not None else None,
                     'ipv4_status_code': ipv4_status.status_code if ipv4_status is not None else None,
@@ -113,6 +260,245 @@ async def update_url_status(
             )
 
 
+async def update_url_check_time(
+    pool: aiopg.Pool,
+    schedules: list[UrlSchedule],
+    check_time: datetime.datetime,
+    ipv4_success: bool | None,
+    ipv6_success: bool | None,
+    check_duration: float | None
+) -> None:
+    # minimal update for urls which status has not changed since the
+    # last check: only scheduling and check time columns are touched,
+    # and the assignments are chosen here instead of CASE expressions
+    assignments = [
+        'next_check = CASE WHEN priority THEN schedules.priority_next_check_time ELSE schedules.next_check_time END',
+        'last_checked = %(check_time)s',
+        'check_duration = %(check_duration)s',
+    ]
+
+    if ipv4_success is not None:
+        assignments.append('ipv4_last_success = %(check_time)s' if ipv4_success else 'ipv4_last_failure = %(check_time)s')
+    if ipv6_success is not None:
+        assignments.append('ipv6_last_success = %(check_time)s' if ipv6_success else 'ipv6_last_failure = %(check_time)s')
+
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                'UPDATE links SET ' + ', '.join(assignments) + ' '
+                'FROM unnest(%(urls)s::text[], %(next_check_times)s::timestamptz[], %(priority_next_check_times)s::timestamptz[]) '
+                'AS schedules(url, next_check_time, priority_next_check_time) '
+                'WHERE links.url = schedules.url',
+                {
+                    'urls': [schedule[0] for schedule in schedules],
+                    'next_check_times': [schedule[1] for schedule in schedules],
+                    'priority_next_check_times': [schedule[2] for schedule in schedules],
+                    'check_time': check_time,
+                    'check_duration': check_duration,
+                }
+            )
+
+
+async def update_urls_by_host_rules(
+    pool: aiopg.Pool,
+    rules: list[tuple[str, bool, bool, tuple[int, int], tuple[int, int]]]
+) -> int:
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                WITH rules AS (
+                    SELECT
+                        *
+                    FROM unnest(
+                        %(hosts)s::text[],
+                        %(blacklisted)s::boolean[],
+                        %(skipped)s::boolean[],
+                        %(recheck_min)s::integer[],
+                        %(recheck_max)s::integer[],
+                        %(priority_recheck_min)s::integer[],
+                        %(priority_recheck_max)s::integer[]
+                    ) AS rules(host, blacklisted, skipped, recheck_min, recheck_max, priority_recheck_min, priority_recheck_max)
+                ), due_urls AS (
+                    SELECT
+                        url,
+                        priority,
+                        lower(substring(url from '^[A-Za-z][A-Za-z0-9+.-]*://(?:[^@/?#]*@)?([^/:?#]*)')) AS host
+                    FROM links
+                    WHERE refcount > 0 AND next_check < now()
+                ), matched_urls AS (
+                    SELECT DISTINCT ON (url)
+                        url,
+                        blacklisted,
+                        skipped,
+                        CASE
+                            WHEN priority THEN priority_recheck_min + (priority_recheck_max - priority_recheck_min) * random()
+                            ELSE recheck_min + (recheck_max - recheck_min) * random()
+                        END AS recheck
+                    FROM due_urls INNER JOIN rules ON due_urls.host = rules.host OR due_urls.host LIKE '%%.' || rules.host
+                    -- the most specific rule wins
+                    ORDER BY url, length(rules.host) DESC
+                )
+                UPDATE links
+                SET
+                    next_check = now() + make_interval(secs => recheck),
+                    last_checked = now(),
+
+                    -- same as update_url_status() with BLACKLISTED status for blacklisted
+                    -- urls, and with no status for skipped ones
+                    ipv4_last_failure = CASE WHEN blacklisted THEN now() ELSE ipv4_last_failure END,
+                    ipv4_success = CASE WHEN blacklisted THEN false END,
+                    ipv4_status_code = CASE WHEN blacklisted THEN %(blacklisted_code)s END,
+                    ipv4_permanent_redirect_target = NULL,
+
+                    ipv6_last_failure = CASE WHEN blacklisted THEN now() ELSE ipv6_last_failure END,
+                    ipv6_success = CASE WHEN blacklisted THEN false ELSE ipv6_success END,
+                    ipv6_status_code = CASE WHEN blacklisted THEN %(blacklisted_code)s ELSE ipv6_status_code END,
+                    ipv6_permanent_redirect_target = CASE WHEN blacklisted THEN NULL ELSE ipv6_permanent_redirect_target END,
+
+                    check_duration = NULL
+                FROM matched_urls
+                WHERE links.url = matched_urls.url AND (blacklisted OR skipped)
+                """,
+                {
+                    'hosts': [rule[0] for rule in rules],
+                    'blacklisted': [rule[1] for rule in rules],
+                    'skipped': [rule[2] for rule in rules],
+                    'recheck_min': [rule[3][0] for rule in rules],
+                    'recheck_max': [rule[3][1] for rule in rules],
+                    'priority_recheck_min': [rule[4][0] for rule in rules],
+                    'priority_recheck_max': [rule[4][1] for rule in rules],
+                    'blacklisted_code': ExtendedStatusCodes.BLACKLISTED,
+                }
+            )
+
+            return int(cur.rowcount)
+
+
+CheckLogRecord = tuple[str, datetime.datetime, datetime.datetime, datetime.datetime, UrlStatus | None, UrlStatus | None, float | None]
+
+
+async def create_check_log(pool: aiopg.Pool) -> None:
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            # unlogged, as the log is only a write buffer: on a crash
+            # it's truncated and the urls are just checked again
+            await cur.execute(
+                """
+                CREATE UNLOGGED TABLE IF NOT EXISTS link_checks (
+                    url text NOT NULL,
+                    check_time timestamp with time zone NOT NULL,
+                    next_check_time timestamp with time zone NOT NULL,
+                    priority_next_check_time timestamp with time zone NOT NULL,
+
+                    ipv4_success boolean,
+                    ipv4_status_code smallint,
+                    ipv4_permanent_redirect_target text,
+
+                    ipv6_success boolean,
+                    ipv6_status_code smallint,
+                    ipv6_permanent_redirect_target text,
+
+                    check_duration real
+                )
+                """
+            )
+
+
+async def append_check_log(pool: aiopg.Pool, records: list[CheckLogRecord]) -> None:
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                INSERT INTO link_checks
+                SELECT
+                    *
+                FROM unnest(
+                    %(urls)s::text[],
+                    %(check_times)s::timestamptz[],
+                    %(next_check_times)s::timestamptz[],
+                    %(priority_next_check_times)s::timestamptz[],
+                    %(ipv4_successes)s::boolean[],
+                    %(ipv4_status_codes)s::smallint[],
+                    %(ipv4_permanent_redirect_targets)s::text[],
+                    %(ipv6_successes)s::boolean[],
+                    %(ipv6_status_codes)s::smallint[],
+                    %(ipv6_permanent_redirect_targets)s::text[],
+                    %(check_durations)s::real[]
+                )
+                """,
+                {
+                    'urls': [record[0] for record in records],
+                    'check_times': [record[1] for record in records],
+                    'next_check_times': [record[2] for record in records],
+                    'priority_next_check_times': [record[3] for record in records],
+
+                    'ipv4_successes': [record[4].success if record[4] is not None else None for record in records],
+                    'ipv4_status_codes': [record[4].status_code if record[4] is not None else None for record in records],
+                    'ipv4_permanent_redirect_targets': [record[4].permanent_redirect_target if record[4] is not None else None for record in records],
+
+                    'ipv6_successes': [record[5].success if record[5] is not None else None for record in records],
+                    'ipv6_status_codes': [record[5].status_code if record[5] is not None else None for record in records],
+                    'ipv6_permanent_redirect_targets': [record[5].permanent_redirect_target if record[5] is not None else None for record in records],
+
+                    'check_durations': [record[6] for record in records],
+                }
+            )
+
+
+async def merge_check_log(pool: aiopg.Pool) -> int:
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            async with cur.begin():
+                # same as update_url_status() applied to each logged check in order
+                await cur.execute(
+                    """
+                    WITH latest_checks AS (
+                        SELECT DISTINCT ON (url)
+                            *,
+                            max(check_time) FILTER (WHERE ipv4_success) OVER urls AS ipv4_last_success,
+                            max(check_time) FILTER (WHERE NOT ipv4_success) OVER urls AS ipv4_last_failure,
+                            max(check_time) FILTER (WHERE ipv6_success) OVER urls AS ipv6_last_success,
+                            max(check_time) FILTER (WHERE NOT ipv6_success) OVER urls AS ipv6_last_failure,
+                            (array_agg(ipv6_success) FILTER (WHERE ipv6_success IS NOT NULL) OVER latest_urls)[1] AS latest_ipv6_success,
+                            (array_agg(ipv6_status_code) FILTER (WHERE ipv6_status_code IS NOT NULL) OVER latest_urls)[1] AS latest_ipv6_status_code,
+                            (array_agg(ipv6_permanent_redirect_target) FILTER (WHERE ipv6_permanent_redirect_target IS NOT NULL) OVER latest_urls)[1] AS latest_ipv6_permanent_redirect_target
+                        FROM link_checks
+                        WINDOW
+                            urls AS (PARTITION BY url),
+                            latest_urls AS (PARTITION BY url ORDER BY check_time DESC ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+                        ORDER BY url, check_time DESC
+                    )
+                    UPDATE links
+                    SET
+                        next_check = CASE WHEN priority THEN latest_checks.priority_next_check_time ELSE latest_checks.next_check_time END,
+                        last_checked = latest_checks.check_time,
+
+                        ipv4_last_success = COALESCE(latest_checks.ipv4_last_success, links.ipv4_last_success),
+                        ipv4_last_failure = COALESCE(latest_checks.ipv4_last_failure, links.ipv4_last_failure),
+                        ipv4_success = latest_checks.ipv4_success,
+                        ipv4_status_code = latest_checks.ipv4_status_code,
+                        ipv4_permanent_redirect_target = latest_checks.ipv4_permanent_redirect_target,
+
+                        ipv6_last_success = COALESCE(latest_checks.ipv6_last_success, links.ipv6_last_success),
+                        ipv6_last_failure = COALESCE(latest_checks.ipv6_last_failure, links.ipv6_last_failure),
+                        ipv6_success = COALESCE(latest_checks.latest_ipv6_success, links.ipv6_success),
+                        ipv6_status_code = COALESCE(latest_checks.latest_ipv6_status_code, links.ipv6_status_code),
+                        ipv6_permanent_redirect_target = COALESCE(latest_checks.latest_ipv6_permanent_redirect_target, links.ipv6_permanent_redirect_target),
+
+                        check_duration = latest_checks.check_duration
+                    FROM latest_checks
+                    WHERE links.url = latest_checks.url
+                    """
+                )
+
+                merged = int(cur.rowcount)
+
+                await cur.execute('TRUNCATE link_checks')
+
+                return merged
+
+
 async def update_statistics(pool: aiopg.Pool, num_urls_checked: int) -> None:
     async with pool.acquire() as conn:
         async with conn.cursor() as cur:
@@ -124,3 +510,23 @@ async def update_statistics(pool: aiopg.Pool, num_urls_checked: int) -> None:
                     'num_urls_checked': num_urls_checked,
                 }
             )
+
+
+async def get_scheduled_checks_histogram(pool: aiopg.Pool, bucket_size: float) -> list[tuple[float, int]]:
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT
+                    floor(extract(epoch FROM next_check) / %(bucket_size)s) * %(bucket_size)s,
+                    count(*)
+                FROM links
+                WHERE refcount > 0 AND next_check > now()
+                GROUP BY 1
+                """,
+                {
+                    'bucket_size': bucket_size,
+                }
+            )
+
+            return [(float(row[0]), row[1]) for row in await cur.fetchall()]
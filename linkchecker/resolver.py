@@ -18,23 +18,49 @@
 import asyncio
 import socket
 from concurrent.futures import CancelledError
-from typing import Any, Dict, List, Optional
-
-import aiodns
+from typing import Any, Dict, List, Optional, Tuple
 
 from aiohttp.abc import AbstractResolver
 
+from linkchecker.dnsengine import DnsEngine
+from linkchecker.exceptions import DnsResolutionError, classify_exception
+from linkchecker.status import ExtendedStatusCodes
+
+
+def _pack_addresses(family: int, addresses: List[str]) -> bytes:
+    packed = []
+    for address in addresses:
+        try:
+            packed.append(socket.inet_pton(family, address))
+        except OSError:
+            pass  # c-ares may return IPv4 literal as is for AF_INET6 request
+    return b''.join(packed)
+
 
 class SingleDnsStatus:
-    addresses: List[str]
-    exception: Optional[Exception]
+    __slots__ = ('_family', '_packed_addresses', 'error')
+
+    _family: int
+    _packed_addresses: bytes
+    error: Optional[int]
 
-    def __init__(self, addresses: List[str], exception: Optional[Exception] = None) -> None:
-        self.addresses = addresses
-        self.exception = exception
+    def __init__(self, family: int, addresses: List[str], error: Optional[int] = None) -> None:
+        self._family = family
+        self._packed_addresses = _pack_addresses(family, addresses)
+        self.error = error
+
+    @property
+    def addresses(self) -> List[str]:
+        size = 4 if self._family == socket.AF_INET else 16
+        return [
+            socket.inet_ntop(self._family, self._packed_addresses[offset:offset + size])
+            for offset in range(0, len(self._packed_addresses), size)
+        ]
 
 
 class MultiDnsStatus:
+    __slots__ = ('ipv4', 'ipv6')
+
     ipv4: SingleDnsStatus
     ipv6: SingleDnsStatus
 
@@ -44,23 +70,27 @@ class MultiDnsStatus:
 
 
 class PrecachedAsyncResolver(AbstractResolver):
-    _resolver: aiodns.DNSResolver
+    _engine: DnsEngine
+    _owns_engine: bool
     _statuses: Dict[str, MultiDnsStatus]
+    _preferred_addresses: Dict[Tuple[str, int], str]
 
-    def __init__(self) -> None:
-        self._resolver = aiodns.DNSResolver()
+    def __init__(self, preferred_addresses: Dict[Tuple[str, int], str] | None = None, engine: DnsEngine | None = None) -> None:
+        self._engine = engine if engine is not None else DnsEngine()
+        self._owns_engine = engine is None
         self._statuses = {}
+        self._preferred_addresses = preferred_addresses if preferred_addresses is not None else {}
 
-    async def _dns_request(self, host: str, family: int) -> SingleDnsStatus:
+    async def _dns_request(self, host: str, family: socket.AddressFamily) -> SingleDnsStatus:
         try:
-            addresses = (await self._resolver.gethostbyname(host, family)).addresses
-            if addresses:
-                return SingleDnsStatus(addresses)
-            return SingleDnsStatus([], aiodns.error.DNSError(1, 'DNS server returned answer with no data'))
+            status = SingleDnsStatus(family, await self._engine.gethostbyname(host, family))
+            if status.addresses:
+                return status
+            return SingleDnsStatus(family, [], ExtendedStatusCodes.DNS_NO_ADDRESS_RECORD)
         except (KeyboardInterrupt, CancelledError, MemoryError):
             raise  # pragma: no cover
         except Exception as e:
-            return SingleDnsStatus([], e)
+            return SingleDnsStatus(family, [], classify_exception(e, host))
 
     async def get_host_status(self, host: str) -> MultiDnsStatus:
         if host in self._statuses:
@@ -78,8 +108,16 @@ class PrecachedAsyncResolver(AbstractResolver):
         multistatus = await self.get_host_status(host)
         status = multistatus.ipv4 if family == socket.AF_INET else multistatus.ipv6
 
-        if status.exception:
-            raise status.exception
+        if status.error is not None:
+            raise DnsResolutionError(status.error)
+
+        addresses = status.addresses
+
+        # address which worked last time goes first
+        preferred = self._preferred_addresses.get((host, family))
+        if preferred is not None and preferred in addresses:
+            addresses.remove(preferred)
+            addresses.insert(0, preferred)
 
         return [
             {
@@ -89,8 +127,10 @@ class PrecachedAsyncResolver(AbstractResolver):
                 'family': family,
                 'proto': 0,
                 'flags': socket.AI_NUMERICHOST
-            } for address in status.addresses
+            } for address in addresses
         ]
 
     async def close(self) -> None:
-        self._resolver.cancel()
+        # shared engine outlives the resolver
+        if self._owns_engine:
+            self._engine.close()
@@ -0,0 +1,59 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+from collections import deque
+from typing import Deque, List
+
+
+class RollingCounter:
+    # values are accumulated into buckets, so the window slides
+    # with a granularity of window / buckets seconds
+    _bucket_duration: float
+    _num_buckets: int
+    _buckets: Deque[List[float]]  # [bucket index, sum, max]
+
+    def __init__(self, window: float = 60.0, buckets: int = 12) -> None:
+        self._bucket_duration = window / buckets
+        self._num_buckets = buckets
+        self._buckets = deque()
+
+    def _expire(self, now: float) -> int:
+        current = int(now / self._bucket_duration)
+
+        while self._buckets and self._buckets[0][0] <= current - self._num_buckets:
+            self._buckets.popleft()
+
+        return current
+
+    def add(self, value: float = 1.0, now: float | None = None) -> None:
+        current = self._expire(time.monotonic() if now is None else now)
+
+        if self._buckets and self._buckets[-1][0] == current:
+            bucket = self._buckets[-1]
+            bucket[1] += value
+            bucket[2] = max(bucket[2], value)
+        else:
+            self._buckets.append([current, value, value])
+
+    def get_sum(self, now: float | None = None) -> float:
+        self._expire(time.monotonic() if now is None else now)
+        return sum(bucket[1] for bucket in self._buckets)
+
+    def get_max(self, now: float | None = None) -> float:
+        self._expire(time.monotonic() if now is None else now)
+        return max((bucket[2] for bucket in self._buckets), default=0.0)
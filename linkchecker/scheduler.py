@@ -0,0 +1,108 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import random
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
+
+
+class RecheckScheduler:
+    _bucket_size: float
+    _candidates: int
+    _max_hosts: int
+    _global: Dict[int, float]
+    _global_total: float
+    _per_host: OrderedDict[str, Dict[int, float]]
+    _per_host_total: Dict[str, float]
+
+    def __init__(self, bucket_size: float = 3600, candidates: int = 4, max_hosts: int = 10000) -> None:
+        self._bucket_size = bucket_size
+        self._candidates = candidates
+        self._max_hosts = max_hosts
+        self._global = {}
+        self._global_total = 0.0
+        self._per_host = OrderedDict()
+        self._per_host_total = {}
+
+    def preload(self, histogram: Iterable[Tuple[float, int]]) -> None:
+        for timestamp, count in histogram:
+            bucket = int(timestamp // self._bucket_size)
+            self._global[bucket] = self._global.get(bucket, 0.0) + count
+            self._global_total += count
+
+    def _get_load(self, hostkey: str, bucket: int) -> float:
+        load = 0.0
+
+        # both loads are normalized to the average bucket population,
+        # so busy hosts are spread as evenly as the global schedule
+        if self._global_total:
+            load += self._global.get(bucket, 0.0) * len(self._global) / self._global_total
+
+        host_buckets = self._per_host.get(hostkey)
+        if host_buckets:
+            load += host_buckets.get(bucket, 0.0) * len(host_buckets) / self._per_host_total[hostkey]
+
+        return load
+
+    def pick(self, hostkey: str, now: float, recheck_min: float, recheck_max: float, weight: float = 1.0) -> float:
+        best_recheck = recheck_min + (recheck_max - recheck_min) * random.random()
+        best_load = self._get_load(hostkey, int((now + best_recheck) // self._bucket_size))
+
+        # power of n choices: pick least loaded of several random candidates
+        # which keeps the distribution random, but levels out the peaks
+        for _ in range(self._candidates - 1):
+            if best_load == 0:
+                break
+
+            recheck = recheck_min + (recheck_max - recheck_min) * random.random()
+            load = self._get_load(hostkey, int((now + recheck) // self._bucket_size))
+
+            if load < best_load:
+                best_recheck, best_load = recheck, load
+
+        bucket = int((now + best_recheck) // self._bucket_size)
+
+        self._global[bucket] = self._global.get(bucket, 0.0) + weight
+        self._global_total += weight
+
+        host_buckets = self._per_host.setdefault(hostkey, {})
+        host_buckets[bucket] = host_buckets.get(bucket, 0.0) + weight
+        self._per_host_total[hostkey] = self._per_host_total.get(hostkey, 0.0) + weight
+
+        # per-host schedules are only kept for recently checked hosts;
+        # busy hosts, for which leveling matters, stay in the map
+        self._per_host.move_to_end(hostkey)
+        if len(self._per_host) > self._max_hosts:
+            evicted, _ = self._per_host.popitem(last=False)
+            del self._per_host_total[evicted]
+
+        return best_recheck
+
+    def prune(self, now: float) -> None:
+        current_bucket = int(now // self._bucket_size)
+
+        self._global = {bucket: count for bucket, count in self._global.items() if bucket >= current_bucket}
+        self._global_total = sum(self._global.values())
+
+        for hostkey in list(self._per_host.keys()):
+            host_buckets = {bucket: count for bucket, count in self._per_host[hostkey].items() if bucket >= current_bucket}
+            if host_buckets:
+                self._per_host[hostkey] = host_buckets
+                self._per_host_total[hostkey] = sum(host_buckets.values())
+            else:
+                del self._per_host[hostkey]
+                del self._per_host_total[hostkey]
@@ -15,7 +15,7 @@
 # You should have received a copy of the GNU General Public License
 # along with repology.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import ClassVar, Optional
+from typing import ClassVar, NamedTuple, Optional
 
 
 class ExtendedStatusCodes:
@@ -55,14 +55,13 @@ class ExtendedStatusCodes:
     SSL_CERTIFICATE_SELF_SIGNED_IN_CHAIN: ClassVar[int] = -504
     SSL_CERTIFICATE_INCOMPLETE_CHAIN: ClassVar[int] = -505
 
+    # FTP
+    FTP_ERROR: ClassVar[int] = -600
+    BAD_FTP: ClassVar[int] = -601
 
-class UrlStatus:
+
+class UrlStatus(NamedTuple):
     success: bool
     status_code: int
-    permanent_redirect_target: Optional[str]
+    permanent_redirect_target: Optional[str] = None
     # TODO: add size, content-type and lastmod time
-
-    def __init__(self, success: bool, status_code: int, permanent_redirect_target: Optional[str] = None) -> None:
-        self.success = success
-        self.status_code = status_code
-        self.permanent_redirect_target = permanent_redirect_target
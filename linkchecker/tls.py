@@ -0,0 +1,93 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import ssl
+import time
+from typing import Dict, Hashable, Tuple
+
+from linkchecker.status import ExtendedStatusCodes, UrlStatus
+
+
+# certificate verification failures are a property of the certificate
+# a host serves, so they are reproduced by every handshake; generic
+# SSL errors may be transient and are not cached
+_CERTIFICATE_FAILURES = frozenset([
+    ExtendedStatusCodes.SSL_CERTIFICATE_HAS_EXPIRED,
+    ExtendedStatusCodes.SSL_CERTIFICATE_HOSTNAME_MISMATCH,
+    ExtendedStatusCodes.SSL_CERTIFICATE_SELF_SIGNED,
+    ExtendedStatusCodes.SSL_CERTIFICATE_SELF_SIGNED_IN_CHAIN,
+    ExtendedStatusCodes.SSL_CERTIFICATE_INCOMPLETE_CHAIN,
+])
+
+
+_ssl_contexts: Dict[bool, ssl.SSLContext] = {}
+
+
+def get_ssl_context(strict: bool = False) -> ssl.SSLContext:
+    # trust store is loaded once per process and shared by all connections
+    context = _ssl_contexts.get(strict)
+    if context is None:
+        context = ssl.create_default_context()
+        if strict:
+            context.minimum_version = ssl.TLSVersion.TLSv1_2
+        _ssl_contexts[strict] = context
+    return context
+
+
+class TlsOutcomeCacheStatistics:
+    cached: int = 0
+    hits: int = 0
+
+
+class TlsOutcomeCache:
+    _ttl: float
+    _outcomes: Dict[Hashable, Tuple[int, float]]
+    _stats: TlsOutcomeCacheStatistics
+
+    def __init__(self, ttl: float) -> None:
+        self._ttl = ttl
+        self._outcomes = {}
+        self._stats = TlsOutcomeCacheStatistics()
+
+    def get(self, key: Hashable) -> UrlStatus | None:
+        outcome = self._outcomes.get(key)
+        if outcome is None:
+            return None
+
+        status_code, expires = outcome
+        if expires < time.monotonic():
+            del self._outcomes[key]
+            return None
+
+        self._stats.hits += 1
+        return UrlStatus(False, status_code)
+
+    def record(self, key: Hashable, status: UrlStatus) -> None:
+        if status.success or status.status_code not in _CERTIFICATE_FAILURES:
+            return
+
+        now = time.monotonic()
+        if len(self._outcomes) >= 10000:
+            self._outcomes = {k: v for k, v in self._outcomes.items() if v[1] >= now}
+        self._outcomes[key] = (status.status_code, now + self._ttl)
+        self._stats.cached += 1
+
+    def get_statistics(self) -> TlsOutcomeCacheStatistics:
+        return self._stats
+
+    def reset_statistics(self) -> None:
+        self._stats = TlsOutcomeCacheStatistics()
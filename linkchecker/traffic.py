@@ -0,0 +1,125 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import gzip
+import socket
+import time
+from typing import Dict, Iterator, TextIO
+
+from linkchecker.status import UrlStatus
+
+
+_HEADER = '# repology-linkchecker traffic profile v2'
+
+# v1 profiles lack the shortcut column
+_HEADER_V1 = '# repology-linkchecker traffic profile v1'
+
+# outcomes answered without a request are marked by what answered
+# them, e.g. 'breaker', 'tls', 'ipv6', 'coalesced' or 'assumed'
+SHORTCUT_NONE = '-'
+
+
+class TrafficRecord:
+    __slots__ = ('offset', 'host_id', 'family', 'duration', 'status_code', 'redirect', 'fallback', 'shortcut')
+
+    offset: float
+    host_id: int
+    family: int
+    duration: float
+    status_code: int
+    redirect: bool
+    fallback: bool
+    shortcut: str | None
+
+    def __init__(self, offset: float, host_id: int, family: int, duration: float, status_code: int, redirect: bool = False, fallback: bool = False, shortcut: str | None = None) -> None:
+        self.offset = offset
+        self.host_id = host_id
+        self.family = family
+        self.duration = duration
+        self.status_code = status_code
+        self.redirect = redirect
+        self.fallback = fallback
+        self.shortcut = shortcut
+
+
+class TrafficProfileWriter:
+    # host names are replaced with sequential ids and urls are not
+    # recorded at all, so the profile carries no identifying data
+    #
+    # the id map is dropped once it reaches max_hosts; hosts seen
+    # after that get new ids, so ids stay unique within the profile
+    _file: TextIO
+    _start: float
+    _max_hosts: int
+    _host_ids: Dict[str, int]
+    _next_host_id: int
+    _num_records: int
+
+    def __init__(self, path: str, max_hosts: int = 100000) -> None:
+        self._file = gzip.open(path, 'wt', encoding='ascii')
+        self._file.write(_HEADER + '\n')
+        self._start = time.monotonic()
+        self._max_hosts = max_hosts
+        self._host_ids = {}
+        self._next_host_id = 0
+        self._num_records = 0
+
+    def _get_host_id(self, host: str) -> int:
+        host_id = self._host_ids.get(host)
+        if host_id is None:
+            if len(self._host_ids) >= self._max_hosts:
+                self._host_ids = {}
+            host_id = self._host_ids[host] = self._next_host_id
+            self._next_host_id += 1
+        return host_id
+
+    def record(self, host: str, family: int, duration: float, status: UrlStatus, fallback: bool = False, shortcut: str | None = None) -> None:
+        host_id = self._get_host_id(host)
+        redirect = status.permanent_redirect_target is not None
+
+        self._file.write(
+            f'{(time.monotonic() - self._start) * 1000:.0f}\t{host_id}\t{6 if family == socket.AF_INET6 else 4}\t'
+            f'{duration * 1000:.0f}\t{status.status_code}\t{redirect:d}\t{fallback:d}\t{shortcut or SHORTCUT_NONE}\n'
+        )
+        self._num_records += 1
+
+    def get_num_records(self) -> int:
+        return self._num_records
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def read_traffic_profile(path: str) -> Iterator[TrafficRecord]:
+    with gzip.open(path, 'rt', encoding='ascii') as fd:
+        header = fd.readline().rstrip('\n')
+        if header not in (_HEADER, _HEADER_V1):
+            raise RuntimeError(f'{path} is not a traffic profile')
+
+        for line in fd:
+            offset, host_id, family, duration, status_code, redirect, fallback, *rest = line.rstrip('\n').split('\t')
+            shortcut = rest[0] if rest and rest[0] != SHORTCUT_NONE else None
+            yield TrafficRecord(
+                int(offset) / 1000,
+                int(host_id),
+                socket.AF_INET6 if family == '6' else socket.AF_INET,
+                int(duration) / 1000,
+                int(status_code),
+                redirect == '1',
+                fallback == '1',
+                shortcut,
+            )
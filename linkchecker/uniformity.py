@@ -0,0 +1,123 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+from typing import Tuple
+
+from linkchecker.status import UrlStatus
+
+
+_Fingerprint = Tuple[UrlStatus | None, UrlStatus | None]
+
+
+def _get_fingerprint(ipv4_status: UrlStatus | None, ipv6_status: UrlStatus | None) -> _Fingerprint | None:
+    # only failures are considered: successful responses are expected
+    # to be the same for all urls, and differ in redirect targets anyway
+    if ipv4_status is not None and ipv4_status.success or ipv6_status is not None and ipv6_status.success:
+        return None
+    if ipv4_status is None and ipv6_status is None:
+        return None
+    return (ipv4_status, ipv6_status)
+
+
+class UniformityStatistics:
+    hosts: int = 0
+    assumed: int = 0
+    samples: int = 0
+    mismatches: int = 0
+
+
+class UniformBatch:
+    _detector: 'UniformResponseDetector'
+    _fingerprint: _Fingerprint | None
+    _num_matching: int
+    _uniform: bool
+    _disqualified: bool
+    _num_skipped: int
+
+    def __init__(self, detector: 'UniformResponseDetector') -> None:
+        self._detector = detector
+        self._fingerprint = None
+        self._num_matching = 0
+        self._uniform = False
+        self._disqualified = False
+        self._num_skipped = 0
+
+    @property
+    def fingerprint(self) -> _Fingerprint | None:
+        return self._fingerprint if self._uniform else None
+
+    def should_check(self) -> bool:
+        if not self._uniform:
+            return True
+
+        if self._num_skipped + 1 >= self._detector.sample_interval:
+            self._num_skipped = 0
+            self._detector.stats.samples += 1
+            return True
+
+        self._num_skipped += 1
+        return False
+
+    def record(self, ipv4_status: UrlStatus | None, ipv6_status: UrlStatus | None) -> bool:
+        # returns False if the result contradicts the assumed fingerprint
+        fingerprint = _get_fingerprint(ipv4_status, ipv6_status)
+
+        if self._uniform:
+            if fingerprint == self._fingerprint:
+                return True
+
+            self._uniform = False
+            self._disqualified = True
+            self._detector.stats.mismatches += 1
+            return False
+
+        if self._disqualified:
+            pass
+        elif fingerprint is None or self._fingerprint is not None and fingerprint != self._fingerprint:
+            # the first urls of the batch decide; the host is not uniform
+            self._disqualified = True
+        else:
+            self._fingerprint = fingerprint
+            self._num_matching += 1
+            if self._num_matching >= self._detector.threshold:
+                self._uniform = True
+                self._detector.stats.hosts += 1
+
+        return True
+
+    def account_assumed(self, count: int) -> None:
+        self._detector.stats.assumed += count
+
+
+class UniformResponseDetector:
+    threshold: int
+    sample_interval: int
+    stats: UniformityStatistics
+
+    def __init__(self, threshold: int, sample_interval: int) -> None:
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.stats = UniformityStatistics()
+
+    def start_batch(self) -> UniformBatch:
+        return UniformBatch(self)
+
+    def get_statistics(self) -> UniformityStatistics:
+        return self.stats
+
+    def reset_statistics(self) -> None:
+        self.stats = UniformityStatistics()
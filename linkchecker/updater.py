@@ -15,31 +15,246 @@
 # You should have received a copy of the GNU General Public License
 # along with repology.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import datetime
 import random
+from typing import NamedTuple
 
 import aiopg
 
-from linkchecker.hostmanager import HostManager
-from linkchecker.queries import update_statistics, update_url_status
+from linkchecker.hostmanager import HostManager, HostStatus
+from linkchecker.queries import CheckLogRecord, UrlSchedule, append_check_log, create_check_log, merge_check_log, update_statistics, update_url_check_time, update_url_status, update_urls_by_host_rules
+from linkchecker.scheduler import RecheckScheduler
 from linkchecker.status import UrlStatus
 
 
+class UpdaterStatistics:
+    written: int = 0
+    unchanged: int = 0
+    merged: int = 0
+    stable: int = 0
+    confirmations: int = 0
+
+    @property
+    def avoided_ratio(self) -> float:
+        return self.unchanged / self.written if self.written else 0.0
+
+
+class _PreviousCheck(NamedTuple):
+    ipv4_status: UrlStatus | None
+    ipv6_status: UrlStatus | None
+    ipv4_last_success: float | None
+    ipv4_last_failure: float | None
+
+
+_Rechecks = tuple[tuple[int, int], tuple[int, int]]
+
+
+def _is_unchanged(previous: _PreviousCheck, ipv4_status: UrlStatus | None, ipv6_status: UrlStatus | None) -> bool:
+    # ipv6 status is not overwritten when not checked, see update_url_status()
+    return previous.ipv4_status == ipv4_status and (ipv6_status is None or previous.ipv6_status == ipv6_status)
+
+
+def _shorter(recheck: tuple[int, int], limit: tuple[int, int]) -> tuple[int, int]:
+    return min(recheck[0], limit[0]), min(recheck[1], limit[1])
+
+
+def _longer(recheck: tuple[int, int], limit: tuple[int, int]) -> tuple[int, int]:
+    return max(recheck[0], limit[0]), max(recheck[1], limit[1])
+
+
 class UrlUpdater:
     _pgpool: aiopg.Pool
     _host_manager: HostManager
+    _scheduler: RecheckScheduler | None
+    _num_written: int
+    _previous_statuses: dict[str, _PreviousCheck]
+    _max_previous_statuses: int
+    _stats: UpdaterStatistics
+
+    _check_log: bool
+    _check_log_batch_size: int
+    _check_log_buffer: list[CheckLogRecord]
+    _check_log_urls: set[str]
+    _merging_urls: set[str]
+    _check_log_lock: asyncio.Lock
 
-    def __init__(self, pgpool: aiopg.Pool, host_manager: HostManager) -> None:
+    def __init__(self, pgpool: aiopg.Pool, host_manager: HostManager, scheduler: RecheckScheduler | None = None, max_previous_statuses: int = 100000, check_log: bool = False, check_log_batch_size: int = 1000) -> None:
         self._pgpool = pgpool
         self._host_manager = host_manager
+        self._scheduler = scheduler
+        self._num_written = 0
+        self._previous_statuses = {}
+        self._max_previous_statuses = max_previous_statuses
+        self._stats = UpdaterStatistics()
+        self._check_log = check_log
+        self._check_log_batch_size = check_log_batch_size
+        self._check_log_buffer = []
+        self._check_log_urls = set()
+        self._merging_urls = set()
+        self._check_log_lock = asyncio.Lock()
+
+    def set_previous_status(self, url: str, ipv4_status: UrlStatus | None, ipv6_status: UrlStatus | None, ipv4_last_success: float | None = None, ipv4_last_failure: float | None = None) -> None:
+        # urls which never reach processing (e.g. dropped by a full
+        # host queue) leave stale entries, so the oldest are evicted
+        if len(self._previous_statuses) >= self._max_previous_statuses and url not in self._previous_statuses:
+            del self._previous_statuses[next(iter(self._previous_statuses))]
+        self._previous_statuses[url] = _PreviousCheck(ipv4_status, ipv6_status, ipv4_last_success, ipv4_last_failure)
+
+    def _get_rechecks(self, url: str, previous: _PreviousCheck | None, ipv4_status: UrlStatus | None, now: float) -> _Rechecks:
+        recheck, priority_recheck = self._host_manager.get_rechecks(url)
+        stable_recheck, stable_after, confirm_recheck = self._host_manager.get_adaptive_rechecks(url)
+
+        if ipv4_status is None:
+            return recheck, priority_recheck
+
+        previous_status = previous.ipv4_status if previous is not None else None
+        changed = previous_status is not None and (previous_status.success, previous_status.status_code) != (ipv4_status.success, ipv4_status.status_code)
+        first_failure = not ipv4_status.success and (previous is None or previous.ipv4_last_failure is None)
+
+        # status change (or a new failure) may be a temporary glitch,
+        # so it's confirmed (or reverted) soon
+        if confirm_recheck is not None and (changed or first_failure):
+            self._stats.confirmations += 1
+            return _shorter(recheck, confirm_recheck), _shorter(priority_recheck, confirm_recheck)
+
+        # links which have not failed for a long time are unlikely to
+        # break soon, so these are checked less often; without a known
+        # failure, only the last success vouches for the link
+        stayed_successful = ipv4_status.success and previous_status is not None and previous_status.success
+        successful_since = None
+        if previous is not None and stayed_successful:
+            successful_since = previous.ipv4_last_failure if previous.ipv4_last_failure is not None else previous.ipv4_last_success
+        if stable_recheck is not None and successful_since is not None and now - successful_since >= stable_after:
+            self._stats.stable += 1
+            return _longer(recheck, stable_recheck), _longer(priority_recheck, stable_recheck)
+
+        return recheck, priority_recheck
+
+    def _pick_rechecks(self, url: str, check_time: datetime.datetime, rechecks: _Rechecks) -> tuple[float, float]:
+        (recheck_min, recheck_max), (priority_recheck_min, priority_recheck_max) = rechecks
+
+        if self._scheduler is None:
+            recheck_seconds = recheck_min + (recheck_max - recheck_min) * random.random()
+            priority_recheck_seconds = priority_recheck_min + (priority_recheck_max - priority_recheck_min) * random.random()
+            return recheck_seconds, priority_recheck_seconds
+
+        hostkey = self._host_manager.get_hostkey(url)
+        now = check_time.timestamp()
+
+        # we don't know which of the times will be used (that depends
+        # on link priority), so each is accounted with half weight
+        return (
+            self._scheduler.pick(hostkey, now, recheck_min, recheck_max, 0.5),
+            self._scheduler.pick(hostkey, now, priority_recheck_min, priority_recheck_max, 0.5),
+        )
 
     async def update(self, url: str, ipv4_status: UrlStatus | None, ipv6_status: UrlStatus | None, check_duration: float | None = None) -> None:
-        (recheck_min, recheck_max), (priority_recheck_min, priority_recheck_max) = self._host_manager.get_rechecks(url)
-        recheck_seconds = recheck_min + (recheck_max - recheck_min) * random.random()
-        priority_recheck_seconds = priority_recheck_min + (priority_recheck_max - priority_recheck_min) * random.random()
+        await self.update_many([url], ipv4_status, ipv6_status, check_duration)
 
+    async def update_many(self, urls: list[str], ipv4_status: UrlStatus | None, ipv6_status: UrlStatus | None, check_duration: float | None = None) -> None:
         check_time = datetime.datetime.now()
-        next_check_time = check_time + datetime.timedelta(seconds=recheck_seconds)
-        priority_next_check_time = check_time + datetime.timedelta(seconds=priority_recheck_seconds)
-        await update_url_status(self._pgpool, url, check_time, next_check_time, priority_next_check_time, ipv4_status, ipv6_status, check_duration)
-        await update_statistics(self._pgpool, 1)
+
+        # next check is picked for each url, even if urls share a result
+        # (e.g. all urls of a blacklisted host), so these do not all come
+        # due at once; recheck interval also depends on link history and
+        # host settings, see _get_rechecks()
+        #
+        # urls which status is the same as known from the previous check
+        # only need rescheduling, which is a cheaper write
+        changed: list[UrlSchedule] = []
+        unchanged: list[UrlSchedule] = []
+        for url in urls:
+            previous = self._previous_statuses.pop(url, None)
+            recheck_seconds, priority_recheck_seconds = self._pick_rechecks(url, check_time, self._get_rechecks(url, previous, ipv4_status, check_time.timestamp()))
+            schedule = (url, check_time + datetime.timedelta(seconds=recheck_seconds), check_time + datetime.timedelta(seconds=priority_recheck_seconds))
+
+            if previous is not None and _is_unchanged(previous, ipv4_status, ipv6_status):
+                unchanged.append(schedule)
+            else:
+                changed.append(schedule)
+
+        if self._check_log:
+            self._check_log_buffer.extend(
+                (url, check_time, next_check_time, priority_next_check_time, ipv4_status, ipv6_status, check_duration)
+                for url, next_check_time, priority_next_check_time in changed + unchanged
+            )
+            self._check_log_urls.update(urls)
+        else:
+            if changed:
+                await update_url_status(self._pgpool, changed, check_time, ipv4_status, ipv6_status, check_duration)
+            if unchanged:
+                await update_url_check_time(
+                    self._pgpool, unchanged, check_time,
+                    ipv4_status.success if ipv4_status is not None else None,
+                    ipv6_status.success if ipv6_status is not None else None,
+                    check_duration
+                )
+                self._stats.unchanged += len(unchanged)
+
+        self._num_written += len(urls)
+        self._stats.written += len(urls)
+
+        if self._check_log:
+            if len(self._check_log_buffer) >= self._check_log_batch_size:
+                async with self._check_log_lock:
+                    await self._flush_check_log()
+            return
+
+        await update_statistics(self._pgpool, len(urls))
+
+    async def _flush_check_log(self) -> None:
+        records, self._check_log_buffer = self._check_log_buffer, []
+        if records:
+            await append_check_log(self._pgpool, records)
+            await update_statistics(self._pgpool, len(records))
+
+    async def prepare_check_log(self) -> None:
+        await create_check_log(self._pgpool)
+        await self.merge_check_log()  # leftovers of previous run
+
+    async def merge_check_log(self) -> int:
+        # appends are serialized with merges, so no record gets
+        # truncated without being merged
+        #
+        # urls stay pending until the merge is committed; ones
+        # checked while it runs are left for the next merge
+        async with self._check_log_lock:
+            self._merging_urls, self._check_log_urls = self._check_log_urls, set()
+            try:
+                await self._flush_check_log()
+                merged = await merge_check_log(self._pgpool)
+            except BaseException:
+                self._check_log_urls |= self._merging_urls
+                raise
+            finally:
+                self._merging_urls = set()
+
+        self._stats.merged += merged
+        return merged
+
+    def is_pending_merge(self, url: str) -> bool:
+        # the url was checked, but links are not yet updated, so it
+        # still looks due
+        return url in self._check_log_urls or url in self._merging_urls
+
+    def get_num_written(self) -> int:
+        return self._num_written
+
+    def get_statistics(self) -> UpdaterStatistics:
+        return self._stats
+
+    def reset_statistics(self) -> None:
+        self._stats = UpdaterStatistics()
+
+    async def update_by_host_rules(self) -> int:
+        rules = [
+            (host, status == HostStatus.BLACKLISTED, status == HostStatus.SKIPPED, recheck, priority_recheck)
+            for host, status, recheck, priority_recheck in self._host_manager.get_host_rules()
+        ]
+
+        num_updated = await update_urls_by_host_rules(self._pgpool, rules)
+        if num_updated:
+            await update_statistics(self._pgpool, num_updated)
+
+        return num_updated
@@ -16,55 +16,105 @@
 # along with repology.  If not, see <http://www.gnu.org/licenses/>.
 
 import asyncio
+import time
 from typing import Dict, List, MutableSet
 
+from linkchecker.hostcost import HostCostAccounting
 from linkchecker.hostmanager import HostManager
 from linkchecker.processor import UrlProcessor
+from linkchecker.rolling import RollingCounter
 
 
 class WorkerPoolStatistics:
-    scanned: int = 0
-    submitted: int = 0
-    processed: int = 0
-    workers: int = 0
+    __slots__ = ('scanned', 'scanned_priority', 'submitted', 'processed', 'discarded', 'dropped', 'workers', 'priority_workers', 'max_lag', 'max_priority_lag')
+
+    scanned: int
+    scanned_priority: int
+    submitted: int
+    processed: int
+    discarded: int
+    dropped: int
+    workers: int
+    priority_workers: int
+    max_lag: float
+    max_priority_lag: float
+
+    def __init__(self) -> None:
+        self.scanned = 0
+        self.scanned_priority = 0
+        self.submitted = 0
+        self.processed = 0
+        self.discarded = 0
+        self.dropped = 0
+        self.workers = 0
+        self.priority_workers = 0
+        self.max_lag = 0.0
+        self.max_priority_lag = 0.0
 
 
 class _HostWorker:
     _hostkey: str
     # _processor: UrlsProcessor  # confuses mypy
     _queue: MutableSet[str]
+    _priority_queue: MutableSet[str]
     _in_processing: MutableSet[str]
     _task: asyncio.Task  # type: ignore
     _pool: 'HostWorkerPool'
     _max_queue: int
+    priority: bool
 
-    def __init__(self, processor: UrlProcessor, pool: 'HostWorkerPool', hostkey: str, max_queue: int) -> None:
+    def __init__(self, processor: UrlProcessor, pool: 'HostWorkerPool', hostkey: str, max_queue: int, priority: bool = False) -> None:
         self._hostkey = hostkey
         self._processor = processor
         self._queue = set()
+        self._priority_queue = set()
         self._in_processing = set()
         self._task = asyncio.create_task(self.run())
         self._pool = pool
         self._max_queue = max_queue
+        self.priority = priority
 
-    def add_url(self, url: str) -> None:
-        if url in self._in_processing:
-            return
+    def add_url(self, url: str, priority: bool = False) -> int:
+        # returns number of urls dropped because the queue is full
+        if url in self._in_processing or url in self._priority_queue:
+            return 0
+
+        if priority:
+            self._queue.discard(url)
+
+            # priority url may push out a normal one if the queue is full
+            if len(self._queue) + len(self._priority_queue) >= self._max_queue and self._queue:
+                self._queue.pop()
+                self._priority_queue.add(url)
+                return 1
+
+            if len(self._queue) + len(self._priority_queue) < self._max_queue:
+                self._priority_queue.add(url)
+                return 0
+            return 1
 
         # just add the new url if the queue is not full
-        if len(self._queue) < self._max_queue:
+        if len(self._queue) + len(self._priority_queue) < self._max_queue:
             self._queue.add(url)
-            return
+            return 0
+        return 0 if url in self._queue else 1
 
     async def run(self) -> None:
         try:
-            while self._queue:
-                queue_to_process = self._queue
+            while self._queue or self._priority_queue:
+                # priority urls go first in a batch
+                queue_to_process = list(self._priority_queue) + list(self._queue)
 
-                self._in_processing = queue_to_process
+                self._in_processing = set(queue_to_process)
                 self._queue = set()
+                self._priority_queue = set()
                 self._pool.update_statistics(submitted=len(queue_to_process))
-                await self._processor.process_urls(queue_to_process)
+                self._pool.on_batch_started(self._hostkey)
+                start = time.monotonic()
+                try:
+                    await self._processor.process_urls(queue_to_process)
+                finally:
+                    self._pool.on_batch_finished(self._hostkey, time.monotonic() - start)
                 self._in_processing = set()
 
                 self._pool.update_statistics(processed=len(queue_to_process))
@@ -73,34 +123,80 @@ class _HostWorker:
             self._pool.on_worker_finished(self._hostkey)
 
     async def join(self) -> None:
-        await self._task
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            if not self._task.cancelled():
+                raise
+
+    def discard_queued(self) -> int:
+        num_discarded = len(self._queue) + len(self._priority_queue)
+        self._queue = set()
+        self._priority_queue = set()
+        return num_discarded
+
+    def get_num_in_processing(self) -> int:
+        return len(self._in_processing)
+
+    def cancel(self) -> None:
+        self._task.cancel()
 
 
 class HostWorkerPool:
     # _processor: UrlsProcessor  # confuses mypy
     _host_manager: HostManager
+    _host_costs: HostCostAccounting | None
 
     _max_workers: int
     _max_host_queue: int
+    _priority_share: float
+    _low_watermark: int
+    _low_watermark_share: float | None
+    _stopping: bool
 
     _workers: Dict[str, _HostWorker]
+    _num_priority_workers: int
+    _num_priority_waiting: int
     _workers_finished: List[_HostWorker]
     _worker_has_finished: asyncio.Event
-
-    _stats: WorkerPoolStatistics
-
-    def __init__(self, processor: UrlProcessor, host_manager: HostManager, max_workers: int = 100, max_host_queue: int = 100) -> None:
+    _low_watermark_reached: asyncio.Event
+
+    _scanned: RollingCounter
+    _scanned_priority: RollingCounter
+    _submitted: RollingCounter
+    _processed: RollingCounter
+    _lag: RollingCounter
+    _priority_lag: RollingCounter
+    _discarded: int
+    _dropped: int
+
+    def __init__(self, processor: UrlProcessor, host_manager: HostManager, max_workers: int = 100, max_host_queue: int = 100, priority_share: float = 0.0, low_watermark: int | None = None, stats_window: float = 60.0, host_costs: HostCostAccounting | None = None) -> None:
         self._processor = processor
         self._host_manager = host_manager
+        self._host_costs = host_costs
 
         self._max_workers = max_workers
         self._max_host_queue = max_host_queue
+        self._priority_share = priority_share
+        self._low_watermark = max_workers // 2 if low_watermark is None else low_watermark
+        self._low_watermark_share = 0.5 if low_watermark is None else None
+        self._stopping = False
 
         self._workers = {}
+        self._num_priority_workers = 0
+        self._num_priority_waiting = 0
         self._workers_finished = []
         self._worker_has_finished = asyncio.Event()
+        self._low_watermark_reached = asyncio.Event()
 
-        self._stats = WorkerPoolStatistics()
+        self._scanned = RollingCounter(stats_window)
+        self._scanned_priority = RollingCounter(stats_window)
+        self._submitted = RollingCounter(stats_window)
+        self._processed = RollingCounter(stats_window)
+        self._lag = RollingCounter(stats_window)
+        self._priority_lag = RollingCounter(stats_window)
+        self._discarded = 0
+        self._dropped = 0
 
     async def _join_some_workers(self) -> None:
         await self._worker_has_finished.wait()
@@ -112,38 +208,149 @@ class HostWorkerPool:
         self._workers_finished = []
 
     def on_worker_finished(self, hostkey: str) -> None:
-        self._workers_finished.append(self._workers.pop(hostkey))
+        worker = self._workers.pop(hostkey)
+        if worker.priority:
+            self._num_priority_workers -= 1
+        self._workers_finished.append(worker)
         self._worker_has_finished.set()
 
-    async def add_url(self, url: str) -> None:
-        self._stats.scanned += 1
+        if len(self._workers) <= self._low_watermark:
+            self._low_watermark_reached.set()
+
+    def _has_free_slot(self, priority: bool) -> bool:
+        if priority or not self._num_priority_waiting:
+            return len(self._workers) < self._max_workers
+
+        # while priority urls wait for a slot, a share of slots is
+        # reserved for them, otherwise normal urls may take any
+        max_normal_workers = max(1, self._max_workers - int(self._max_workers * self._priority_share))
+        return len(self._workers) < self._max_workers and len(self._workers) - self._num_priority_workers < max_normal_workers
+
+    async def add_url(self, url: str, priority: bool = False, lag: float = 0.0) -> None:
+        if self._stopping:
+            self._discarded += 1
+            return
+
+        self._scanned.add()
+
+        if priority:
+            self._scanned_priority.add()
+            self._priority_lag.add(lag)
+        else:
+            self._lag.add(lag)
 
         hostkey = self._host_manager.get_hostkey(url)
 
         if hostkey not in self._workers:
-            while len(self._workers) >= self._max_workers:
-                await self._join_some_workers()
+            if priority:
+                self._num_priority_waiting += 1
+
+            try:
+                # another add_url() may start a worker for the same
+                # hostkey while this one waits, then the url joins it
+                while hostkey not in self._workers and not self._has_free_slot(priority):
+                    await self._join_some_workers()
+
+                    # stop() may have been called while waiting
+                    if self.is_stopping():
+                        self._discarded += 1
+                        return
+            finally:
+                if priority:
+                    self._num_priority_waiting -= 1
 
+        if hostkey not in self._workers:
             self._workers[hostkey] = _HostWorker(
                 processor=self._processor,
                 pool=self,
                 hostkey=hostkey,
-                max_queue=self._max_host_queue
+                max_queue=self._max_host_queue,
+                priority=priority
             )
 
-        self._workers[hostkey].add_url(url)
+            if priority:
+                self._num_priority_workers += 1
+        elif priority and not self._workers[hostkey].priority:
+            # worker now serves priority urls as well
+            self._workers[hostkey].priority = True
+            self._num_priority_workers += 1
+
+        self._dropped += self._workers[hostkey].add_url(url, priority)
+
+    def set_max_workers(self, max_workers: int) -> None:
+        # workers above the new limit are not interrupted, but no
+        # new ones are started until the number drops below it
+        increased = max_workers > self._max_workers
+        self._max_workers = max_workers
+
+        if self._low_watermark_share is not None:
+            self._low_watermark = int(max_workers * self._low_watermark_share)
+            if len(self._workers) <= self._low_watermark:
+                self._low_watermark_reached.set()
+
+        # wake up add_url() waiting for a free slot
+        if increased:
+            self._worker_has_finished.set()
+
+    def get_max_workers(self) -> int:
+        return self._max_workers
 
     async def join(self) -> None:
         while self._workers:
             await self._join_some_workers()
 
+    async def wait_for_low_watermark(self) -> None:
+        while len(self._workers) > self._low_watermark:
+            self._low_watermark_reached.clear()
+            await self._low_watermark_reached.wait()
+
+    def stop(self) -> int:
+        # stop accepting new urls and drop queued ones; urls which
+        # are already being processed are left to finish
+        self._stopping = True
+
+        for worker in self._workers.values():
+            self._discarded += worker.discard_queued()
+
+        # wake up add_url() waiting for a free slot
+        self._worker_has_finished.set()
+
+        return sum(worker.get_num_in_processing() for worker in self._workers.values())
+
+    def is_stopping(self) -> bool:
+        return self._stopping
+
+    def cancel(self) -> None:
+        for worker in self._workers.values():
+            worker.cancel()
+
     def update_statistics(self, submitted: int = 0, processed: int = 0) -> None:
-        self._stats.submitted += submitted
-        self._stats.processed += processed
+        if submitted:
+            self._submitted.add(submitted)
+        if processed:
+            self._processed.add(processed)
 
-    def get_statistics(self) -> WorkerPoolStatistics:
-        self._stats.workers = len(self._workers)
-        return self._stats
+    def on_batch_started(self, hostkey: str) -> None:
+        if self._host_costs is not None:
+            self._host_costs.pin(hostkey)
 
-    def reset_statistics(self) -> None:
-        self._stats = WorkerPoolStatistics()
+    def on_batch_finished(self, hostkey: str, seconds: float) -> None:
+        if self._host_costs is not None:
+            self._host_costs.add_worker_time(hostkey, seconds)
+            self._host_costs.unpin(hostkey)
+
+    def get_statistics(self) -> WorkerPoolStatistics:
+        # counters cover the last stats_window seconds, except for
+        # discarded and dropped which are totals
+        stats = WorkerPoolStatistics()
+        stats.scanned = int(self._scanned.get_sum())
+        stats.scanned_priority = int(self._scanned_priority.get_sum())
+        stats.submitted = int(self._submitted.get_sum())
+        stats.processed = int(self._processed.get_sum())
+        stats.discarded = self._discarded
+        stats.dropped = self._dropped
+        stats.workers = len(self._workers)
+        stats.priority_workers = self._num_priority_workers
+        stats.max_lag = self._lag.get_max()
+        stats.max_priority_lag = self._priority_lag.get_max()
+        return stats
@@ -19,22 +19,38 @@
 
 import argparse
 import asyncio
+import os
 import signal
 import sys
 import time
-from typing import Any
+from typing import Any, Coroutine
 
 import aiopg
 
+from linkchecker.autotune import WorkerTuner
+from linkchecker.circuitbreaker import CircuitBreaker
+from linkchecker.coalescer import UrlCoalescer
+from linkchecker.dnsengine import DnsEngine
+from linkchecker.exceptions import get_classification_counters
+from linkchecker.hostcost import HostCostAccounting
 from linkchecker.hostmanager import HostManager
 from linkchecker.processor.blacklisted import BlacklistedUrlProcessor
 from linkchecker.processor.dispatching import DispatchingUrlProcessor
 from linkchecker.processor.dummy import DummyUrlProcessor
+from linkchecker.processor.ftp import FtpUrlProcessor
 from linkchecker.processor.http import HttpUrlProcessor
-from linkchecker.queries import iterate_urls_to_recheck
+from linkchecker.queries import UrlToCheck, get_scheduled_checks_histogram, get_urls_to_check, iterate_notified_urls, iterate_urls_to_recheck
+from linkchecker.rolling import RollingCounter
+from linkchecker.scheduler import RecheckScheduler
+from linkchecker.status import ExtendedStatusCodes
+from linkchecker.tls import TlsOutcomeCache
+from linkchecker.traffic import TrafficProfileWriter
+from linkchecker.uniformity import UniformResponseDetector
 from linkchecker.updater import UrlUpdater
 from linkchecker.worker import HostWorkerPool
 
+import psycopg2
+
 import yaml
 
 
@@ -45,20 +61,67 @@ except ImportError:
     SIGINFO_SUPPORTED = False
 
 
+STATUS_NAMES = {value: name for name, value in vars(ExtendedStatusCodes).items() if isinstance(value, int)}
+
+
 async def main_loop(options: argparse.Namespace, pgpool: aiopg.Pool) -> None:
     with open(options.hosts, 'r') as fd:
         host_manager = HostManager(yaml.safe_load(fd))
 
-    updater = UrlUpdater(pgpool, host_manager)
+    scheduler = None
+    if options.spread_rechecks:
+        scheduler = RecheckScheduler(options.spread_bucket, max_hosts=options.spread_max_hosts)
+        scheduler.preload(await get_scheduled_checks_histogram(pgpool, options.spread_bucket))
+
+    updater = UrlUpdater(pgpool, host_manager, scheduler, check_log=options.check_log, check_log_batch_size=options.check_log_batch_size)
+    if options.check_log:
+        await updater.prepare_check_log()
+
+    # urls are fed to workers continuously; these only limit how stale
+    # a scan result may become and how often the statistics are reported
+    max_scan_duration = 60.0
+    stats_window = 60.0
+
+    shutdown = asyncio.Event()
+
+    coalescer = UrlCoalescer(ttl=max_scan_duration) if options.coalesce_urls else None
+    dns_engine = DnsEngine(
+        options.dns_servers.split(',') if options.dns_servers else None,
+        max_in_flight=options.dns_max_in_flight,
+        timeout=options.dns_timeout,
+        tries=options.dns_tries
+    )
+    uniformity_detector = UniformResponseDetector(options.uniform_host_threshold, options.uniform_host_sample) if options.uniform_host_threshold > 0 else None
+    circuit_breaker = CircuitBreaker(options.circuit_breaker_threshold, options.circuit_breaker_cooldown) if options.circuit_breaker_threshold > 0 else None
+    host_costs = HostCostAccounting(options.host_cost_capacity) if options.host_cost_capacity > 0 else None
+    traffic_profile = TrafficProfileWriter(options.capture_profile) if options.capture_profile else None
+    tls_outcome_cache = TlsOutcomeCache(options.tls_outcome_ttl) if options.tls_outcome_ttl > 0 else None
 
     dummy_processor = DummyUrlProcessor(updater)
-    http_processor = HttpUrlProcessor(updater, host_manager, options.timeout, options.skip_ipv6, options.strict_ssl, options.satisfy_with_ipv6)
+    http_processor = HttpUrlProcessor(
+        updater, host_manager, options.timeout, options.skip_ipv6, options.strict_ssl, options.satisfy_with_ipv6, coalescer, circuit_breaker,
+        connect_timeout=options.connect_timeout,
+        read_timeout=options.read_timeout,
+        ipv6_timeout=options.ipv6_timeout,
+        ipv6_connect_timeout=options.ipv6_connect_timeout,
+        ipv6_read_timeout=options.ipv6_read_timeout,
+        ipv6_unreachable_ttl=options.ipv6_unreachable_ttl,
+        shutdown=shutdown,
+        uniformity_detector=uniformity_detector,
+        happy_eyeballs_delay=options.happy_eyeballs_delay if options.happy_eyeballs_delay > 0 else None,
+        dns_engine=dns_engine,
+        tls_outcome_cache=tls_outcome_cache,
+        traffic_profile=traffic_profile,
+        host_costs=host_costs
+    )
+    ftp_processor = FtpUrlProcessor(updater, host_manager, options.timeout, options.skip_ipv6, options.satisfy_with_ipv6, shutdown=shutdown, dns_engine=dns_engine)
     blacklisted_processor = BlacklistedUrlProcessor(updater, host_manager)
 
     dispatcher = DispatchingUrlProcessor(
         # order matters!
         blacklisted_processor,
         http_processor,
+        ftp_processor,
         dummy_processor  # fallback
     )
 
@@ -66,54 +129,311 @@ async def main_loop(options: argparse.Namespace, pgpool: aiopg.Pool) -> None:
         processor=dispatcher,
         host_manager=host_manager,
         max_workers=options.max_workers,
-        max_host_queue=options.max_host_queue
+        max_host_queue=options.max_host_queue,
+        priority_share=options.priority_share,
+        low_watermark=options.low_watermark,
+        stats_window=stats_window,
+        host_costs=host_costs
     )
+    worker_tuner = WorkerTuner(worker_pool, updater, options.min_workers, options.max_workers, options.max_loop_lag, window=stats_window) if options.auto_workers else None
 
-    run_number = 0
-    run_start = 0.0
+    prefiltered = RollingCounter(stats_window)
+    notified = RollingCounter(stats_window)
 
-    run_target_duration = 60.0
-
-    def print_statistics(*args: Any, finished: bool = False) -> None:
+    def print_statistics(*args: Any) -> None:
         stats = worker_pool.get_statistics()
 
-        duration = time.monotonic() - run_start
-
         print(
-            f'Run #{run_number} {"finished in" if finished else "running for"} {duration:.2f}: '
-            f'{stats.scanned} url(s) scanned, '
+            f'Last {stats_window:.0f}s: '
+            f'{prefiltered.get_sum():.0f} url(s) of blacklisted and skipped hosts updated in bulk, '
+            f'{stats.scanned} url(s) scanned ({stats.scanned_priority} priority), '
             f'{stats.submitted} submitted for processing, '
             f'{stats.processed} processed, '
-            f'{stats.workers} worker(s) running',
+            f'{stats.workers} worker(s) running ({stats.priority_workers} priority), '
+            f'max lag {stats.max_lag / 3600:.1f}h ({stats.max_priority_lag / 3600:.1f}h priority)',
             file=sys.stderr
         )
 
+        if stats.dropped:
+            print(f'Since start: {stats.dropped} url(s) dropped on full host queues', file=sys.stderr)
+
+        if options.listen:
+            print(f'Last {stats_window:.0f}s notifications: {notified.get_sum():.0f} url(s) fed immediately', file=sys.stderr)
+
+        updater_stats = updater.get_statistics()
+        merged = f', {updater_stats.merged} merged from check log' if options.check_log else ''
+        print(
+            f'Last {stats_window:.0f}s updates: '
+            f'{updater_stats.written} url(s) written, '
+            f'{updater_stats.unchanged} with unchanged status only rescheduled '
+            f'({updater_stats.avoided_ratio * 100:.1f}% of writes avoided){merged}, '
+            f'{updater_stats.stable} stable url(s) rescheduled later, '
+            f'{updater_stats.confirmations} scheduled for confirmation',
+            file=sys.stderr
+        )
+
+        if coalescer is not None:
+            coalescing_stats = coalescer.get_statistics()
+            print(
+                f'Last {stats_window:.0f}s coalescing: '
+                f'{coalescing_stats.urls} url(s) coalesced into '
+                f'{coalescing_stats.fetched} fetch(es), '
+                f'ratio {coalescing_stats.ratio:.2f}',
+                file=sys.stderr
+            )
+
+        dns_stats = dns_engine.get_statistics()
+        print(
+            f'Last {stats_window:.0f}s DNS: '
+            f'{dns_stats.queries} quer(y/ies), '
+            f'{dns_stats.coalesced} coalesced with ones in flight, '
+            f'{dns_stats.retries} retr(y/ies)',
+            file=sys.stderr
+        )
+
+        if circuit_breaker is not None:
+            breaker_stats = circuit_breaker.get_statistics()
+            print(
+                f'Last {stats_window:.0f}s circuit breaker: '
+                f'{breaker_stats.opened} host(s) cut off, '
+                f'{breaker_stats.short_circuited} check(s) short-circuited, '
+                f'{breaker_stats.probes} probe(s)',
+                file=sys.stderr
+            )
+
+        if tls_outcome_cache is not None:
+            tls_stats = tls_outcome_cache.get_statistics()
+            print(
+                f'Last {stats_window:.0f}s TLS outcomes: '
+                f'{tls_stats.cached} certificate failure(s) cached, '
+                f'{tls_stats.hits} handshake(s) avoided',
+                file=sys.stderr
+            )
+
+        if worker_tuner is not None:
+            tuner_stats = worker_tuner.get_statistics()
+            open_files = worker_tuner.get_open_files()
+            print(
+                f'Last {stats_window:.0f}s worker tuning: '
+                f'max {worker_tuner.get_max_workers()} worker(s) '
+                f'({tuner_stats.increases} increase(s), {tuner_stats.decreases} decrease(s)), '
+                f'loop lag {worker_tuner.get_loop_lag() * 1000:.0f}ms, '
+                f'{open_files if open_files is not None else "unknown number of"} open file(s)',
+                file=sys.stderr
+            )
+
+        if uniformity_detector is not None:
+            uniformity_stats = uniformity_detector.get_statistics()
+            print(
+                f'Last {stats_window:.0f}s uniform responses: '
+                f'{uniformity_stats.hosts} host batch(es) detected, '
+                f'{uniformity_stats.assumed} url(s) updated without checking, '
+                f'{uniformity_stats.samples} sample(s), '
+                f'{uniformity_stats.mismatches} mismatch(es)',
+                file=sys.stderr
+            )
+
+        if classification_counters := get_classification_counters():
+            print(
+                'Errors since start: ' + ', '.join(
+                    f'{STATUS_NAMES.get(code, code)}: {count}'
+                    for code, count in sorted(classification_counters.items(), key=lambda item: item[1], reverse=True)
+                ),
+                file=sys.stderr
+            )
+
     if SIGINFO_SUPPORTED:
         signal.signal(SIGINFO, print_statistics)
 
-    while True:
-        run_number += 1
-        run_start = time.monotonic()
-
-        print(f'Run #{run_number} started', file=sys.stderr)
+    def dump_host_costs(*args: Any) -> None:
+        if host_costs is not None:
+            host_costs.dump(sys.stderr, options.top_hosts)
 
-        worker_pool.reset_statistics()
+    signal.signal(signal.SIGUSR1, dump_host_costs)
 
-        # process all urls which need processing
-        async for url in iterate_urls_to_recheck(pgpool):
-            await worker_pool.add_url(url)
-            if time.monotonic() - run_start > run_target_duration:
-                break
+    def write_metrics() -> None:
+        if host_costs is None or options.metrics_file is None:
+            return
 
-        if options.single_run:
+        # replaced atomically, so a collector never reads a partial file
+        tmp_path = options.metrics_file + '.tmp'
+        try:
+            with open(tmp_path, 'w') as fd:
+                host_costs.write_metrics(fd, options.top_hosts)
+            os.replace(tmp_path, options.metrics_file)
+        except OSError as e:
+            print(f'Cannot write metrics: {e}', file=sys.stderr)
+
+    in_flight = 0
+    written_before_shutdown = 0
+
+    def begin_shutdown() -> None:
+        nonlocal in_flight, written_before_shutdown
+
+        shutdown.set()
+        written_before_shutdown = updater.get_num_written()
+        in_flight = worker_pool.stop()
+
+    def on_shutdown_signal(signum: int) -> None:
+        if not shutdown.is_set():
+            print(f'Got {signal.Signals(signum).name}, finishing urls in processing (send again to abort them)', file=sys.stderr)
+            begin_shutdown()
+        else:
+            print(f'Got {signal.Signals(signum).name} again, aborting urls in processing', file=sys.stderr)
+            worker_pool.cancel()
+
+    loop = asyncio.get_running_loop()
+    for signum in [signal.SIGTERM, signal.SIGINT]:
+        loop.add_signal_handler(signum, on_shutdown_signal, signum)
+
+    async def finish() -> None:
+        try:
+            await asyncio.wait_for(worker_pool.join(), options.shutdown_timeout)
+        except asyncio.TimeoutError:
+            print(f'Urls in processing did not finish in {options.shutdown_timeout} seconds, aborting them', file=sys.stderr)
+            worker_pool.cancel()
             await worker_pool.join()
-            return
 
-        run_duration = time.monotonic() - run_start
-        if run_duration < run_target_duration:
-            await asyncio.sleep(run_target_duration - run_duration)
+        if options.check_log:
+            await updater.merge_check_log()
+
+        saved = updater.get_num_written() - written_before_shutdown
+        discarded = worker_pool.get_statistics().discarded + max(0, in_flight - saved)
+
+        print(f'Shutdown complete: {saved} url(s) in processing saved, {discarded} url(s) discarded to be picked up by the next start', file=sys.stderr)
+
+        write_metrics()
+
+    async def sleep_unless_shutdown(delay: float) -> None:
+        try:
+            await asyncio.wait_for(shutdown.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def wait_unless_shutdown(coro: Coroutine[Any, Any, None]) -> None:
+        waiters = [asyncio.create_task(coro), asyncio.create_task(shutdown.wait())]
+        _, pending = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in pending:
+            waiter.cancel()
+
+    async def report_statistics() -> None:
+        while True:
+            await asyncio.sleep(stats_window)
+            print_statistics()
+            write_metrics()
+
+            updater.reset_statistics()
+            dns_engine.reset_statistics()
+            if coalescer is not None:
+                coalescer.reset_statistics()
+            if circuit_breaker is not None:
+                circuit_breaker.reset_statistics()
+            if tls_outcome_cache is not None:
+                tls_outcome_cache.reset_statistics()
+            if uniformity_detector is not None:
+                uniformity_detector.reset_statistics()
+            if worker_tuner is not None:
+                worker_tuner.reset_statistics()
+
+    async def merge_check_log() -> None:
+        while not shutdown.is_set():
+            await sleep_unless_shutdown(options.merge_interval)
+            if not shutdown.is_set():
+                await updater.merge_check_log()
+
+    async def feed_url(url: UrlToCheck) -> bool:
+        if updater.is_pending_merge(url.url):
+            return False
+        if url.ipv4_status is not None or url.ipv6_status is not None:
+            updater.set_previous_status(url.url, url.ipv4_status, url.ipv6_status, url.ipv4_last_success, url.ipv4_last_failure)
+        await worker_pool.add_url(url.url, url.priority, url.lag)
+        return True
+
+    async def listen_for_urls() -> None:
+        # new and prioritized links are fed as soon as these are notified
+        # about; host workers still take care of per-host delays
+        while not shutdown.is_set():
+            try:
+                async for notified_urls in iterate_notified_urls(options.dsn, options.listen_channel):
+                    for url in await get_urls_to_check(pgpool, notified_urls):
+                        if await feed_url(url):
+                            notified.add()
+            except (OSError, psycopg2.Error) as e:
+                print(f'Listening for notifications failed, retrying: {e}', file=sys.stderr)
+                await sleep_unless_shutdown(10)
+
+    reporter = asyncio.create_task(report_statistics())
+    listener = asyncio.create_task(listen_for_urls()) if options.listen else None
+    merger = asyncio.create_task(merge_check_log()) if options.check_log else None
+    tuner = asyncio.create_task(worker_tuner.run()) if worker_tuner is not None else None
+
+    last_prefilter = None
+
+    try:
+        while not shutdown.is_set():
+            scan_start = time.monotonic()
+
+            if scheduler is not None:
+                scheduler.prune(time.time())
+
+            # blacklisted and skipped hosts do not need any checking, so
+            # these are updated in bulk before urls are fetched for processing
+            if not options.no_prefilter and (last_prefilter is None or scan_start - last_prefilter >= options.prefilter_interval):
+                prefiltered.add(await updater.update_by_host_rules())
+                last_prefilter = scan_start
+
+            # feed due urls to the workers; add_url() blocks while the
+            # pool is full, which throttles the scan
+            num_scanned = 0
+            async for url in iterate_urls_to_recheck(pgpool, options.priority_share):
+                if await feed_url(url):
+                    num_scanned += 1
+                if shutdown.is_set() or time.monotonic() - scan_start > max_scan_duration:
+                    break
+
+            if shutdown.is_set():
+                break
 
-        print_statistics(finished=True)
+            if options.single_run:
+                # let all fed urls finish, then exit the same way as on
+                # a signal (which may also come in the meantime)
+                await wait_unless_shutdown(worker_pool.join())
+                print_statistics()
+                if not shutdown.is_set():
+                    begin_shutdown()
+                break
+
+            if num_scanned == 0:
+                # nothing is due, no need to poll the database often
+                await sleep_unless_shutdown(options.idle_interval)
+            else:
+                # rescan as soon as workers run low on urls, but not
+                # more often than the interval, as urls still queued
+                # would be returned again
+                await wait_unless_shutdown(worker_pool.wait_for_low_watermark())
+                await sleep_unless_shutdown(scan_start + options.min_scan_interval - time.monotonic())
+
+        if listener is not None:
+            listener.cancel()
+
+        if merger is not None:
+            # final merge is done by finish(), after workers are joined;
+            # a merge in progress is not interrupted
+            await merger
+
+        await finish()
+    finally:
+        reporter.cancel()
+        dns_engine.close()
+        if tuner is not None:
+            tuner.cancel()
+        if listener is not None:
+            listener.cancel()
+        if merger is not None:
+            merger.cancel()
+        if traffic_profile is not None:
+            traffic_profile.close()
+            print(f'Traffic profile with {traffic_profile.get_num_records()} record(s) written to {options.capture_profile}', file=sys.stderr)
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -127,13 +447,59 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument('--hosts', default='./hosts.yaml', help='path to host config file')
 
     parser.add_argument('--timeout', type=int, default=60, help='timeout for each check')
+    parser.add_argument('--connect-timeout', type=float, help='timeout for establishing connection (including TLS handshake)')
+    parser.add_argument('--read-timeout', type=float, help='timeout for reading a portion of data from the server')
+    parser.add_argument('--ipv6-timeout', type=float, help='timeout for each IPv6 check (defaults to --timeout)')
+    parser.add_argument('--ipv6-connect-timeout', type=float, help='timeout for establishing IPv6 connection (defaults to --connect-timeout)')
+    parser.add_argument('--ipv6-read-timeout', type=float, help='timeout for reading a portion of data over IPv6 (defaults to --read-timeout)')
+    parser.add_argument('--ipv6-unreachable-ttl', type=float, default=3600, help='time to consider host unreachable via IPv6 after a timeout (0 to disable)')
+    parser.add_argument('--dns-servers', help='comma separated list of nameservers to rotate queries across (ip or ip:port, system ones by default)')
+    parser.add_argument('--dns-max-in-flight', type=int, default=100, help='maximum number of DNS queries in flight')
+    parser.add_argument('--dns-timeout', type=float, default=5, help='timeout for a single DNS query attempt')
+    parser.add_argument('--dns-tries', type=int, default=3, help='number of attempts for a DNS query failing with timeout or server error, each on next nameserver')
+    parser.add_argument('--happy-eyeballs-delay', type=float, default=0.25, help='delay before trying next address of a host while connecting (0 to try addresses one by one)')
+    parser.add_argument('--tls-outcome-ttl', type=float, default=3600, help='time to reuse certificate verification failure of a host instead of repeating the handshake (0 to disable)')
+    parser.add_argument('--circuit-breaker-threshold', type=int, default=0, help='number of consecutive connection failures after which remaining urls of a host are not checked (0 to disable)')
+    parser.add_argument('--circuit-breaker-cooldown', type=float, default=600, help='time after which a single probe to a cut off host is allowed')
+
+    parser.add_argument('--uniform-host-threshold', type=int, default=0, help='number of first urls of a host batch with identical failure after which only samples of the rest are checked (0 to disable)')
+    parser.add_argument('--uniform-host-sample', type=int, default=10, help='check every Nth url of a host which responds uniformly')
 
     parser.add_argument('--max-workers', type=int, default=100, help='maximum number of parallel workers')
+    parser.add_argument('--auto-workers', action='store_true', help='adjust number of parallel workers between --min-workers and --max-workers depending on load')
+    parser.add_argument('--min-workers', type=int, default=10, help='minimum number of parallel workers with --auto-workers')
+    parser.add_argument('--max-loop-lag', type=float, default=0.1, help='event loop lag above which number of workers is reduced with --auto-workers')
     parser.add_argument('--max-host-queue', type=int, default=100, help='maximum depth of per-host url queue')
+    parser.add_argument('--priority-share', type=float, default=0.5, help='share of scanned urls reserved for priority urls, and of workers while priority urls wait for one')
+    parser.add_argument('--low-watermark', type=int, help='number of running workers below which more urls are fetched (defaults to half of --max-workers)')
+    parser.add_argument('--min-scan-interval', type=float, default=10, help='minimal interval between fetching urls to check')
+    parser.add_argument('--idle-interval', type=float, default=60, help='interval between fetching urls to check when nothing was due')
+    parser.add_argument('--prefilter-interval', type=float, default=60, help='interval between bulk updates of blacklisted and skipped hosts')
+
+    parser.add_argument('--spread-rechecks', action='store_true', help='choose next check times to level out load spikes')
+    parser.add_argument('--spread-bucket', type=float, default=3600, help='time bucket size used for recheck spreading')
+    parser.add_argument('--spread-max-hosts', type=int, default=10000, help='number of most recently checked hostkeys to level out rechecks of individually')
+
+    parser.add_argument('--no-prefilter', action='store_true', help='do not update urls of blacklisted and skipped hosts in bulk, process them one by one instead')
+
+    parser.add_argument('--shutdown-timeout', type=float, default=30, help='time to let urls in processing finish on SIGTERM or SIGINT before aborting them')
+
+    parser.add_argument('--check-log', action='store_true', help='append check results to link_checks table and periodically merge them into links instead of updating links directly')
+    parser.add_argument('--check-log-batch-size', type=int, default=1000, help='number of check results appended to link_checks at once')
+    parser.add_argument('--merge-interval', type=float, default=60, help='interval between merges of link_checks into links')
+
+    parser.add_argument('--listen', action='store_true', help='check urls notified about via LISTEN/NOTIFY right away (see README)')
+    parser.add_argument('--listen-channel', default='links_to_check', help='channel to LISTEN on')
+
+    parser.add_argument('--host-cost-capacity', type=int, default=1000, help='number of most expensive hostkeys to account worker time, delays, requests and results for (0 to disable)')
+    parser.add_argument('--top-hosts', type=int, default=20, help='number of most expensive hostkeys to report on SIGUSR1 and in --metrics-file')
+    parser.add_argument('--metrics-file', metavar='PATH', help='periodically write per-host metrics into given file in Prometheus text format (e.g. for node_exporter textfile collector)')
+    parser.add_argument('--capture-profile', metavar='PATH', help='record anonymized timing and outcome of each request into given file, for benchmarks/replay.py')
 
     parser.add_argument('--single-run', action='store_true', help='exit after single run')
     parser.add_argument('--skip-ipv6', action='store_true', help='skip IPv6 checks')
     parser.add_argument('--satisfy-with-ipv6', action='store_true', help='skip IPv4 checks if IPv6 check passes')
+    parser.add_argument('--coalesce-urls', action='store_true', help='check urls which only differ by trailing slash, default port, fragment or www. prefix once per run')
     parser.add_argument('--strict-ssl', action='store_true', help='stricter SSL requirements (require TLS1.2 support)')
 
     return parser.parse_args()
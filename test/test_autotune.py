@@ -0,0 +1,127 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import unittest
+
+from linkchecker.autotune import WorkerTuner
+from linkchecker.hostmanager import HostManager
+from linkchecker.processor.dummy import DummyUrlProcessor
+from linkchecker.updater import UrlUpdater
+from linkchecker.worker import HostWorkerPool, WorkerPoolStatistics
+
+import yaml
+
+
+class _BusyPool:
+    # always has as many workers as allowed
+    def __init__(self):
+        self.max_workers = 0
+
+    def set_max_workers(self, max_workers):
+        self.max_workers = max_workers
+
+    def get_statistics(self):
+        stats = WorkerPoolStatistics()
+        stats.workers = self.max_workers
+        return stats
+
+
+class _SteadyUpdater:
+    # urls are written one by one at a steady rate of 1000/s
+    def get_num_written(self):
+        return int(asyncio.get_running_loop().time() * 1000)
+
+
+class TestWorkerTuner(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        host_manager = HostManager(yaml.safe_load('defaults: {delay: 0, recheck: 1d-2d, priority_recheck: 1d-2d}\nhosts: {}'))
+        self.updater = UrlUpdater(None, host_manager)
+        self.pool = HostWorkerPool(DummyUrlProcessor(self.updater), host_manager)
+
+    async def test_increase_while_saturated(self):
+        tuner = WorkerTuner(self.pool, self.updater, min_workers=10, max_workers=25, window=10, step=10)
+
+        self.assertEqual(tuner.adjust(loop_lag=0.01, open_files=100, throughput=10, saturated=True), 20)
+        self.assertEqual(tuner.adjust(loop_lag=0.01, open_files=100, throughput=20, saturated=True), 25)
+        self.assertEqual(tuner.adjust(loop_lag=0.01, open_files=100, throughput=30, saturated=True), 25)
+        self.assertEqual(tuner.get_statistics().increases, 2)
+
+    async def test_no_increase_when_not_saturated(self):
+        tuner = WorkerTuner(self.pool, self.updater, min_workers=10, max_workers=100, window=10)
+
+        self.assertEqual(tuner.adjust(loop_lag=0.01, open_files=100, throughput=10, saturated=False), 10)
+
+    async def test_decrease_on_loop_lag(self):
+        tuner = WorkerTuner(self.pool, self.updater, min_workers=10, max_workers=100, max_loop_lag=0.1, window=10, step=30, decrease_factor=0.5)
+
+        tuner.adjust(loop_lag=0.01, open_files=100, throughput=10, saturated=True)
+        self.assertEqual(tuner.get_max_workers(), 40)
+
+        self.assertEqual(tuner.adjust(loop_lag=0.5, open_files=100, throughput=10, saturated=True), 20)
+        self.assertEqual(tuner.adjust(loop_lag=0.5, open_files=100, throughput=10, saturated=True), 10)
+        self.assertEqual(tuner.adjust(loop_lag=0.5, open_files=100, throughput=10, saturated=True), 10)
+
+    async def test_decrease_on_open_files(self):
+        tuner = WorkerTuner(self.pool, self.updater, min_workers=10, max_workers=100, window=10, step=30, decrease_factor=0.5)
+
+        tuner.adjust(loop_lag=0.01, open_files=100, throughput=10, saturated=True)
+        self.assertEqual(tuner.adjust(loop_lag=0.01, open_files=10 ** 9, throughput=10, saturated=True), 20)
+
+    async def test_step_back_if_throughput_drops(self):
+        tuner = WorkerTuner(self.pool, self.updater, min_workers=10, max_workers=100, window=10, step=10)
+
+        tuner.adjust(loop_lag=0.01, open_files=100, throughput=10, saturated=True)
+        self.assertEqual(tuner.adjust(loop_lag=0.01, open_files=100, throughput=5, saturated=True), 10)
+        self.assertEqual(tuner.get_statistics().decreases, 1)
+
+    async def test_changes_judged_after_full_window(self):
+        tuner = WorkerTuner(self.pool, self.updater, min_workers=10, max_workers=100, interval=10, window=30, step=10)
+
+        # no change until a full window of measurements is collected
+        self.assertEqual(tuner.adjust(loop_lag=0.01, open_files=100, throughput=10, saturated=True), 10)
+        self.assertEqual(tuner.adjust(loop_lag=0.01, open_files=100, throughput=12, saturated=True), 10)
+        self.assertEqual(tuner.adjust(loop_lag=0.01, open_files=100, throughput=8, saturated=True), 20)
+
+        # a single bad interval after the increase is not judged upon
+        self.assertEqual(tuner.adjust(loop_lag=0.01, open_files=100, throughput=2, saturated=True), 20)
+        self.assertEqual(tuner.adjust(loop_lag=0.01, open_files=100, throughput=14, saturated=True), 20)
+        self.assertEqual(tuner.adjust(loop_lag=0.01, open_files=100, throughput=14, saturated=True), 30)
+
+        # but a worse window is
+        for throughput in [5, 5]:
+            self.assertEqual(tuner.adjust(loop_lag=0.01, open_files=100, throughput=throughput, saturated=True), 30)
+        self.assertEqual(tuner.adjust(loop_lag=0.01, open_files=100, throughput=5, saturated=True), 20)
+
+        # overload is reacted upon right away
+        self.assertEqual(tuner.adjust(loop_lag=0.5, open_files=100, throughput=5, saturated=True), 15)
+
+    async def test_no_step_back_on_steady_throughput(self):
+        pool = _BusyPool()
+        tuner = WorkerTuner(pool, _SteadyUpdater(), min_workers=10, max_workers=1000, interval=0.05, window=0.15, step=10)
+
+        task = asyncio.create_task(tuner.run())
+        await asyncio.sleep(1)
+        task.cancel()
+
+        self.assertGreater(tuner.get_statistics().increases, 1)
+        self.assertEqual(tuner.get_statistics().decreases, 0)
+        self.assertEqual(pool.max_workers, tuner.get_max_workers())
+
+
+if __name__ == '__main__':
+    unittest.main()
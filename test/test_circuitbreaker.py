@@ -0,0 +1,79 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from unittest import mock
+
+from linkchecker.circuitbreaker import CircuitBreaker
+from linkchecker.status import ExtendedStatusCodes, UrlStatus
+
+
+REFUSED = UrlStatus(False, ExtendedStatusCodes.CONNECTION_REFUSED)
+NOT_FOUND = UrlStatus(False, 404)
+OK = UrlStatus(True, 200)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(threshold=3, cooldown=60)
+
+        for _ in range(2):
+            self.assertIsNone(breaker.get_short_circuit_status('example.com'))
+            breaker.record('example.com', REFUSED)
+
+        self.assertIsNone(breaker.get_short_circuit_status('example.com'))
+        breaker.record('example.com', REFUSED)
+
+        status = breaker.get_short_circuit_status('example.com')
+        self.assertIsNotNone(status)
+        self.assertEqual(status.status_code, ExtendedStatusCodes.CONNECTION_REFUSED)
+
+        self.assertIsNone(breaker.get_short_circuit_status('other.com'))
+
+    def test_non_connection_failures_reset(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=60)
+
+        breaker.record('example.com', REFUSED)
+        breaker.record('example.com', NOT_FOUND)
+        breaker.record('example.com', REFUSED)
+
+        self.assertIsNone(breaker.get_short_circuit_status('example.com'))
+
+    def test_half_open_probe(self):
+        breaker = CircuitBreaker(threshold=1, cooldown=60)
+
+        with mock.patch('time.monotonic', return_value=1000.0):
+            breaker.record('example.com', REFUSED)
+            self.assertIsNotNone(breaker.get_short_circuit_status('example.com'))
+
+        with mock.patch('time.monotonic', return_value=1061.0):
+            # probe allowed, fails, circuit reopens
+            self.assertIsNone(breaker.get_short_circuit_status('example.com'))
+            breaker.record('example.com', REFUSED)
+            self.assertIsNotNone(breaker.get_short_circuit_status('example.com'))
+
+        with mock.patch('time.monotonic', return_value=1122.0):
+            # probe allowed, succeeds, circuit closes
+            self.assertIsNone(breaker.get_short_circuit_status('example.com'))
+            breaker.record('example.com', OK)
+            self.assertIsNone(breaker.get_short_circuit_status('example.com'))
+
+        self.assertEqual(breaker.get_statistics().probes, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from linkchecker.coalescer import UrlCoalescer, canonicalize_url
+from linkchecker.status import UrlStatus
+
+
+class TestCoalescer(unittest.TestCase):
+    def test_canonicalize_url(self):
+        self.assertEqual(canonicalize_url('http://example.com/foo'), 'http://example.com/foo')
+        self.assertEqual(canonicalize_url('http://example.com/foo/'), 'http://example.com/foo')
+        self.assertEqual(canonicalize_url('http://www.example.com/foo'), 'http://example.com/foo')
+        self.assertEqual(canonicalize_url('http://example.com:80/foo'), 'http://example.com/foo')
+        self.assertEqual(canonicalize_url('https://example.com:443/foo'), 'https://example.com/foo')
+        self.assertEqual(canonicalize_url('http://example.com/foo#bar'), 'http://example.com/foo')
+        self.assertEqual(canonicalize_url('http://example.com'), canonicalize_url('http://example.com/'))
+
+        self.assertEqual(canonicalize_url('http://example.com:8080/foo'), 'http://example.com:8080/foo')
+        self.assertEqual(canonicalize_url('https://example.com/foo'), 'https://example.com/foo')
+        self.assertEqual(canonicalize_url('http://example.com/foo?a=b'), 'http://example.com/foo?a=b')
+        self.assertEqual(canonicalize_url('http://user@example.com/foo'), 'http://user@example.com/foo')
+        self.assertEqual(canonicalize_url('http://.:.:`\\.:.'), 'http://.:.:`\\.:.')
+
+    def test_group(self):
+        coalescer = UrlCoalescer()
+
+        groups = coalescer.group([
+            'http://example.com/foo',
+            'http://example.com/bar',
+            'http://www.example.com/foo/',
+        ])
+
+        self.assertEqual(groups, [
+            ('http://example.com/foo', ['http://example.com/foo', 'http://www.example.com/foo/']),
+            ('http://example.com/bar', ['http://example.com/bar']),
+        ])
+
+    def test_results(self):
+        coalescer = UrlCoalescer()
+        coalescer.group(['http://example.com/foo', 'http://www.example.com/foo'])
+
+        self.assertIsNone(coalescer.get('http://example.com/foo'))
+
+        coalescer.put('http://example.com/foo', UrlStatus(True, 200), None)
+
+        ipv4_status, ipv6_status = coalescer.get('http://example.com/foo')
+        self.assertEqual(ipv4_status.status_code, 200)
+        self.assertIsNone(ipv6_status)
+
+        self.assertEqual(coalescer.get_statistics().ratio, 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import socket
+import struct
+import unittest
+from typing import Any, List, Tuple
+
+import aiodns
+
+from linkchecker.dnsengine import DnsEngine
+
+
+class _StubDnsServer(asyncio.DatagramProtocol):
+    # answers A queries for any name with 192.0.2.1, except for
+    # names starting with "fail" (SERVFAIL) or "slow" (no answer)
+    _transport: Any
+    fail_all: bool
+    queries: List[Tuple[str, int]]
+
+    def __init__(self, fail_all: bool = False) -> None:
+        self.fail_all = fail_all
+        self.queries = []
+
+    def connection_made(self, transport: Any) -> None:
+        self._transport = transport
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        query_id = struct.unpack('!H', data[:2])[0]
+
+        labels = []
+        pos = 12
+        while data[pos]:
+            labels.append(data[pos + 1:pos + 1 + data[pos]].decode())
+            pos += 1 + data[pos]
+        query_type = struct.unpack('!H', data[pos + 1:pos + 3])[0]
+        question = data[12:pos + 5]
+        name = '.'.join(labels)
+
+        self.queries.append((name, query_type))
+
+        if name.startswith('slow'):
+            return
+
+        rcode = 0
+        answers = b''
+        if self.fail_all or name.startswith('fail'):
+            rcode = 2
+        elif query_type == 1:
+            answers = struct.pack('!HHHIH', 0xc00c, 1, 1, 60, 4) + socket.inet_aton('192.0.2.1')
+
+        self._transport.sendto(struct.pack('!HHHHHH', query_id, 0x8180 | rcode, 1, 1 if answers else 0, 0, 0) + question + answers, addr)
+
+
+class TestDnsEngine(unittest.IsolatedAsyncioTestCase):
+    async def _start_server(self, fail_all: bool = False) -> Tuple[str, _StubDnsServer]:
+        transport, server = await asyncio.get_running_loop().create_datagram_endpoint(lambda: _StubDnsServer(fail_all), local_addr=('127.0.0.1', 0))
+        self.addCleanup(transport.close)
+        return f'127.0.0.1:{transport.get_extra_info("sockname")[1]}', server
+
+    async def test_resolve(self):
+        nameserver, server = await self._start_server()
+        engine = DnsEngine([nameserver], timeout=0.5)
+
+        self.assertEqual(await engine.gethostbyname('example.test', socket.AF_INET), ['192.0.2.1'])
+        engine.close()
+
+    async def test_no_retry_on_permanent_error(self):
+        nameserver, server = await self._start_server()
+        engine = DnsEngine([nameserver], timeout=0.5)
+
+        with self.assertRaises(aiodns.error.DNSError):
+            await engine.gethostbyname('example.test', socket.AF_INET6)  # no data
+
+        self.assertEqual(len(server.queries), 1)
+        engine.close()
+
+    async def test_retry_rotates_nameservers(self):
+        failing_nameserver, failing_server = await self._start_server(fail_all=True)
+        nameserver, server = await self._start_server()
+        engine = DnsEngine([failing_nameserver, nameserver], timeout=0.5, tries=2)
+
+        self.assertEqual(await engine.gethostbyname('example.test', socket.AF_INET), ['192.0.2.1'])
+        self.assertEqual(len(failing_server.queries), 1)
+        self.assertEqual(len(server.queries), 1)
+        self.assertEqual(engine.get_statistics().retries, 1)
+        engine.close()
+
+    async def test_tries_are_limited(self):
+        nameserver, server = await self._start_server()
+        engine = DnsEngine([nameserver], timeout=0.5, tries=3)
+
+        with self.assertRaises(aiodns.error.DNSError):
+            await engine.gethostbyname('fail.test', socket.AF_INET)
+
+        self.assertEqual(len(server.queries), 3)
+        engine.close()
+
+    async def test_coalescing(self):
+        nameserver, server = await self._start_server()
+        engine = DnsEngine([nameserver], timeout=0.5)
+
+        results = await asyncio.gather(*(engine.gethostbyname('example.test', socket.AF_INET) for _ in range(3)))
+
+        self.assertEqual(results, [['192.0.2.1']] * 3)
+        self.assertEqual(len(server.queries), 1)
+        self.assertEqual(engine.get_statistics().coalesced, 2)
+        engine.close()
+
+    async def test_in_flight_limit(self):
+        nameserver, server = await self._start_server()
+        engine = DnsEngine([nameserver], max_in_flight=1, timeout=0.2, tries=1)
+
+        tasks = [asyncio.create_task(engine.gethostbyname(f'slow{n}.test', socket.AF_INET)) for n in range(3)]
+        await asyncio.sleep(0.1)
+
+        # only the first query was sent yet
+        self.assertEqual(len(server.queries), 1)
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertEqual(len(server.queries), 3)
+        engine.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import errno
+import io
+import unittest
+from unittest import mock
+
+from linkchecker.exceptions import classify_exception, get_classification_counters
+from linkchecker.status import ExtendedStatusCodes
+
+
+class _UnknownError(Exception):
+    pass
+
+
+class TestClassifyException(unittest.TestCase):
+    def test_known(self):
+        self.assertEqual(classify_exception(ConnectionRefusedError(errno.ECONNREFUSED, 'Connection refused'), 'http://example.com/'), ExtendedStatusCodes.CONNECTION_REFUSED)
+        self.assertEqual(classify_exception(ConnectionResetError(), 'http://example.com/'), ExtendedStatusCodes.CONNECTION_RESET_BY_PEER)
+        self.assertEqual(classify_exception(OSError(errno.EINVAL, 'Invalid argument'), 'http://example.com/'), ExtendedStatusCodes.DNS_IPV4_MAPPED_IN_AAAA)
+        self.assertEqual(classify_exception(ValueError('URL should be absolute'), 'http://example.com/'), ExtendedStatusCodes.INVALID_URL)
+        self.assertEqual(classify_exception(TimeoutError(), 'http://example.com/'), ExtendedStatusCodes.TIMEOUT)
+
+    def test_cause(self):
+        try:
+            try:
+                raise OSError(errno.EHOSTUNREACH, 'No route to host')
+            except OSError as e:
+                raise _UnknownError() from e
+        except _UnknownError as e:
+            self.assertEqual(classify_exception(e, 'http://example.com/'), ExtendedStatusCodes.HOST_UNREACHABLE)
+
+    def test_unknown(self):
+        counters_before = get_classification_counters().get(ExtendedStatusCodes.UNKNOWN_ERROR, 0)
+
+        with mock.patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            self.assertEqual(classify_exception(_UnknownError('foo'), 'http://example.com/'), ExtendedStatusCodes.UNKNOWN_ERROR)
+            self.assertEqual(classify_exception(_UnknownError('bar'), 'http://example.com/'), ExtendedStatusCodes.UNKNOWN_ERROR)
+
+        # same signature is only reported once
+        self.assertEqual(stderr.getvalue().count('Cannot classify error'), 1)
+        self.assertEqual(get_classification_counters()[ExtendedStatusCodes.UNKNOWN_ERROR], counters_before + 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import unittest
+from typing import Dict, List, Tuple
+
+import yaml
+
+from linkchecker.hostmanager import HostManager
+from linkchecker.processor.ftp import FtpUrlProcessor
+from linkchecker.status import ExtendedStatusCodes, UrlStatus
+
+
+class _FakeUrlUpdater:
+    statuses: Dict[str, UrlStatus | None]
+
+    def __init__(self) -> None:
+        self.statuses = {}
+
+    async def update(self, url: str, ipv4_status: UrlStatus | None, ipv6_status: UrlStatus | None, check_duration: float | None = None) -> None:
+        self.statuses[url] = ipv4_status
+
+
+class _FtpServer:
+    files: List[str] = ['/pub/file.tar.gz']
+    directories: List[str] = ['/', '/pub', '/pub/']
+
+    connections: int
+    commands: List[str]
+
+    def __init__(self) -> None:
+        self.connections = 0
+        self.commands = []
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+
+        writer.write(b'220-Welcome\r\n220 Test FTP server\r\n')
+
+        while line := await reader.readline():
+            command, _, argument = line.decode().rstrip('\r\n').partition(' ')
+            self.commands.append(command)
+
+            if command == 'USER':
+                writer.write(b'331 Password required\r\n')
+            elif command == 'PASS':
+                writer.write(b'230 Logged in\r\n')
+            elif command == 'TYPE':
+                writer.write(b'200 Type set\r\n')
+            elif command == 'SIZE' and argument in self.files:
+                writer.write(b'213 1234\r\n')
+            elif command == 'CWD' and argument in self.directories:
+                writer.write(b'250 Directory changed\r\n')
+            elif command == 'QUIT':
+                writer.write(b'221 Bye\r\n')
+                break
+            else:
+                writer.write(b'550 No such file or directory\r\n')
+
+        writer.close()
+
+    async def start(self) -> Tuple[asyncio.AbstractServer, int]:
+        server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        return server, server.sockets[0].getsockname()[1]
+
+
+class TestFtpUrlProcessor(unittest.IsolatedAsyncioTestCase):
+    async def test_process_urls(self):
+        ftp_server = _FtpServer()
+        server, port = await ftp_server.start()
+
+        host_manager = HostManager(yaml.safe_load('defaults: {delay: 0, recheck: 1d-2d, priority_recheck: 1d-2d}\nhosts: {}'))
+        updater = _FakeUrlUpdater()
+        processor = FtpUrlProcessor(updater, host_manager, timeout=5)
+
+        async with server:
+            await processor.process_urls([
+                f'ftp://127.0.0.1:{port}/pub/file.tar.gz',
+                f'ftp://127.0.0.1:{port}/pub/',
+                f'ftp://127.0.0.1:{port}/pub',
+                f'ftp://127.0.0.1:{port}/pub/nonexistent.tar.gz',
+            ])
+
+        self.assertEqual(
+            {url.rsplit('/', 1)[-1] or 'dir': (status.success, status.status_code) for url, status in updater.statuses.items()},
+            {
+                'file.tar.gz': (True, 200),
+                'dir': (True, 200),
+                'pub': (True, 200),
+                'nonexistent.tar.gz': (False, 404),
+            }
+        )
+
+        # single control connection is reused for the whole batch
+        self.assertEqual(ftp_server.connections, 1)
+        self.assertEqual(ftp_server.commands.count('USER'), 1)
+
+    async def test_connection_refused(self):
+        ftp_server = _FtpServer()
+        server, port = await ftp_server.start()
+        server.close()
+        await server.wait_closed()
+
+        host_manager = HostManager(yaml.safe_load('defaults: {delay: 0, recheck: 1d-2d, priority_recheck: 1d-2d}\nhosts: {}'))
+        updater = _FakeUrlUpdater()
+        processor = FtpUrlProcessor(updater, host_manager, timeout=5)
+
+        await processor.process_urls([f'ftp://127.0.0.1:{port}/pub/file.tar.gz'])
+
+        self.assertFalse(updater.statuses[f'ftp://127.0.0.1:{port}/pub/file.tar.gz'].success)
+
+    async def test_line_breaks_in_url(self):
+        ftp_server = _FtpServer()
+        server, port = await ftp_server.start()
+
+        host_manager = HostManager(yaml.safe_load('defaults: {delay: 0, recheck: 1d-2d, priority_recheck: 1d-2d}\nhosts: {}'))
+        updater = _FakeUrlUpdater()
+        processor = FtpUrlProcessor(updater, host_manager, timeout=5)
+
+        async with server:
+            await processor.process_urls([
+                f'ftp://127.0.0.1:{port}/pub/file.tar.gz%0d%0aDELE%20/pub/file.tar.gz',
+                f'ftp://user%0d%0aDELE%20x@127.0.0.1:{port}/pub/file.tar.gz',
+                f'ftp://127.0.0.1:{port}/pub/file.tar.gz',
+            ])
+
+        self.assertEqual(
+            [(status.success, status.status_code) for status in updater.statuses.values()],
+            [(False, ExtendedStatusCodes.INVALID_URL), (False, ExtendedStatusCodes.INVALID_URL), (True, 200)]
+        )
+        self.assertNotIn('DELE', ftp_server.commands)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import unittest
+
+from linkchecker.hostcost import HostCostAccounting
+from linkchecker.status import ExtendedStatusCodes, UrlStatus
+
+
+class TestHostCostAccounting(unittest.TestCase):
+    def test_accounting(self):
+        costs = HostCostAccounting()
+
+        costs.add_worker_time('example.com', 10)
+        costs.add_sleep('example.com', 3)
+        costs.add_requests('example.com', 2, 1000)
+        costs.add_result('example.com', UrlStatus(True, 200))
+        costs.add_result('example.com', UrlStatus(False, ExtendedStatusCodes.TIMEOUT))
+        costs.add_result('example.com', UrlStatus(False, ExtendedStatusCodes.DNS_DOMAIN_NOT_FOUND))
+
+        [(hostkey, cost)] = costs.get_top(10)
+        self.assertEqual(hostkey, 'example.com')
+        self.assertEqual(cost.worker_seconds, 10)
+        self.assertEqual(cost.sleep_seconds, 3)
+        self.assertEqual(cost.requests, 2)
+        self.assertEqual(cost.content_bytes, 1000)
+        self.assertEqual(cost.timeouts, 1)
+        self.assertEqual(dict(cost.results), {'success': 1, 'timeout': 1, 'dns_error': 1})
+
+    def test_heavy_hitters_survive(self):
+        costs = HostCostAccounting(capacity=3)
+
+        for n in range(100):
+            costs.add_worker_time('heavy.com', 10)
+            costs.add_worker_time(f'host{n}.com', 1)
+
+        top = costs.get_top(3)
+        self.assertEqual(len(top), 3)
+        self.assertEqual(top[0][0], 'heavy.com')
+        self.assertEqual(top[0][1].worker_seconds, 1000)
+        self.assertEqual(top[0][1].error, 0)
+
+        # newcomers inherit worker time of evicted hosts as an error bound
+        self.assertGreater(top[1][1].error, 0)
+
+    def test_pinned_survive(self):
+        costs = HostCostAccounting(capacity=3)
+
+        # a long running batch only adds its worker time when finished
+        costs.pin('slow.com')
+        for n in range(100):
+            costs.add_sleep('slow.com', 60)
+            costs.add_requests('slow.com')
+            costs.add_worker_time(f'host{n}.com', 1)
+        costs.add_worker_time('slow.com', 6000)
+        costs.unpin('slow.com')
+
+        top = costs.get_top(1)
+        self.assertEqual(top[0][0], 'slow.com')
+        self.assertEqual(top[0][1].sleep_seconds, 6000)
+        self.assertEqual(top[0][1].requests, 100)
+
+        # not pinned anymore
+        costs.pin('other.com')
+        costs.add_worker_time('another.com', 1)
+        self.assertEqual(len(costs.get_top(10)), 3)
+
+    def test_metrics(self):
+        costs = HostCostAccounting()
+        costs.add_worker_time('exa"mple.com', 10)
+        costs.add_result('exa"mple.com', UrlStatus(False, 404))
+
+        out = io.StringIO()
+        costs.write_metrics(out, 10)
+
+        self.assertIn('# TYPE repology_linkchecker_host_worker_seconds gauge\n', out.getvalue())
+        self.assertIn('repology_linkchecker_host_worker_seconds{hostkey="exa\\"mple.com"} 10\n', out.getvalue())
+        self.assertIn('repology_linkchecker_host_results{hostkey="exa\\"mple.com",class="http_error"} 1\n', out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -31,6 +31,8 @@ class TestHostManager(unittest.TestCase):
         HostManager(yaml.safe_load(defaults + 'hosts: {example.com: {aggregate: true}}'))
         HostManager(yaml.safe_load(defaults + 'hosts: {example.com: {delay: 10}}'))
         HostManager(yaml.safe_load(defaults + 'hosts: {example.com: {recheck: 1d-2d}}'))
+        HostManager(yaml.safe_load(defaults + 'hosts: {example.com: {timeout: 10, ipv6_connect_timeout: 5}}'))
+        HostManager(yaml.safe_load(defaults + 'hosts: {example.com: {stable_recheck: 30d-60d, stable_after: 180d, confirm_recheck: 1d-2d}}'))
 
     def test_get_parent_host(self):
         self.assertEqual(_get_parent_host('foo.bar.example.com'), 'bar.example.com')
@@ -108,6 +110,45 @@ class TestHostManager(unittest.TestCase):
         self.assertEqual(hm.get_host_status('http://child.redefined.blacklist.com/foo'), HostStatus.OK)
         self.assertEqual(hm.get_host_status('http://other.com/foo'), HostStatus.OK)
 
+    def test_timeouts(self):
+        hm = HostManager(
+            yaml.safe_load("""
+                defaults: {delay: 5, recheck: 1-2, priority_recheck: 1-2}
+
+                hosts:
+                  timeout.com: {timeout: 10, connect_timeout: 5}
+                  ipv6.timeout.com: {ipv6_timeout: 3, ipv6_read_timeout: 2}
+            """)
+        )
+
+        self.assertEqual(hm.get_timeouts('http://other.com/foo'), (None, None, None))
+        self.assertEqual(hm.get_timeouts('http://other.com/foo', ipv6=True), (None, None, None))
+        self.assertEqual(hm.get_timeouts('http://timeout.com/foo'), (10, 5, None))
+        self.assertEqual(hm.get_timeouts('http://timeout.com/foo', ipv6=True), (10, 5, None))
+        self.assertEqual(hm.get_timeouts('http://ipv6.timeout.com/foo'), (10, 5, None))
+        self.assertEqual(hm.get_timeouts('http://ipv6.timeout.com/foo', ipv6=True), (3, 5, 2))
+
+    def test_host_rules(self):
+        hm = HostManager(
+            yaml.safe_load("""
+                defaults: {delay: 5, recheck: 1-2, priority_recheck: 1-2}
+
+                hosts:
+                  other.com: {delay: 10}
+                  blacklist.com: {blacklist: true, recheck: 3-4}
+                  redefined.blacklist.com: {blacklist: false}
+                  skip.com: {skip: true}
+            """)
+        )
+
+        self.assertEqual(
+            sorted(hm.get_host_rules()),
+            [
+                ('blacklist.com', HostStatus.BLACKLISTED, (3, 4), (1, 2)),
+                ('redefined.blacklist.com', HostStatus.OK, (3, 4), (1, 2)),
+                ('skip.com', HostStatus.SKIPPED, (1, 2), (1, 2)),
+            ]
+        )
 
     def test_hostkey(self):
         hm = HostManager(yaml.safe_load('defaults: {delay: 5, recheck: 1d-2d, priority_recheck: 1d-2d}\nhosts: {sf.net: {aggregate: true}}'))
@@ -0,0 +1,143 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import errno
+import socket
+import ssl
+import unittest
+from typing import Any, Tuple
+
+import aiohttp
+from aiohttp import web
+from aiohttp.client_reqrep import ConnectionKey
+
+import yaml
+
+from linkchecker.hostcost import HostCostAccounting
+from linkchecker.hostmanager import HostManager
+from linkchecker.processor.http import HttpUrlProcessor, _make_connection_trace_config
+from linkchecker.status import ExtendedStatusCodes
+from linkchecker.tls import TlsOutcomeCache
+
+
+class _FailingSession:
+    _error: Exception
+
+    def __init__(self, error: Exception) -> None:
+        self._error = error
+
+    def head(self, url: str, **kwargs: Any) -> Any:
+        raise self._error
+
+
+def _make_certificate_error(host: str, port: int) -> aiohttp.ClientConnectorCertificateError:
+    certificate_error = ssl.SSLCertVerificationError(1, 'certificate verify failed: certificate has expired')
+    certificate_error.verify_code = 10  # X509_V_ERR_CERT_HAS_EXPIRED
+    return aiohttp.ClientConnectorCertificateError(ConnectionKey(host, port, True, True, None, None, None), certificate_error)
+
+
+class _HangingConnector(aiohttp.TCPConnector):
+    async def _create_connection(self, *args: Any, **kwargs: Any) -> Any:
+        await asyncio.sleep(60)
+
+
+async def _start_server(app: web.Application) -> Tuple[web.AppRunner, int]:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, runner.addresses[0][1]
+
+
+class TestHttpUrlProcessor(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.host_manager = HostManager(yaml.safe_load('defaults: {delay: 0, recheck: 1d-2d, priority_recheck: 1d-2d}\nhosts: {}'))
+
+    async def test_ipv6_read_timeout_does_not_mark_unreachable(self):
+        async def slow(request: web.Request) -> web.Response:
+            await asyncio.sleep(1)
+            return web.Response()
+
+        app = web.Application()
+        app.router.add_route('*', '/', slow)
+        runner, port = await _start_server(app)
+
+        processor = HttpUrlProcessor(None, self.host_manager, timeout=5, ipv6_read_timeout=0.2, ipv6_unreachable_ttl=3600)
+
+        try:
+            async with aiohttp.ClientSession(trace_configs=[_make_connection_trace_config()]) as session:
+                status = await processor._check_url_guarded(f'http://127.0.0.1:{port}/', 'example.com', socket.AF_INET6, session)
+        finally:
+            await runner.cleanup()
+
+        self.assertEqual(status.status_code, ExtendedStatusCodes.TIMEOUT)
+        self.assertFalse(processor._is_ipv6_unreachable('example.com'))
+
+    async def test_ipv6_connect_timeout_marks_unreachable(self):
+        processor = HttpUrlProcessor(None, self.host_manager, timeout=5, ipv6_connect_timeout=0.2, ipv6_unreachable_ttl=3600)
+
+        async with aiohttp.ClientSession(connector=_HangingConnector(), trace_configs=[_make_connection_trace_config()]) as session:
+            status = await processor._check_url_guarded('http://127.0.0.1:1/', 'example.com', socket.AF_INET6, session)
+
+        self.assertEqual(status.status_code, ExtendedStatusCodes.TIMEOUT)
+        self.assertTrue(processor._is_ipv6_unreachable('example.com'))
+
+    async def test_certificate_failure_of_redirect_target(self):
+        tls_outcome_cache = TlsOutcomeCache(ttl=3600)
+        processor = HttpUrlProcessor(None, self.host_manager, timeout=5, tls_outcome_cache=tls_outcome_cache)
+
+        # origin redirects to a host with expired certificate
+        session = _FailingSession(_make_certificate_error('cdn.example.net', 443))
+        status = await processor._check_url_guarded('https://example.com/file.tar.gz', 'example.com', socket.AF_INET, session)
+
+        self.assertEqual(status.status_code, ExtendedStatusCodes.SSL_CERTIFICATE_HAS_EXPIRED)
+        self.assertIsNone(tls_outcome_cache.get(('example.com', 443, socket.AF_INET)))
+        self.assertIsNotNone(tls_outcome_cache.get(('cdn.example.net', 443, socket.AF_INET)))
+
+        # other urls of the origin are still checked
+        session = _FailingSession(ConnectionRefusedError(errno.ECONNREFUSED, 'Connection refused'))
+        status = await processor._check_url_guarded('https://example.com/other.tar.gz', 'example.com', socket.AF_INET, session)
+        self.assertEqual(status.status_code, ExtendedStatusCodes.CONNECTION_REFUSED)
+
+    async def test_content_length_accounted(self):
+        async def handler(request: web.Request) -> web.Response:
+            if request.method == 'HEAD':
+                return web.Response(status=405)
+            return web.Response(body=b'x' * 1000)
+
+        app = web.Application()
+        app.router.add_route('*', '/', handler)
+        runner, port = await _start_server(app)
+
+        host_costs = HostCostAccounting()
+        processor = HttpUrlProcessor(None, self.host_manager, timeout=5, host_costs=host_costs)
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                status = await processor._check_url(f'http://127.0.0.1:{port}/', '127.0.0.1', socket.AF_INET, session)
+        finally:
+            await runner.cleanup()
+
+        self.assertTrue(status.success)
+        [(hostkey, cost)] = host_costs.get_top(1)
+        self.assertEqual(cost.requests, 2)
+        self.assertEqual(cost.content_bytes, 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import socket
+import unittest
+
+from linkchecker.resolver import MultiDnsStatus, PrecachedAsyncResolver, SingleDnsStatus
+
+
+class TestPrecachedAsyncResolver(unittest.IsolatedAsyncioTestCase):
+    async def test_preferred_address_goes_first(self):
+        resolver = PrecachedAsyncResolver({('example.com', socket.AF_INET): '192.0.2.2'})
+        resolver._statuses['example.com'] = MultiDnsStatus(
+            SingleDnsStatus(socket.AF_INET, ['192.0.2.1', '192.0.2.2', '192.0.2.3']),
+            SingleDnsStatus(socket.AF_INET6, ['2001:db8::1', '2001:db8::2']),
+        )
+
+        self.assertEqual([r['host'] for r in await resolver.resolve('example.com', 80, socket.AF_INET)], ['192.0.2.2', '192.0.2.1', '192.0.2.3'])
+        self.assertEqual([r['host'] for r in await resolver.resolve('example.com', 80, socket.AF_INET6)], ['2001:db8::1', '2001:db8::2'])
+
+        await resolver.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from linkchecker.rolling import RollingCounter
+
+
+class TestRollingCounter(unittest.TestCase):
+    def test_sum_and_max(self):
+        counter = RollingCounter(window=60, buckets=6)
+        counter.add(1, now=0)
+        counter.add(5, now=15)
+        counter.add(2, now=15)
+
+        self.assertEqual(counter.get_sum(now=15), 8)
+        self.assertEqual(counter.get_max(now=15), 5)
+
+    def test_expiration(self):
+        counter = RollingCounter(window=60, buckets=6)
+        counter.add(1, now=0)
+        counter.add(5, now=15)
+
+        self.assertEqual(counter.get_sum(now=65), 5)
+        self.assertEqual(counter.get_sum(now=80), 0)
+        self.assertEqual(counter.get_max(now=80), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
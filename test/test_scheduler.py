@@ -0,0 +1,71 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from linkchecker.scheduler import RecheckScheduler
+
+
+class TestRecheckScheduler(unittest.TestCase):
+    def test_within_range(self):
+        scheduler = RecheckScheduler(bucket_size=10)
+
+        for _ in range(1000):
+            recheck = scheduler.pick('example.com', 0, 100, 200)
+            self.assertGreaterEqual(recheck, 100)
+            self.assertLessEqual(recheck, 200)
+
+    def test_avoids_busy_buckets(self):
+        scheduler = RecheckScheduler(bucket_size=10, candidates=8)
+        scheduler.preload([(100, 1000), (110, 1000), (120, 1000), (130, 1000)])
+
+        rechecks = [scheduler.pick('example.com', 0, 100, 200) for _ in range(100)]
+
+        self.assertLess(sum(1 for recheck in rechecks if recheck < 140), 30)
+
+    def test_levels_out(self):
+        scheduler = RecheckScheduler(bucket_size=10)
+
+        for _ in range(10000):
+            scheduler.pick('example.com', 0, 0, 100)
+
+        counts = list(scheduler._global.values())
+        self.assertLess(max(counts) - min(counts), 100)
+
+    def test_prune(self):
+        scheduler = RecheckScheduler(bucket_size=10)
+        scheduler.pick('example.com', 0, 0, 5)
+        scheduler.pick('example.org', 0, 100, 105)
+
+        scheduler.prune(50)
+
+        self.assertEqual(list(scheduler._global.keys()), [10])
+        self.assertEqual(list(scheduler._per_host.keys()), ['example.org'])
+
+    def test_max_hosts(self):
+        scheduler = RecheckScheduler(bucket_size=10, max_hosts=2)
+        scheduler.pick('example.com', 0, 100, 200)
+        scheduler.pick('example.org', 0, 100, 200)
+        scheduler.pick('example.com', 0, 100, 200)
+        scheduler.pick('example.net', 0, 100, 200)
+
+        self.assertEqual(set(scheduler._per_host.keys()), {'example.com', 'example.net'})
+        self.assertEqual(set(scheduler._per_host_total.keys()), {'example.com', 'example.net'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import ssl
+import unittest
+from unittest import mock
+
+from linkchecker.status import ExtendedStatusCodes, UrlStatus
+from linkchecker.tls import TlsOutcomeCache, get_ssl_context
+
+
+EXPIRED = UrlStatus(False, ExtendedStatusCodes.SSL_CERTIFICATE_HAS_EXPIRED)
+SSL_ERROR = UrlStatus(False, ExtendedStatusCodes.SSL_ERROR)
+NOT_FOUND = UrlStatus(False, 404)
+
+KEY = ('example.com', 443, 2)
+
+
+class TestSslContext(unittest.TestCase):
+    def test_shared(self):
+        self.assertIs(get_ssl_context(), get_ssl_context())
+        self.assertIsNot(get_ssl_context(), get_ssl_context(strict=True))
+
+    def test_strict(self):
+        self.assertEqual(get_ssl_context(strict=True).minimum_version, ssl.TLSVersion.TLSv1_2)
+        self.assertEqual(get_ssl_context(strict=True).verify_mode, ssl.CERT_REQUIRED)
+
+
+class TestTlsOutcomeCache(unittest.TestCase):
+    def test_certificate_failure_cached(self):
+        cache = TlsOutcomeCache(ttl=60)
+
+        self.assertIsNone(cache.get(KEY))
+        cache.record(KEY, EXPIRED)
+
+        status = cache.get(KEY)
+        self.assertIsNotNone(status)
+        self.assertFalse(status.success)
+        self.assertEqual(status.status_code, ExtendedStatusCodes.SSL_CERTIFICATE_HAS_EXPIRED)
+
+        self.assertIsNone(cache.get(('example.com', 8443, 2)))
+        self.assertEqual(cache.get_statistics().hits, 1)
+
+    def test_other_failures_not_cached(self):
+        cache = TlsOutcomeCache(ttl=60)
+
+        cache.record(KEY, SSL_ERROR)
+        cache.record(KEY, NOT_FOUND)
+
+        self.assertIsNone(cache.get(KEY))
+
+    def test_expiration(self):
+        cache = TlsOutcomeCache(ttl=60)
+
+        with mock.patch('time.monotonic', return_value=1000.0):
+            cache.record(KEY, EXPIRED)
+
+        with mock.patch('time.monotonic', return_value=1059.0):
+            self.assertIsNotNone(cache.get(KEY))
+
+        with mock.patch('time.monotonic', return_value=1061.0):
+            self.assertIsNone(cache.get(KEY))
+
+
+if __name__ == '__main__':
+    unittest.main()
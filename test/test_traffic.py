@@ -0,0 +1,89 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import gzip
+import os
+import socket
+import tempfile
+import unittest
+
+from linkchecker.status import ExtendedStatusCodes, UrlStatus
+from linkchecker.traffic import TrafficProfileWriter, read_traffic_profile
+
+
+class TestTrafficProfile(unittest.TestCase):
+    def test_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'profile.gz')
+
+            writer = TrafficProfileWriter(path)
+            writer.record('example.com', socket.AF_INET, 0.25, UrlStatus(True, 200, 'https://example.com/'))
+            writer.record('example.org', socket.AF_INET6, 1.5, UrlStatus(False, ExtendedStatusCodes.TIMEOUT))
+            writer.record('example.com', socket.AF_INET, 0.1, UrlStatus(False, 404), fallback=True)
+            writer.record('example.org', socket.AF_INET, 0, UrlStatus(False, ExtendedStatusCodes.CONNECTION_REFUSED), shortcut='breaker')
+            writer.close()
+
+            self.assertEqual(writer.get_num_records(), 4)
+
+            records = list(read_traffic_profile(path))
+
+        self.assertEqual([record.host_id for record in records], [0, 1, 0, 1])
+        self.assertEqual([record.family for record in records], [socket.AF_INET, socket.AF_INET6, socket.AF_INET, socket.AF_INET])
+        self.assertEqual([record.duration for record in records], [0.25, 1.5, 0.1, 0])
+        self.assertEqual([record.status_code for record in records], [200, ExtendedStatusCodes.TIMEOUT, 404, ExtendedStatusCodes.CONNECTION_REFUSED])
+        self.assertEqual([record.redirect for record in records], [True, False, False, False])
+        self.assertEqual([record.fallback for record in records], [False, False, True, False])
+        self.assertEqual([record.shortcut for record in records], [None, None, None, 'breaker'])
+
+    def test_host_ids_rotated(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'profile.gz')
+
+            writer = TrafficProfileWriter(path, max_hosts=2)
+            for host in ['a.com', 'b.com', 'a.com', 'c.com', 'a.com', 'c.com']:
+                writer.record(host, socket.AF_INET, 0.1, UrlStatus(True, 200))
+            writer.close()
+
+            self.assertLessEqual(len(writer._host_ids), 2)
+            self.assertEqual([record.host_id for record in read_traffic_profile(path)], [0, 1, 0, 2, 3, 2])
+
+    def test_v1(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'profile.gz')
+
+            with gzip.open(path, 'wt') as fd:
+                fd.write('# repology-linkchecker traffic profile v1\n1000\t0\t4\t250\t200\t0\t0\n')
+
+            records = list(read_traffic_profile(path))
+
+        self.assertEqual(len(records), 1)
+        self.assertIsNone(records[0].shortcut)
+
+    def test_no_host_names(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'profile.gz')
+
+            writer = TrafficProfileWriter(path)
+            writer.record('secret.example.com', socket.AF_INET, 0.25, UrlStatus(True, 200))
+            writer.close()
+
+            with gzip.open(path, 'rb') as fd:
+                self.assertNotIn(b'secret', fd.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from linkchecker.status import UrlStatus
+from linkchecker.uniformity import UniformResponseDetector
+
+
+_NOT_FOUND = UrlStatus(False, 404)
+_OK = UrlStatus(True, 200)
+
+
+class TestUniformResponseDetector(unittest.TestCase):
+    def test_detection_and_sampling(self):
+        detector = UniformResponseDetector(threshold=3, sample_interval=4)
+        batch = detector.start_batch()
+
+        for _ in range(3):
+            self.assertTrue(batch.should_check())
+            self.assertTrue(batch.record(_NOT_FOUND, None))
+
+        self.assertEqual(batch.fingerprint, (_NOT_FOUND, None))
+        self.assertEqual(detector.get_statistics().hosts, 1)
+
+        self.assertEqual([batch.should_check() for _ in range(8)], [False, False, False, True, False, False, False, True])
+
+    def test_different_responses(self):
+        detector = UniformResponseDetector(threshold=3, sample_interval=4)
+        batch = detector.start_batch()
+
+        batch.record(_NOT_FOUND, None)
+        batch.record(UrlStatus(False, 403), None)
+        batch.record(_NOT_FOUND, None)
+        batch.record(_NOT_FOUND, None)
+        batch.record(_NOT_FOUND, None)
+
+        self.assertIsNone(batch.fingerprint)
+        self.assertTrue(batch.should_check())
+
+    def test_successes_are_not_uniform(self):
+        detector = UniformResponseDetector(threshold=2, sample_interval=4)
+        batch = detector.start_batch()
+
+        batch.record(_OK, None)
+        batch.record(_OK, None)
+
+        self.assertIsNone(batch.fingerprint)
+
+    def test_mismatch(self):
+        detector = UniformResponseDetector(threshold=2, sample_interval=4)
+        batch = detector.start_batch()
+
+        batch.record(_NOT_FOUND, None)
+        batch.record(_NOT_FOUND, None)
+        self.assertIsNotNone(batch.fingerprint)
+
+        self.assertFalse(batch.record(_OK, None))
+        self.assertIsNone(batch.fingerprint)
+        self.assertEqual(detector.get_statistics().mismatches, 1)
+
+        # disqualified for the rest of the batch
+        batch.record(_NOT_FOUND, None)
+        batch.record(_NOT_FOUND, None)
+        self.assertIsNone(batch.fingerprint)
+
+
+if __name__ == '__main__':
+    unittest.main()
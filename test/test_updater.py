@@ -0,0 +1,136 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import unittest
+from unittest import mock
+
+from linkchecker.hostmanager import HostManager
+from linkchecker.status import UrlStatus
+from linkchecker.updater import UrlUpdater, _PreviousCheck
+
+import yaml
+
+
+DAY = 86400
+NOW = 1000 * DAY
+
+OK = UrlStatus(True, 200)
+NOT_FOUND = UrlStatus(False, 404)
+
+URL = 'http://example.com/'
+
+
+class TestAdaptiveRechecks(unittest.TestCase):
+    def setUp(self):
+        self.updater = UrlUpdater(None, HostManager(yaml.safe_load("""
+            defaults: {delay: 3, recheck: 10d-20d, priority_recheck: 5d-10d, stable_recheck: 30d-60d, stable_after: 100d, confirm_recheck: 1d-2d}
+            hosts:
+              static.com: {}
+              fixed.com: {stable_recheck: 10d-20d, confirm_recheck: 10d-20d}
+        """)))
+
+    def test_stable(self):
+        previous = _PreviousCheck(OK, None, NOW - 300 * DAY, NOW - 200 * DAY)
+        self.assertEqual(self.updater._get_rechecks(URL, previous, OK, NOW), ((30 * DAY, 60 * DAY), (30 * DAY, 60 * DAY)))
+
+        previous = _PreviousCheck(OK, None, NOW - 200 * DAY, None)
+        self.assertEqual(self.updater._get_rechecks(URL, previous, OK, NOW), ((30 * DAY, 60 * DAY), (30 * DAY, 60 * DAY)))
+
+        self.assertEqual(self.updater.get_statistics().stable, 2)
+
+    def test_young_link_without_failures(self):
+        # no failure known, last success does not cover stable_after
+        previous = _PreviousCheck(OK, None, NOW - DAY, None)
+        self.assertEqual(self.updater._get_rechecks(URL, previous, OK, NOW), ((10 * DAY, 20 * DAY), (5 * DAY, 10 * DAY)))
+
+        # no success known either
+        previous = _PreviousCheck(OK, None, None, None)
+        self.assertEqual(self.updater._get_rechecks(URL, previous, OK, NOW), ((10 * DAY, 20 * DAY), (5 * DAY, 10 * DAY)))
+
+        self.assertEqual(self.updater.get_statistics().stable, 0)
+
+    def test_recently_failed(self):
+        previous = _PreviousCheck(OK, None, NOW - 300 * DAY, NOW - 50 * DAY)
+        self.assertEqual(self.updater._get_rechecks(URL, previous, OK, NOW), ((10 * DAY, 20 * DAY), (5 * DAY, 10 * DAY)))
+
+    def test_changed(self):
+        previous = _PreviousCheck(NOT_FOUND, None, NOW - 300 * DAY, NOW - DAY)
+        self.assertEqual(self.updater._get_rechecks(URL, previous, OK, NOW), ((DAY, 2 * DAY), (DAY, 2 * DAY)))
+
+        previous = _PreviousCheck(OK, None, NOW - 300 * DAY, NOW - 200 * DAY)
+        self.assertEqual(self.updater._get_rechecks(URL, previous, NOT_FOUND, NOW), ((DAY, 2 * DAY), (DAY, 2 * DAY)))
+
+        self.assertEqual(self.updater.get_statistics().confirmations, 2)
+
+    def test_first_failure(self):
+        self.assertEqual(self.updater._get_rechecks(URL, None, NOT_FOUND, NOW), ((DAY, 2 * DAY), (DAY, 2 * DAY)))
+
+        # failing on and on
+        previous = _PreviousCheck(NOT_FOUND, None, None, NOW - DAY)
+        self.assertEqual(self.updater._get_rechecks(URL, previous, NOT_FOUND, NOW), ((10 * DAY, 20 * DAY), (5 * DAY, 10 * DAY)))
+
+    def test_unknown_history(self):
+        self.assertEqual(self.updater._get_rechecks(URL, None, OK, NOW), ((10 * DAY, 20 * DAY), (5 * DAY, 10 * DAY)))
+        self.assertEqual(self.updater._get_rechecks(URL, None, None, NOW), ((10 * DAY, 20 * DAY), (5 * DAY, 10 * DAY)))
+
+    def test_never_shortens_or_stretches_past_host_rechecks(self):
+        previous = _PreviousCheck(OK, None, NOW - 200 * DAY, None)
+        self.assertEqual(self.updater._get_rechecks('http://fixed.com/', previous, OK, NOW), ((10 * DAY, 20 * DAY), (10 * DAY, 20 * DAY)))
+        self.assertEqual(self.updater._get_rechecks('http://fixed.com/', None, NOT_FOUND, NOW), ((10 * DAY, 20 * DAY), (5 * DAY, 10 * DAY)))
+
+
+class TestUpdateMany(unittest.IsolatedAsyncioTestCase):
+    async def test_next_check_picked_per_url(self):
+        updater = UrlUpdater(None, HostManager(yaml.safe_load('defaults: {delay: 3, recheck: 10d-20d, priority_recheck: 5d-10d}\nhosts: {}')), check_log=True)
+
+        urls = [f'http://example.com/{i}' for i in range(100)]
+        await updater.update_many(urls, NOT_FOUND, None)
+
+        self.assertEqual(len({record[2] for record in updater._check_log_buffer}), 100)
+        self.assertEqual(len({record[3] for record in updater._check_log_buffer}), 100)
+
+
+class TestCheckLog(unittest.IsolatedAsyncioTestCase):
+    async def test_pending_until_merged(self):
+        updater = UrlUpdater(None, HostManager(yaml.safe_load('defaults: {delay: 3, recheck: 10d-20d, priority_recheck: 5d-10d}\nhosts: {}')), check_log=True)
+
+        await updater.update_many([URL], OK, None)
+        self.assertTrue(updater.is_pending_merge(URL))
+
+        merge_started = asyncio.Event()
+        merge_released = asyncio.Event()
+
+        async def merge_check_log(pool):
+            merge_started.set()
+            await merge_released.wait()
+            return 1
+
+        with mock.patch('linkchecker.updater.append_check_log', mock.AsyncMock()), mock.patch('linkchecker.updater.update_statistics', mock.AsyncMock()), mock.patch('linkchecker.updater.merge_check_log', merge_check_log):
+            merging = asyncio.create_task(updater.merge_check_log())
+            await merge_started.wait()
+
+            self.assertTrue(updater.is_pending_merge(URL))
+
+            merge_released.set()
+            self.assertEqual(await merging, 1)
+
+        self.assertFalse(updater.is_pending_merge(URL))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,258 @@
+# Copyright (C) 2026 Dmitry Marakasov <amdmi3@amdmi3.ru>
+#
+# This file is part of repology
+#
+# repology is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# repology is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with repology.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import collections
+import unittest
+from typing import Dict, Iterable, List
+
+import yaml
+
+import yarl
+
+from linkchecker.hostmanager import HostManager
+from linkchecker.processor import UrlProcessor
+from linkchecker.worker import HostWorkerPool
+
+
+class _RecordingUrlProcessor(UrlProcessor):
+    batches: List[List[str]]
+
+    def __init__(self) -> None:
+        self.batches = []
+
+    def taste(self, url: str) -> bool:
+        return True
+
+    async def process_urls(self, urls: Iterable[str]) -> None:
+        self.batches.append(list(urls))
+        await asyncio.sleep(0)
+
+
+class _BlockingUrlProcessor(_RecordingUrlProcessor):
+    released: asyncio.Event
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.released = asyncio.Event()
+
+    async def process_urls(self, urls: Iterable[str]) -> None:
+        self.batches.append(list(urls))
+        await self.released.wait()
+
+
+class _HostBlockingUrlProcessor(_RecordingUrlProcessor):
+    _released: Dict[str, asyncio.Event]
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._released = collections.defaultdict(asyncio.Event)
+
+    def release(self, host: str) -> None:
+        self._released[host].set()
+
+    async def process_urls(self, urls: Iterable[str]) -> None:
+        urls = list(urls)
+        self.batches.append(urls)
+        await self._released[yarl.URL(urls[0]).host].wait()
+
+
+class TestHostWorkerPool(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.host_manager = HostManager(yaml.safe_load('defaults: {delay: 0, recheck: 1d-2d, priority_recheck: 1d-2d}\nhosts: {}'))
+
+    async def test_priority_urls_go_first(self):
+        processor = _RecordingUrlProcessor()
+        pool = HostWorkerPool(processor, self.host_manager)
+
+        await pool.add_url('http://example.com/1')
+        await pool.add_url('http://example.com/2', priority=True, lag=3600)
+        await pool.add_url('http://example.com/3')
+        await pool.join()
+
+        self.assertEqual(processor.batches[0][0], 'http://example.com/2')
+        self.assertEqual(set(processor.batches[0]), {'http://example.com/1', 'http://example.com/2', 'http://example.com/3'})
+
+        stats = pool.get_statistics()
+        self.assertEqual(stats.scanned, 3)
+        self.assertEqual(stats.scanned_priority, 1)
+        self.assertEqual(stats.max_priority_lag, 3600)
+
+    async def test_priority_url_displaces_normal_one(self):
+        processor = _RecordingUrlProcessor()
+        pool = HostWorkerPool(processor, self.host_manager, max_host_queue=2)
+
+        await pool.add_url('http://example.com/1')
+        await pool.add_url('http://example.com/2')
+        await pool.add_url('http://example.com/3')
+        await pool.add_url('http://example.com/4', priority=True)
+        await pool.join()
+
+        self.assertEqual(len(processor.batches[0]), 2)
+        self.assertEqual(processor.batches[0][0], 'http://example.com/4')
+        self.assertEqual(pool.get_statistics().dropped, 2)
+
+    async def test_dropped_on_full_queue(self):
+        processor = _BlockingUrlProcessor()
+        pool = HostWorkerPool(processor, self.host_manager, max_host_queue=1)
+
+        await pool.add_url('http://example.com/1')
+        await asyncio.sleep(0)  # let the worker pick the first url
+        await pool.add_url('http://example.com/2')
+        await pool.add_url('http://example.com/2')
+        await pool.add_url('http://example.com/3')
+
+        processor.released.set()
+        await pool.join()
+
+        self.assertEqual(pool.get_statistics().dropped, 1)
+
+    async def test_reserved_slots(self):
+        processor = _HostBlockingUrlProcessor()
+        pool = HostWorkerPool(processor, self.host_manager, max_workers=2, priority_share=0.5)
+
+        # without priority urls waiting, normal ones may use all slots
+        await pool.add_url('http://first.com/')
+        await asyncio.wait_for(pool.add_url('http://second.com/'), 1)
+        self.assertEqual(pool.get_statistics().workers, 2)
+
+        priority_adder = asyncio.create_task(pool.add_url('http://third.com/', priority=True))
+        normal_adder = asyncio.create_task(pool.add_url('http://fourth.com/'))
+        await asyncio.sleep(0)
+
+        # freed slot goes to the waiting priority url
+        processor.release('first.com')
+        await asyncio.wait_for(priority_adder, 1)
+        await asyncio.sleep(0)
+        self.assertFalse(normal_adder.done())
+        self.assertEqual(pool.get_statistics().priority_workers, 1)
+
+        processor.release('second.com')
+        await asyncio.wait_for(normal_adder, 1)
+
+        processor.release('third.com')
+        processor.release('fourth.com')
+        await pool.join()
+
+    async def test_priority_url_promotes_worker(self):
+        processor = _HostBlockingUrlProcessor()
+        pool = HostWorkerPool(processor, self.host_manager, max_workers=2, priority_share=0.5)
+
+        await pool.add_url('http://first.com/')
+        self.assertEqual(pool.get_statistics().priority_workers, 0)
+
+        await pool.add_url('http://first.com/other', priority=True)
+        self.assertEqual(pool.get_statistics().priority_workers, 1)
+
+        # promoted only once
+        await pool.add_url('http://first.com/another', priority=True)
+        self.assertEqual(pool.get_statistics().priority_workers, 1)
+
+        processor.release('first.com')
+        await pool.join()
+        self.assertEqual(pool.get_statistics().priority_workers, 0)
+
+    async def test_low_watermark(self):
+        processor = _BlockingUrlProcessor()
+        pool = HostWorkerPool(processor, self.host_manager, max_workers=4, low_watermark=1)
+
+        await pool.add_url('http://first.com/')
+        await pool.add_url('http://second.com/')
+
+        waiter = asyncio.create_task(pool.wait_for_low_watermark())
+        await asyncio.sleep(0)
+        self.assertFalse(waiter.done())
+
+        processor.released.set()
+        await asyncio.wait_for(waiter, 1)
+        await pool.join()
+
+    async def test_set_max_workers_wakes_up_waiters(self):
+        processor = _BlockingUrlProcessor()
+        pool = HostWorkerPool(processor, self.host_manager, max_workers=1)
+
+        await pool.add_url('http://first.com/')
+
+        adder = asyncio.create_task(pool.add_url('http://second.com/'))
+        await asyncio.sleep(0)
+        self.assertFalse(adder.done())
+
+        pool.set_max_workers(2)
+        await asyncio.wait_for(adder, 1)
+        self.assertEqual(pool.get_statistics().workers, 2)
+
+        processor.released.set()
+        await pool.join()
+
+    async def test_concurrent_waiters_for_same_host(self):
+        processor = _HostBlockingUrlProcessor()
+        pool = HostWorkerPool(processor, self.host_manager, max_workers=2)
+
+        await pool.add_url('http://first.com/')
+        await pool.add_url('http://second.com/')
+
+        adders = asyncio.gather(pool.add_url('http://x.com/a'), pool.add_url('http://x.com/b'))
+        await asyncio.sleep(0)
+
+        # both waiters wake up at once
+        processor.release('first.com')
+        processor.release('second.com')
+        await asyncio.wait_for(adders, 1)
+
+        self.assertEqual(pool.get_statistics().workers, 1)
+
+        processor.release('x.com')
+        await asyncio.wait_for(pool.join(), 1)
+
+        x_batches = [batch for batch in processor.batches if 'x.com' in batch[0]]
+        self.assertEqual(len(x_batches), 1)
+        self.assertEqual(set(x_batches[0]), {'http://x.com/a', 'http://x.com/b'})
+
+    async def test_stop_lets_urls_in_processing_finish(self):
+        processor = _BlockingUrlProcessor()
+        pool = HostWorkerPool(processor, self.host_manager)
+
+        await pool.add_url('http://example.com/1')
+        await asyncio.sleep(0)  # let the worker pick the first url
+        await pool.add_url('http://example.com/2')
+
+        self.assertEqual(pool.stop(), 1)
+
+        await pool.add_url('http://example.com/3')
+
+        processor.released.set()
+        await pool.join()
+
+        self.assertEqual(processor.batches, [['http://example.com/1']])
+        self.assertEqual(pool.get_statistics().discarded, 2)
+
+    async def test_cancel(self):
+        processor = _BlockingUrlProcessor()
+        pool = HostWorkerPool(processor, self.host_manager)
+
+        await pool.add_url('http://example.com/1')
+        await asyncio.sleep(0)
+
+        pool.stop()
+        pool.cancel()
+        await pool.join()
+
+        self.assertEqual(pool.get_statistics().workers, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()